@@ -1,11 +1,69 @@
 import requests
-import json
 import os
+import re
 import time
+from typing import List
+from pydantic import BaseModel, Field, ValidationError
+
+
+class RoadmapStep(BaseModel):
+    level: int
+    title: str
+    description: str
+    topics: List[str] = Field(min_length=1)
+    resources: List[str]
+
+
+class Roadmap(BaseModel):
+    """
+    Shape of a generated roadmap. Its JSON schema is sent to Ollama as the
+    structured output format, and responses are validated against it.
+    """
+    title: str
+    description: str
+    steps: List[RoadmapStep] = Field(min_length=1)
+    estimated_time: str
+    prerequisites: List[str]
+
+
+ROADMAP_SCHEMA = Roadmap.model_json_schema()
+# A roadmap that fails validation is asked for once more, with its errors
+MAX_ATTEMPTS = 2
+# Errors of servers that cannot use a JSON schema as format
+SCHEMA_ERROR = re.compile(r'schema|grammar|\bformat\b', re.IGNORECASE)
+
+
+def schema_rejected(response):
+    """
+    Whether Ollama could not use the schema as format: servers before 0.5
+    answer 400, newer ones name the schema or format in the error.
+    """
+    if response.status_code == 400:
+        return True
+    if response.status_code < 400:
+        return False
+    try:
+        error = response.json().get("error") or response.text
+    except (ValueError, AttributeError):
+        error = response.text
+    return bool(SCHEMA_ERROR.search(error))
+
+
+def validation_feedback(error):
+    """
+    Prompt text telling the model what was wrong with its last roadmap.
+    """
+    problems = "\n".join(
+        f"- {'.'.join(map(str, e['loc'])) or 'roadmap'}: {e['msg']}" for e in error.errors()
+    )
+    return (f"Your previous answer was not a valid roadmap:\n{problems}\n"
+            "Answer again with the complete JSON object, fixing these problems.")
 
 def generate_roadmap(topic):
     """
     Generate a learning roadmap for the given topic using Ollama.
+    A response that does not validate is retried once with its errors
+    added to the prompt.
     """
     print(f"\nGenerating roadmap for '{topic}'...\n")
     
@@ -38,36 +96,39 @@ def generate_roadmap(topic):
     Include 5-7 main steps with 2-4 subtopics each. Make it comprehensive but manageable.
     Ensure the response is valid JSON with proper quotes and formatting."""
     
+    payload = {
+        "model": "llama2",
+        "prompt": prompt,
+        "stream": False
+    }
+    use_schema = True
     try:
-        # Call Ollama API
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llama2",
-                "prompt": prompt,
-                "stream": False
-            }
-        )
-        
-        if response.status_code != 200:
-            print(f"Error: Failed to get response from Ollama (Status code: {response.status_code})")
-            return None
-        
-        # Parse the response
-        result = response.json()
-        
-        # Clean the response text to ensure it's valid JSON
-        response_text = result["response"].strip()
-        # Remove any markdown code block markers if present
-        response_text = response_text.replace("```json", "").replace("```", "").strip()
-        
-        try:
-            roadmap_data = json.loads(response_text)
-            return roadmap_data
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON: {str(e)}")
-            print(f"Problematic response text: {response_text}")
-            return None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            # Call Ollama API, constraining the output to the roadmap schema
+            if use_schema:
+                response = requests.post("http://localhost:11434/api/generate", json=dict(payload, format=ROADMAP_SCHEMA))
+                use_schema = not schema_rejected(response)
+            if not use_schema:
+                # Fall back to plain JSON mode and validate locally
+                response = requests.post("http://localhost:11434/api/generate", json=dict(payload, format="json"))
+            
+            if response.status_code != 200:
+                print(f"Error: Failed to get response from Ollama (Status code: {response.status_code})")
+                return None
+            
+            # Parse the response
+            response_text = response.json()["response"]
+            
+            try:
+                roadmap_data = Roadmap.model_validate_json(response_text)
+                return roadmap_data.model_dump()
+            except ValidationError as e:
+                print(f"Error parsing roadmap: {str(e)}")
+                if attempt == MAX_ATTEMPTS:
+                    print(f"Problematic response text: {response_text}")
+                    return None
+                print("Retrying with the validation errors...")
+                payload["prompt"] = f"{prompt}\n\n{validation_feedback(e)}"
             
     except Exception as e:
         print(f"Error: {str(e)}")
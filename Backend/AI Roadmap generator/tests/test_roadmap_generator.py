@@ -0,0 +1,82 @@
+import json
+import pytest
+import roadmap_generator
+from roadmap_generator import generate_roadmap, schema_rejected
+
+VALID = {
+    "title": "Learning Roadmap for Python",
+    "description": "From basics to packaging",
+    "steps": [{"level": 1, "title": "Basics", "description": "Syntax", "topics": ["Types"], "resources": []}],
+    "estimated_time": "2 months",
+    "prerequisites": []
+}
+# No steps, and a step without topics would also fail
+INVALID = dict(VALID, steps=[])
+
+
+class Response:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.text = json.dumps(self.body)
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """Replace requests.post with a queue of responses and record the payloads."""
+    requests_sent, responses = [], []
+
+    def post(url, json=None):
+        requests_sent.append(json)
+        return responses.pop(0)
+
+    monkeypatch.setattr(roadmap_generator.requests, 'post', post)
+    return requests_sent, responses
+
+
+def answer(roadmap):
+    return Response(body={"response": json.dumps(roadmap)})
+
+
+def test_valid_roadmap_is_returned(ollama):
+    sent, responses = ollama
+    responses.append(answer(VALID))
+    assert generate_roadmap("Python") == VALID
+    assert sent[0]["format"] == roadmap_generator.ROADMAP_SCHEMA
+
+
+def test_invalid_roadmap_is_retried_once_with_its_errors(ollama):
+    sent, responses = ollama
+    responses += [answer(INVALID), answer(VALID)]
+    assert generate_roadmap("Python") == VALID
+    assert len(sent) == 2
+    assert "steps" in sent[1]["prompt"] and "not a valid roadmap" in sent[1]["prompt"]
+    assert sent[1]["prompt"].startswith(sent[0]["prompt"])
+
+
+def test_gives_up_after_second_invalid_roadmap(ollama):
+    sent, responses = ollama
+    responses += [answer(INVALID), Response(body={"response": "not json"})]
+    assert generate_roadmap("Python") is None
+    assert len(sent) == 2
+
+
+def test_rejected_schema_falls_back_to_json_mode_for_retries(ollama):
+    sent, responses = ollama
+    responses += [
+        Response(500, {"error": "invalid JSON schema in format"}),
+        answer(INVALID),
+        answer(VALID)
+    ]
+    assert generate_roadmap("Python") == VALID
+    assert [request["format"] for request in sent[1:]] == ["json", "json"]
+
+
+def test_schema_rejected():
+    assert schema_rejected(Response(400, {"error": "anything"}))
+    assert schema_rejected(Response(500, {"error": "failed to load grammar"}))
+    assert not schema_rejected(Response(500, {"error": "model not found"}))
+    assert not schema_rejected(Response(200, {"response": "{}"}))
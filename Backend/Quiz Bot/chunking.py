@@ -0,0 +1,138 @@
+import re
+from near_duplicates import NearDuplicateIndex
+
+HEADING_PATTERN = re.compile(
+    r'^(#{1,6}\s+.+|(chapter|section|unit|part|lesson)\b.{0,80}|\d+(\.\d+)*\.?\s+[A-Z].{0,80})$',
+    re.IGNORECASE
+)
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def is_heading(line):
+    """Guess whether a line is a section heading."""
+    line = line.strip()
+    if not line or len(line) > 100:
+        return False
+    if HEADING_PATTERN.match(line):
+        return True
+    # Short all-caps lines without closing punctuation
+    return len(line.split()) <= 8 and line[-1] not in '.,;:!?' and line.isupper()
+
+
+def _paragraphs(text):
+    """Yield (section, paragraph) pairs, tracking the latest heading."""
+    section = None
+    for block in re.split(r'\n\s*\n', text):
+        lines = [line for line in block.strip().splitlines() if line.strip()]
+        while lines and is_heading(lines[0]):
+            section = lines.pop(0).strip().lstrip('#').strip()
+        if lines:
+            yield section, ' '.join(line.strip() for line in lines)
+
+
+def _cut(sentence, max_size, length):
+    """Where to cut a sentence so the part before a space fits in max_size."""
+    if length is len:
+        cut = sentence.rfind(' ', 0, max_size)
+        return cut if cut > 0 else max_size
+    # Binary search over the spaces, as the length of a prefix only grows.
+    # A part of max_size tokens or words is far shorter than 8 * max_size characters.
+    spaces = [i for i, char in enumerate(sentence[:max_size * 8]) if char == ' ' and i > 0]
+    low, high = 0, len(spaces)
+    while low < high:
+        middle = (low + high) // 2
+        if length(sentence[:spaces[middle]]) <= max_size:
+            low = middle + 1
+        else:
+            high = middle
+    return spaces[low - 1] if low else max_size
+
+
+def _split_long(paragraph, max_size, length=len):
+    """Split a paragraph longer than max_size at sentence boundaries."""
+    pieces, current = [], ''
+    for sentence in SENTENCE_END.split(paragraph):
+        while length(sentence) > max_size:
+            # A single sentence that does not fit is cut at a space
+            cut = _cut(sentence, max_size, length)
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if current and length(current) + length(sentence) + 1 > max_size:
+            pieces.append(current)
+            current = ''
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text, max_size=2000, length=len):
+    """
+    Split a document into chunks of whole paragraphs of at most max_size,
+    measured by length (characters by default, or e.g. a token counter).
+    A chunk never spans two sections, so each one stays on a single subject.
+    Returns a list of {"index", "section", "text"} dicts in document order.
+    """
+    chunks = []
+    current, current_section = [], None
+    size = 0
+
+    def flush():
+        nonlocal size
+        if current:
+            chunks.append({'index': len(chunks), 'section': current_section, 'text': '\n\n'.join(current)})
+            current.clear()
+            size = 0
+
+    for section, paragraph in _paragraphs(text):
+        if section != current_section:
+            flush()
+            current_section = section
+        paragraph_size = length(paragraph)
+        pieces = _split_long(paragraph, max_size, length) if paragraph_size > max_size else [paragraph]
+        for piece in pieces:
+            piece_size = paragraph_size if len(pieces) == 1 else length(piece)
+            if current and size + piece_size > max_size:
+                flush()
+            current.append(piece)
+            size += piece_size + 2
+    flush()
+    return chunks
+
+
+def select_chunks(chunks, count):
+    """
+    Pick count chunks spread evenly over the document, taking the middle
+    chunk of each equal slice so every part of the text is represented.
+    """
+    if count >= len(chunks):
+        return list(chunks)
+    return [chunks[int((i + 0.5) * len(chunks) / count)] for i in range(count)]
+
+
+def normalize_question(text):
+    """Lowercase words of a question, for spotting exact repeats."""
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def sample_with_coverage(groups, num_questions):
+    """
+    Merge per-chunk question lists into num_questions questions, dropping
+    repeats and rewordings, and taking one question from each chunk in turn
+    so the quiz covers every chunk before any chunk contributes a second one.
+    """
+    near_duplicates = NearDuplicateIndex()
+    unique_groups = [[q for q in questions if near_duplicates.add(q)] for questions in groups]
+
+    selected = []
+    depth = 0
+    while len(selected) < num_questions and any(depth < len(group) for group in unique_groups):
+        for i, group in enumerate(unique_groups):
+            if depth < len(group) and len(selected) < num_questions:
+                selected.append((i, depth, group[depth]))
+        depth += 1
+    # Keep document order: chunk by chunk rather than round by round
+    return [q for _, _, q in sorted(selected, key=lambda item: item[:2])]
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+import PyPDF2
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+COMPATIBILITY_NAMESPACE = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'quiz_bot', 'extracted')
+
+
+def file_hash(file_path):
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_pages(file_path, start, stop):
+    """Extract the text of pages start..stop-1 (runs in a worker process)."""
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
+
+def iter_pdf_pages(file_path, workers=None, pages_per_task=8):
+    """
+    Yield the text of each PDF page in order. Larger documents are split
+    into ranges of pages_per_task pages that are extracted in a process
+    pool, with only a few ranges in flight at a time.
+    """
+    with open(file_path, 'rb') as f:
+        num_pages = len(PyPDF2.PdfReader(f).pages)
+    workers = workers or os.cpu_count() or 1
+
+    ranges = [(start, min(start + pages_per_task, num_pages)) for start in range(0, num_pages, pages_per_task)]
+    if workers == 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield from _extract_pages(file_path, start, stop)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep two ranges per worker queued, in document order
+        ranges = iter(ranges)
+        pending = deque(pool.submit(_extract_pages, file_path, *pages) for pages in islice(ranges, 2 * workers))
+        while pending:
+            pages = pending.popleft().result()
+            for next_pages in islice(ranges, 1):
+                pending.append(pool.submit(_extract_pages, file_path, *next_pages))
+            yield from pages
+
+
+def iter_docx_paragraphs(file_path):
+    """
+    Yield the text of each paragraph of a .docx file, including table
+    cells, parsing document.xml incrementally instead of loading it whole.
+    Tabs and line breaks are kept. A paragraph nested in another (e.g. in
+    a text box) is yielded on its own, before the paragraph holding it.
+    """
+    paragraph = f'{WORD_NAMESPACE}p'
+    breaks = {
+        f'{WORD_NAMESPACE}tab': '\t',
+        f'{WORD_NAMESPACE}br': '\n',
+        f'{WORD_NAMESPACE}cr': '\n'
+    }
+    # Paragraph properties hold tab stops (w:tab) rather than text, and
+    # fallbacks repeat the text of a text box for older readers
+    skipped = {f'{WORD_NAMESPACE}pPr', f'{COMPATIBILITY_NAMESPACE}Fallback'}
+    # Text parts of the open paragraphs, innermost last
+    open_paragraphs = []
+    skip_depth = 0
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open('word/document.xml') as document:
+            for event, element in iterparse(document, events=('start', 'end')):
+                if element.tag in skipped:
+                    skip_depth += 1 if event == 'start' else -1
+                elif skip_depth:
+                    continue
+                elif element.tag == paragraph:
+                    if event == 'start':
+                        open_paragraphs.append([])
+                        continue
+                    yield ''.join(open_paragraphs.pop())
+                    # Clearing an inner paragraph would drop the text of
+                    # runs the outer one still holds
+                    if not open_paragraphs:
+                        element.clear()
+                elif event == 'start' or not open_paragraphs:
+                    continue
+                elif element.tag == f'{WORD_NAMESPACE}t':
+                    open_paragraphs[-1].append(element.text or '')
+                elif element.tag in breaks:
+                    open_paragraphs[-1].append(breaks[element.tag])
+
+
+def iter_text_paragraphs(file_path):
+    """Yield the paragraphs of a text file, separated by blank lines."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = []
+        for line in f:
+            if line.strip():
+                lines.append(line.rstrip('\n'))
+            elif lines:
+                yield '\n'.join(lines)
+                lines = []
+        if lines:
+            yield '\n'.join(lines)
+
+
+class DocumentReader:
+    """
+    Extracts text from .txt, .pdf and .docx files as a stream of pages or
+    paragraphs. Extracted text is cached by the file's content hash, so
+    reading the same document again skips extraction. The hash itself is
+    only recomputed when the file's size or modification time change.
+    """
+    extractors = {
+        '.txt': iter_text_paragraphs,
+        '.pdf': iter_pdf_pages,
+        '.docx': iter_docx_paragraphs
+    }
+
+    def __init__(self, cache_dir=None, workers=None):
+        self.cache_dir = cache_dir or os.environ.get('QUIZ_BOT_CACHE', DEFAULT_CACHE_DIR)
+        self.workers = workers
+
+    def _stat_path(self, path):
+        """
+        File holding the size, mtime and hash last seen for a source path.
+        Each path has its own, so concurrent readers never rewrite a
+        shared index.
+        """
+        key = hashlib.sha256(path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'files', f'{key}.json')
+
+    def source_hash(self, file_path):
+        """Content hash of a file, reusing the last one while size and mtime match."""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        stat_path = self._stat_path(path)
+        try:
+            with open(stat_path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        sha256 = file_hash(path)
+        os.makedirs(os.path.dirname(stat_path), exist_ok=True)
+        tmp_path = f'{stat_path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}, f)
+        os.replace(tmp_path, stat_path)
+        return sha256
+
+    def iter_segments(self, file_path):
+        """Yield a document's pages (PDF) or paragraphs (.txt, .docx) lazily."""
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        extension = file_path.suffix.lower()
+        if extension not in self.extractors:
+            raise ValueError(f"Unsupported file type: {extension}")
+
+        cache_path = os.path.join(self.cache_dir, f'{self.source_hash(file_path)}.jsonl')
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+            return
+
+        if extension == '.pdf':
+            segments = iter_pdf_pages(file_path, self.workers)
+        else:
+            segments = self.extractors[extension](file_path)
+
+        # Cache while streaming; only a complete extraction is kept
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{cache_path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as cache:
+                for segment in segments:
+                    cache.write(json.dumps(segment) + '\n')
+                    yield segment
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def read(self, file_path):
+        """Return a document's full text, with a blank line between pages or paragraphs."""
+        return '\n\n'.join(self.iter_segments(file_path))
@@ -0,0 +1,72 @@
+import json
+
+
+class JSONArrayStream:
+    """
+    Incrementally extract the objects of a top-level JSON array from text
+    that arrives in fragments, such as tokens streamed from Ollama. Each
+    object is parsed as soon as its closing brace arrives. Text before the
+    array (e.g. a ```json fence) is ignored, and an object that fails to
+    parse is skipped instead of failing the whole array. An object cut off
+    at the end of the text is never returned.
+    """
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.current = []
+        self.parsed = 0
+        self.errors = 0
+
+    def feed(self, text):
+        """Consume a fragment and return the objects it completed."""
+        objects = []
+        for char in text:
+            if self.done:
+                break
+            if not self.started:
+                self.started = char == '['
+                continue
+
+            if self.depth == 0:
+                # Between array items: only an object start or the end matters
+                if char == '{':
+                    self.depth = 1
+                    self.current = ['{']
+                elif char == ']':
+                    self.done = True
+                elif not char.isspace() and self.parsed + self.errors == 0:
+                    # Not the array after all, e.g. "[1]" in the text before it
+                    self.started = char == '['
+                continue
+
+            self.current.append(char)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    obj = self._parse(''.join(self.current))
+                    if obj is not None:
+                        objects.append(obj)
+        return objects
+
+    def _parse(self, text):
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return None
+        self.parsed += 1
+        return obj
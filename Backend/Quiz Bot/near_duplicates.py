@@ -0,0 +1,85 @@
+"""
+Near-duplicate detection for quiz questions with MinHash and
+locality-sensitive hashing (LSH).
+
+A question's words and the words of its correct answer, minus stopwords,
+are reduced to a MinHash signature whose agreement with another signature
+estimates the Jaccard similarity of their word sets. Signatures are split into bands;
+questions sharing any band are candidates, and only candidates are
+compared, so checking a question costs the same however many questions
+are indexed.
+"""
+import hashlib
+import random
+import re
+
+NUM_PERM = 64
+BANDS = 16
+THRESHOLD = 0.6
+
+# Words too common to say whether two questions ask the same thing
+STOPWORDS = frozenset(
+    "a an the is are was were be been of in on at to for from by with and or as "
+    "it its this that these those which what who whom whose when where why how "
+    "do does did called known".split()
+)
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(42)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def question_text(q):
+    """Question text plus the text of its correct answer."""
+    answer = q.get('correct_answer', '')
+    if q.get('type') == 'mcq' and isinstance(q.get('options'), list) and answer in ('A', 'B', 'C', 'D'):
+        index = 'ABCD'.index(answer)
+        if index < len(q['options']):
+            answer = q['options'][index]
+    return f"{q.get('question', '')} {answer}"
+
+
+def signature(text):
+    """MinHash signature of the set of words in text."""
+    words = set(re.findall(r'\w+', text.lower())) - STOPWORDS or {''}
+    hashes = [int.from_bytes(hashlib.blake2b(w.encode('utf-8'), digest_size=8).digest(), 'little') for w in words]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS)
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+
+
+def band_keys(sig, scope=''):
+    """
+    One 64-bit key per band of the signature. Including scope (a topic or
+    source hash) keeps buckets of different quizzes apart.
+    """
+    rows = len(sig) // BANDS
+    keys = []
+    for band in range(BANDS):
+        values = ','.join(map(str, sig[band * rows:(band + 1) * rows]))
+        digest = hashlib.blake2b(f'{scope}|{band}|{values}'.encode('utf-8'), digest_size=8).digest()
+        # Signed, to fit an SQLite INTEGER
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+class NearDuplicateIndex:
+    """In-memory LSH index of question signatures."""
+    def __init__(self, threshold=THRESHOLD):
+        self.threshold = threshold
+        self.buckets = {}
+
+    def add(self, q):
+        """Index q unless it is a near-duplicate; return whether it was added."""
+        sig = signature(question_text(q))
+        keys = band_keys(sig)
+        for key in keys:
+            for other in self.buckets.get(key, ()):
+                if similarity(sig, other) >= self.threshold:
+                    return False
+        for key in keys:
+            self.buckets.setdefault(key, []).append(sig)
+        return True
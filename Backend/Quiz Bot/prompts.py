@@ -0,0 +1,207 @@
+"""
+Quiz prompt templates, token estimates and per-quiz prompt statistics.
+
+A template is compiled once per source kind (topic or content) and set of
+question types: the examples and rules of the selected types are joined
+ahead of time, and only the topic or content and the number of questions
+are filled in per request. Prompt parameters travel with the prompt as a
+QuizPrompt, so a retry re-renders it with new values instead of editing
+the text.
+"""
+import re
+import threading
+import time
+from functools import lru_cache
+from string import Formatter
+
+# Rough token pieces for Mistral-like tokenizers: short words, fragments of
+# long words, and punctuation. Errs on the side of more tokens.
+TOKEN_PATTERN = re.compile(r'\w{1,5}|[^\w\s]')
+
+HEADERS = {
+    "topic": "Create a quiz about {topic} with {num_questions} questions.",
+    "content": "Create a quiz based on the following content with {num_questions} questions.\nContent: {content}\n"
+}
+
+EXAMPLES = {
+    "mcq": """For Multiple Choice Questions (type: "mcq"):
+{
+    "type": "mcq",
+    "question": "What is 2 + 2?",
+    "options": ["3", "4", "5", "6"],
+    "correct_answer": "B",
+    "explanation": "2 + 2 equals 4, which is option B"
+}""",
+    "fill_blank": """For Fill in the Blanks (type: "fill_blank"):
+{
+    "type": "fill_blank",
+    "question": "The capital of France is _____.",
+    "correct_answer": "Paris",
+    "explanation": "Paris is the capital city of France."
+}""",
+    "true_false": """For True/False Questions (type: "true_false"):
+{
+    "type": "true_false",
+    "question": "The Earth is flat.",
+    "correct_answer": "False",
+    "explanation": "The Earth is an oblate spheroid, not flat."
+}"""
+}
+
+TYPE_RULES = {
+    "mcq": [
+        "For MCQs, each question must have exactly 4 options",
+        'For MCQs, the correct_answer must be exactly "A", "B", "C", or "D" (uppercase)'
+    ],
+    "fill_blank": ["For fill in the blanks, use _____ to indicate the blank"],
+    "true_false": ['For true/false, correct_answer must be exactly "True" or "False" (case-sensitive)']
+}
+
+GENERAL_RULES = [
+    "Return only the JSON array, no other text",
+    "Make questions challenging but fair",
+    "Ensure explanations are clear and concise",
+    "Do not include any markdown formatting or code blocks",
+    'IMPORTANT: Every question MUST have a "type", "question", and "explanation" field'
+]
+
+CONTENT_RULES = ["Questions should be based on the provided content"]
+
+AVOID_HEADER = "\n\nThe quiz already has these questions. Do not repeat them or test the same facts:\n"
+
+
+def count_tokens(text):
+    """Estimated number of tokens in text."""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+class PromptTemplate:
+    """Template text split once into literal parts and field names."""
+    def __init__(self, header, body=''):
+        self.literals, self.fields = [''], []
+        for literal, field, _, _ in Formatter().parse(header):
+            self.literals[-1] += literal
+            if field:
+                self.fields.append(field)
+                self.literals.append('')
+        # The body holds the JSON examples, so its braces are not fields
+        self.literals[-1] += body
+
+    def render(self, **values):
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=None)
+def compile_template(kind, question_types):
+    """The template for a source kind and a tuple of question types."""
+    rules = [f"Include ONLY the following question types: {', '.join(question_types)}"]
+    for question_type in question_types:
+        rules.extend(TYPE_RULES[question_type])
+    rules.extend(GENERAL_RULES)
+    if kind == "content":
+        rules.extend(CONTENT_RULES)
+    body = "\n".join([
+        'Return a JSON array of questions. Each question should have a "type" field indicating its type.',
+        "For each type, use this structure:",
+        "",
+        "\n\n".join(EXAMPLES[t] for t in question_types),
+        "",
+        "Rules:",
+        "\n".join(f"{i}. {rule}" for i, rule in enumerate(rules, 1))
+    ])
+    return PromptTemplate(HEADERS[kind] + "\n", body)
+
+
+class PromptStats:
+    """Prompt build time and token counts of one quiz, summed over its requests."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prompts = 0
+        self.build_seconds = 0.0
+        self.estimated_tokens = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        # Requests whose token counts Ollama reported; a stream closed
+        # early ends before Ollama sends them
+        self.reported = 0
+
+    def add_prompt(self, seconds, tokens):
+        with self.lock:
+            self.prompts += 1
+            self.build_seconds += seconds
+            self.estimated_tokens += tokens
+
+    def add_response(self, result):
+        """Record the token counts of a final Ollama response."""
+        if 'prompt_eval_count' not in result:
+            return
+        with self.lock:
+            self.reported += 1
+            self.prompt_tokens += result['prompt_eval_count']
+            self.output_tokens += result.get('eval_count', 0)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'prompts': self.prompts,
+                'build_ms': round(self.build_seconds * 1000, 3),
+                'estimated_prompt_tokens': self.estimated_tokens,
+                'prompt_tokens': self.prompt_tokens,
+                'output_tokens': self.output_tokens,
+                'reported_requests': self.reported
+            }
+
+    def summary(self):
+        stats = self.to_dict()
+        text = (f"{stats['prompts']} prompt(s) built in {stats['build_ms']:.2f} ms, "
+                f"~{stats['estimated_prompt_tokens']} prompt tokens estimated")
+        if stats['reported_requests']:
+            text += (f"; Ollama reported {stats['prompt_tokens']} prompt and {stats['output_tokens']} output tokens "
+                     f"for {stats['reported_requests']} request(s)")
+        return text
+
+
+class QuizPrompt:
+    """
+    A quiz prompt kept as its parameters (topic or content, num_questions,
+    question_types) and rendered from its compiled template on demand.
+    """
+    def __init__(self, kind, stats=None, **params):
+        self.kind = kind
+        self.params = params
+        self.stats = stats or PromptStats()
+
+    @property
+    def question_types(self):
+        return self.params['question_types']
+
+    def render(self, num_questions=None, question_types=None, avoid=(), max_tokens=None):
+        """
+        Render the prompt, optionally for other counts or types. Questions
+        in avoid are listed as ones not to repeat, newest first until
+        max_tokens is reached.
+        """
+        start = time.perf_counter()
+        template = compile_template(self.kind, tuple(question_types or self.question_types))
+        values = dict(self.params, num_questions=num_questions or self.params['num_questions'])
+        text = template.render(**values)
+        tokens = count_tokens(text)
+        if avoid:
+            budget = None if max_tokens is None else max_tokens - tokens - count_tokens(AVOID_HEADER)
+            lines = []
+            for question in reversed(avoid):
+                line = f"- {question}"
+                if budget is not None:
+                    budget -= count_tokens(line)
+                    if budget < 0:
+                        break
+                lines.append(line)
+            if lines:
+                text += AVOID_HEADER + "\n".join(reversed(lines))
+                tokens = count_tokens(text)
+        self.stats.add_prompt(time.perf_counter() - start, tokens)
+        return text
@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from chunking import normalize_question
+from near_duplicates import THRESHOLD, band_keys, question_text, signature, similarity
+
+DEFAULT_BANK_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'quiz_bot', 'quiz_bank.sqlite3')
+# Times a question is served before the bank stops reusing it
+DEFAULT_MAX_SERVES = 3
+# Chunk of questions generated from a whole document in one prompt, kept
+# apart from the questions of its first chunk
+WHOLE_DOCUMENT = -1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL DEFAULT '',
+    source_hash TEXT NOT NULL DEFAULT '',
+    chunk INTEGER NOT NULL DEFAULT -1,
+    type TEXT NOT NULL,
+    question_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    served_count INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS questions_unique ON questions (topic, source_hash, question_key);
+CREATE INDEX IF NOT EXISTS questions_by_topic ON questions (topic, type, served_count);
+CREATE INDEX IF NOT EXISTS questions_by_source ON questions (source_hash, chunk, type, served_count);
+CREATE TABLE IF NOT EXISTS question_bands (
+    band_key INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (band_key, question_id)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_topic(topic):
+    return normalize_question(topic or '')
+
+
+def _scoped_band_keys(q, topic, source_hash):
+    """Signature and LSH band keys of a question within its topic or source."""
+    sig = signature(question_text(q))
+    return sig, band_keys(sig, f'topic:{topic}' if topic else f'source:{source_hash}')
+
+
+class QuizBank:
+    """
+    Persistent store of validated questions, indexed by topic, source
+    document hash, chunk and type. Quizzes are served from the bank by
+    sampling the least-served questions first, so the model only has to
+    generate what the bank is missing. A question is served at most
+    max_serves times, after which it no longer counts as stock and new
+    questions are generated in its place. Each call opens its own SQLite
+    connection, so threads and processes can share one bank file.
+
+    Rewordings of a stored question are rejected as well as exact repeats:
+    question_bands holds the MinHash band keys of every question, so a new
+    question is only compared with the few stored questions sharing a band.
+    """
+    def __init__(self, path=None, max_serves=None):
+        self.path = path or os.environ.get('QUIZ_BANK', DEFAULT_BANK_PATH)
+        self.max_serves = max_serves or int(os.environ.get('QUIZ_BANK_MAX_SERVES', DEFAULT_MAX_SERVES))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            has_bands = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'question_bands'"
+            ).fetchone()
+            conn.executescript(SCHEMA)
+            if not has_bands:
+                self._index_bands(conn)
+
+    def _index_bands(self, conn):
+        """Add band keys for questions stored before near-duplicate detection."""
+        for question_id, topic, source_hash, data in conn.execute(
+                'SELECT id, topic, source_hash, data FROM questions').fetchall():
+            _, keys = _scoped_band_keys(json.loads(data), topic, source_hash)
+            conn.executemany('INSERT OR IGNORE INTO question_bands (band_key, question_id) VALUES (?, ?)',
+                             [(key, question_id) for key in keys])
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _where(self, question_types, topic, source_hash, chunk):
+        """WHERE clause matching one topic or one source (and chunk) and types."""
+        if topic is not None:
+            clauses, params = ['topic = ?'], [normalize_topic(topic)]
+        else:
+            clauses, params = ['source_hash = ?'], [source_hash]
+            if chunk is not None:
+                clauses.append('chunk = ?')
+                params.append(chunk)
+        if question_types:
+            clauses.append(f"type IN ({', '.join('?' * len(question_types))})")
+            params.extend(question_types)
+        return ' AND '.join(clauses), params
+
+    def _has_near_duplicate(self, conn, sig, keys):
+        candidates = conn.execute(
+            f"SELECT data FROM questions WHERE id IN "
+            f"(SELECT question_id FROM question_bands WHERE band_key IN ({', '.join('?' * len(keys))}))",
+            keys
+        ).fetchall()
+        return any(similarity(sig, signature(question_text(json.loads(row[0])))) >= THRESHOLD
+                   for row in candidates)
+
+    def add(self, questions, topic=None, source_hash=None, chunk=None, served=True):
+        """
+        Store questions for a topic or a source document, ignoring repeats
+        and near-duplicates of ones already stored for it. Returns the
+        number added.
+        """
+        topic, source_hash = normalize_topic(topic), source_hash or ''
+        chunk = WHOLE_DOCUMENT if chunk is None else chunk
+        now = time.time()
+        added = 0
+        with self._connect() as conn:
+            for q in questions:
+                sig, keys = _scoped_band_keys(q, topic, source_hash)
+                if self._has_near_duplicate(conn, sig, keys):
+                    continue
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO questions '
+                    '(topic, source_hash, chunk, type, question_key, data, served_count, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (topic, source_hash, chunk, q['type'], normalize_question(q['question']),
+                     json.dumps(q), int(served), now)
+                )
+                if cursor.rowcount:
+                    conn.executemany('INSERT INTO question_bands (band_key, question_id) VALUES (?, ?)',
+                                     [(key, cursor.lastrowid) for key in keys])
+                    added += 1
+        return added
+
+    def sample(self, count, question_types=None, topic=None, source_hash=None, chunk=None):
+        """
+        Take up to count questions for a topic or source that have been
+        served fewer than max_serves times, least served first and random
+        among equals, and record that they were served
+        """
+        where, params = self._where(question_types, topic, source_hash, chunk)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f'SELECT id, data FROM questions WHERE {where} AND served_count < ? '
+                f'ORDER BY served_count, random() LIMIT ?',
+                params + [self.max_serves, count]
+            ).fetchall()
+            conn.executemany('UPDATE questions SET served_count = served_count + 1 WHERE id = ?',
+                             [(row[0],) for row in rows])
+        return [json.loads(row[1]) for row in rows]
+
+    def count(self, question_types=None, topic=None, source_hash=None, chunk=None):
+        where, params = self._where(question_types, topic, source_hash, chunk)
+        with self._connect() as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM questions WHERE {where}', params).fetchone()[0]
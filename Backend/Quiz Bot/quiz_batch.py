@@ -0,0 +1,211 @@
+"""
+Batch quiz generation for whole courses.
+
+    python quiz_batch.py --topics topics.txt --docs course/ --output quizzes.jsonl
+
+Each line of the --topics manifest is a topic, or a JSON object with a
+"topic" or a "file" (relative to the manifest) and optional
+"num_questions" and "question_types". Every .txt, .pdf and .docx file under
+--docs is quizzed too. One JSON record per item is appended to --output as
+soon as it finishes. Items already recorded as succeeded with the same
+number and types of questions are skipped, so an interrupted run resumes
+where it stopped when started again.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rich.console import Console
+from quiz_generator import QuizGenerator
+from quiz_bank import QuizBank, normalize_topic
+from quiz_schema import QUESTION_TYPES
+from prompts import PromptStats
+
+console = Console()
+
+
+def parse_types(value):
+    """Question types from a list or a comma-separated string."""
+    types = [t.strip() for t in value.split(',') if t.strip()] if isinstance(value, str) else list(value)
+    unknown = set(types) - set(QUESTION_TYPES) - {'random'}
+    if not types or unknown:
+        raise ValueError(f"Unknown question types: {', '.join(sorted(unknown)) or 'none'}")
+    return types
+
+
+def make_item(kind, source, num_questions, question_types):
+    """
+    A topic or file to quiz. Its id covers the options too, so the same
+    topic asked with other options is a different item.
+    """
+    key = normalize_topic(source) if kind == 'topic' else os.path.abspath(source)
+    return {
+        'id': f"{kind}:{key}:{num_questions}:{','.join(sorted(question_types))}",
+        'kind': kind,
+        'source': source,
+        'num_questions': num_questions,
+        'question_types': question_types
+    }
+
+
+def read_manifest(path, num_questions, question_types):
+    """Items of a manifest: one topic or JSON object per line."""
+    items = []
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not line.startswith('{'):
+                items.append(make_item('topic', line, num_questions, question_types))
+                continue
+            try:
+                entry = json.loads(line)
+                options = (int(entry.get('num_questions', num_questions)),
+                           parse_types(entry.get('question_types', question_types)))
+                if entry.get('topic'):
+                    items.append(make_item('topic', entry['topic'], *options))
+                elif entry.get('file'):
+                    items.append(make_item('file', os.path.join(base, entry['file']), *options))
+                else:
+                    raise ValueError('needs a "topic" or a "file"')
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: {e}")
+    return items
+
+
+def find_documents(directory, extensions, num_questions, question_types):
+    """Items for the supported files under a directory, in path order."""
+    items = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in extensions:
+                items.append(make_item('file', os.path.join(root, name), num_questions, question_types))
+    return items
+
+
+def completed_ids(output_path):
+    """Ids of the items recorded as succeeded in an output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Last line cut short by an interrupted run
+                continue
+            if record.get('status') == 'succeeded':
+                done.add(record['id'])
+    return done
+
+
+class BatchRunner:
+    """
+    Generates the quizzes of many items, `workers` at a time. Each worker
+    quizzes a document's chunks one after another, so `workers` also bounds
+    the number of concurrent requests to Ollama.
+    """
+    def __init__(self, generator, workers=4):
+        self.generator = generator
+        self.workers = workers
+
+    def run_item(self, item):
+        start = time.time()
+        record = dict(item, status='failed', questions=[], error=None)
+        stats = PromptStats()
+        try:
+            if item['kind'] == 'topic':
+                questions = self.generator.generate_quiz(item['source'], item['num_questions'],
+                                                         item['question_types'], stats=stats)
+            else:
+                content = self.generator.read_file_content(item['source'])
+                questions = self.generator.generate_quiz_from_content(content, item['num_questions'],
+                                                                      item['question_types'], max_workers=1,
+                                                                      stats=stats)
+            if questions:
+                record.update(status='succeeded', questions=questions)
+            else:
+                record['error'] = 'No valid questions were generated'
+        except Exception as e:
+            record['error'] = str(e)
+        record['seconds'] = round(time.time() - start, 2)
+        record['prompt_stats'] = stats.to_dict()
+        return record
+
+    def run(self, items, output_path):
+        """Run the items not yet completed in output_path; return the number that failed."""
+        done = completed_ids(output_path)
+        pending, seen = [], set(done)
+        for item in items:
+            if item['id'] not in seen:
+                seen.add(item['id'])
+                pending.append(item)
+        console.print(f"[bold]{len(pending)} items to generate, {len(items) - len(pending)} already done or repeated[/bold]")
+        if not pending:
+            return 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        failed = 0
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            with open(output_path, 'a+', encoding='utf-8') as out:
+                # Start on a new line if the last run was cut off mid-record
+                if out.tell() > 0:
+                    out.seek(out.tell() - 1)
+                    if out.read(1) != '\n':
+                        out.write('\n')
+                futures = [pool.submit(self.run_item, item) for item in pending]
+                for n, future in enumerate(as_completed(futures), 1):
+                    record = future.result()
+                    out.write(json.dumps(record) + '\n')
+                    out.flush()
+                    if record['status'] == 'succeeded':
+                        console.print(f"[green][{n}/{len(pending)}] {record['id']}: "
+                                      f"{len(record['questions'])} questions in {record['seconds']}s[/green]")
+                    else:
+                        failed += 1
+                        console.print(f"[red][{n}/{len(pending)}] {record['id']}: {record['error']}[/red]")
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            console.print("[yellow]Interrupted. Run the same command again to resume.[/yellow]")
+            raise
+        pool.shutdown()
+        return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', help='manifest of topics and files, one per line')
+    parser.add_argument('--docs', help='directory of .txt, .pdf and .docx files')
+    parser.add_argument('--output', required=True, help='JSONL file the quizzes are appended to')
+    parser.add_argument('--workers', type=int, default=4, help='quizzes generated at the same time')
+    parser.add_argument('--num-questions', type=int, default=5)
+    parser.add_argument('--question-types', default=','.join(QUESTION_TYPES),
+                        help='comma-separated types, or "random"')
+    args = parser.parse_args()
+    if not args.topics and not args.docs:
+        parser.error('give --topics, --docs or both')
+
+    generator = QuizGenerator(bank=QuizBank())
+    try:
+        question_types = parse_types(args.question_types)
+        items = []
+        if args.topics:
+            items += read_manifest(args.topics, args.num_questions, question_types)
+        if args.docs:
+            items += find_documents(args.docs, generator.supported_extensions, args.num_questions, question_types)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    failed = BatchRunner(generator, args.workers).run(items, args.output)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,118 @@
 import requests
 import json
 import re
+import hashlib
 import os
 import time
-from pathlib import Path
+import random
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
-import PyPDF2
-import docx
 import textwrap
-import tkinter as tk
-from tkinter import filedialog
+import math
+from concurrent.futures import ThreadPoolExecutor
+from chunking import split_into_chunks, select_chunks, sample_with_coverage, normalize_question
+from document_reader import DocumentReader
+from json_stream import JSONArrayStream
+from quiz_schema import QUESTION_SCHEMAS, format_schema, quiz_schema, schema_errors
+from quiz_bank import WHOLE_DOCUMENT, QuizBank
+from near_duplicates import NearDuplicateIndex
+from prompts import QuizPrompt, PromptStats, compile_template, count_tokens
 
 console = Console()
 
+# Output tokens to leave room for per generated question
+TOKENS_PER_QUESTION = 150
+# Questions a chunk's prompt leaves room for; fixed so a document's chunks,
+# and the quiz bank entries keyed by them, do not depend on the quiz size
+CHUNK_QUESTIONS = 3
+# Questions asked of the chunks per question wanted, to make up for invalid
+# ones and repeats
+EXTRA_QUESTIONS = 1.5
+# Errors of servers that cannot use a JSON schema as format
+SCHEMA_ERROR = re.compile(r'schema|grammar|\bformat\b', re.IGNORECASE)
+
+
+class OllamaError(Exception):
+    """An error reported by the Ollama server."""
+
+
+def error_message(response):
+    """The error Ollama sent with a failed response, or its body."""
+    try:
+        return response.json().get('error') or response.text
+    except (ValueError, AttributeError):
+        return response.text
+
+class QuestionCollector:
+    """
+    Valid, distinct questions of the selected types gathered across
+    generation attempts, up to num_questions.
+    """
+    def __init__(self, generator, num_questions, selected_types=None, on_question=None):
+        self.generator = generator
+        self.num_questions = num_questions
+        self.selected_types = selected_types
+        self.on_question = on_question
+        self.questions = []
+        self.seen = set()
+        self.near_duplicates = NearDuplicateIndex()
+
+    @property
+    def missing(self):
+        return self.num_questions - len(self.questions)
+
+    def missing_types(self):
+        """Selected types with no question yet, or all of them."""
+        if not self.selected_types:
+            return None
+        present = {q['type'] for q in self.questions}
+        return [t for t in self.selected_types if t not in present] or self.selected_types
+
+    def add(self, q, i):
+        """
+        Add a question if it is valid, of a selected type and neither a
+        repeat nor a rewording of a question already collected
+        """
+        if self.missing <= 0 or not self.generator.accept_question(q, i, self.selected_types):
+            return False
+        key = normalize_question(q['question'])
+        if key in self.seen:
+            return False
+        if not self.near_duplicates.add(q):
+            console.print(f"[yellow]Skipping question {i}: it repeats an earlier question.[/yellow]")
+            return False
+        self.seen.add(key)
+        self.questions.append(q)
+        if self.on_question:
+            self.on_question(q)
+        return True
+
 class QuizGenerator:
-    def __init__(self):
-        self.base_url = "http://localhost:11434/api/generate"
+    def __init__(self, bank=None):
+        self.base_url = os.environ.get("OLLAMA_GENERATE_URL", "http://localhost:11434/api/generate")
         self.console = Console()
         self.supported_extensions = {'.txt', '.pdf', '.docx'}
-        # Initialize tkinter root window (hidden)
-        self.root = tk.Tk()
-        self.root.withdraw()  # Hide the main window
+        self.reader = DocumentReader()
+        self.num_questions = 5
+        # Optional QuizBank to serve and store questions
+        self.bank = bank
+        # Context window requested from Ollama; prompts are sized to fit it
+        self.context_tokens = int(os.environ.get("OLLAMA_NUM_CTX", 4096))
+        # Constrain output with a JSON schema until the server rejects one
+        self.use_schema = True
+        # Tk root for the file dialog, created on first use so the
+        # generator also works without a display
+        self.root = None
 
     def select_file(self):
         """Open a file dialog to select a file."""
+        import tkinter as tk
+        from tkinter import filedialog
+        if self.root is None:
+            self.root = tk.Tk()
+            self.root.withdraw()  # Hide the main window
+        
         filetypes = [
             ("All supported files", "*.txt;*.pdf;*.docx"),
             ("Text files", "*.txt"),
@@ -61,267 +148,342 @@ class QuizGenerator:
 
     def read_file_content(self, file_path):
         """Read content from different file types."""
-        file_path = Path(file_path)
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        extension = file_path.suffix.lower()
-        if extension not in self.supported_extensions:
-            raise ValueError(f"Unsupported file type: {extension}")
-
         try:
-            if extension == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            elif extension == '.pdf':
-                text = ""
-                with open(file_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                return text
-            elif extension == '.docx':
-                doc = docx.Document(file_path)
-                return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+            return self.reader.read(file_path)
+        except (FileNotFoundError, ValueError):
+            raise
         except Exception as e:
             raise Exception(f"Error reading file: {str(e)}")
 
     def validate_question(self, q, i):
-        """Validate a single question based on its type."""
+        """Validate a single question against the schema of its type."""
+        if not isinstance(q, dict):
+            raise ValueError(f"Question {i} is not a JSON object")
+        
         if 'type' not in q:
             raise ValueError(f"Question {i} is missing type field")
         
-        if not isinstance(q['question'], str) or not q['question'].strip():
-            raise ValueError(f"Question {i} has invalid question text")
-        
-        if 'explanation' not in q or not isinstance(q['explanation'], str) or not q['explanation'].strip():
-            raise ValueError(f"Question {i} is missing or has invalid explanation")
+        if not isinstance(q['type'], str) or q['type'] not in QUESTION_SCHEMAS:
+            raise ValueError(f"Question {i} has invalid type: {q['type']}")
         
-        if q['type'] == 'mcq':
-            if not all(k in q for k in ['options', 'correct_answer']):
-                raise ValueError(f"MCQ {i} is missing required fields")
-            if not isinstance(q['options'], list) or len(q['options']) != 4:
-                raise ValueError(f"MCQ {i} must have exactly 4 options")
-            if q['correct_answer'] not in ['A', 'B', 'C', 'D']:
-                raise ValueError(f"MCQ {i} has invalid correct_answer: {q['correct_answer']}")
+        errors = schema_errors(q, QUESTION_SCHEMAS[q['type']], f"Question {i}")
+        if errors:
+            raise ValueError("; ".join(errors))
+
+    def post_generate(self, prompt, schema=None, stream=False):
+        """
+        Send a generation request. With a schema, Ollama's structured
+        output constrains the model to JSON matching it; servers that do not
+        support schemas get the plain prompt and the output is only
+        validated locally.
+        """
+        payload = {
+            "model": "mistral",
+            "prompt": prompt,
+            "stream": stream,
+            "options": {"num_ctx": self.context_tokens}
+        }
+        if schema is not None and self.use_schema:
+            response = requests.post(self.base_url, json=dict(payload, format=format_schema(schema)), stream=stream)
+            if response.status_code < 400 or not self.reject_schema(response.status_code, error_message(response)):
+                return response
+            response.close()
+        return requests.post(self.base_url, json=payload, stream=stream)
+
+    def reject_schema(self, status_code, error):
+        """
+        Whether a request failed because the server cannot use its schema:
+        Ollama before 0.5 answers 400 to any schema, newer servers name the
+        schema or format in the error. If so, no more schemas are sent.
+        """
+        if status_code != 400 and not SCHEMA_ERROR.search(error or ''):
+            return False
+        self.use_schema = False
+        console.print(f"[yellow]Ollama rejected the JSON schema ({error}). Validating questions locally instead.[/yellow]")
+        return True
+
+    def raise_for_status(self, response):
+        """Raise an error with Ollama's own message if the request failed."""
+        if response.status_code >= 400:
+            raise OllamaError(f"Ollama error ({response.status_code}): {error_message(response)}")
+
+    def request_questions(self, prompt, schema=None, stats=None):
+        """Request a whole completion and parse its JSON array."""
+        response = self.post_generate(prompt, schema)
+        self.raise_for_status(response)
+        result = response.json()
+        if result.get('error'):
+            raise OllamaError(f"Ollama error: {result['error']}")
+        if stats:
+            stats.add_response(result)
         
-        elif q['type'] == 'fill_blank':
-            if 'correct_answer' not in q:
-                raise ValueError(f"Fill in the blank {i} is missing correct_answer")
-            if '_____' not in q['question']:
-                raise ValueError(f"Fill in the blank {i} must contain _____ to indicate the blank")
+        # Clean and parse the response
+        json_str = self.clean_json_response(result['response'])
+        return json.loads(json_str)
+
+    def stream_questions(self, prompt, schema=None, stats=None):
+        """
+        Yield question objects from Ollama's token stream as soon as each one
+        is complete. Closing the generator closes the connection, which makes
+        Ollama stop generating. Otherwise the stream is read to its final
+        message, whose token counts are added to stats. An error sent in the
+        stream is raised with Ollama's message; if it rejects the schema
+        before any question arrived, the request is sent again without it.
+        """
+        parser = JSONArrayStream()
+        with_schema = schema is not None and self.use_schema
+        rejected = False
+        with self.post_generate(prompt, schema, stream=True) as response:
+            self.raise_for_status(response)
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    if with_schema and not parser.parsed and self.reject_schema(response.status_code, chunk['error']):
+                        rejected = True
+                        break
+                    raise OllamaError(f"Ollama error: {chunk['error']}")
+                yield from parser.feed(chunk.get('response', ''))
+                if chunk.get('done'):
+                    if stats:
+                        stats.add_response(chunk)
+                    break
+        if rejected:
+            yield from self.stream_questions(prompt, schema, stats)
+            return
+        if not parser.started:
+            raise ValueError("Could not find JSON array in response")
+
+    def accept_question(self, q, i, selected_types=None):
+        """Validate a question and check that it is of a selected type."""
+        try:
+            self.validate_question(q, i)
+        except ValueError as e:
+            console.print(f"[yellow]Warning: {str(e)}. Skipping question {i}.[/yellow]")
+            return False
+        return not selected_types or q['type'] in selected_types
+
+    def collect_questions(self, questions, collector):
+        """
+        Add questions to collector until it is full. A streamed generation
+        is closed as soon as that happens, which stops the model early.
+        """
+        try:
+            for i, q in enumerate(questions, 1):
+                collector.add(q, i)
+                if collector.missing <= 0:
+                    break
+        finally:
+            if hasattr(questions, 'close'):
+                questions.close()
+
+    def build_top_up_prompt(self, prompt, collector):
+        """
+        Ask only for the questions still missing, listing as many of the
+        ones to avoid as the context window leaves room for
+        """
+        return prompt.render(
+            num_questions=collector.missing,
+            question_types=collector.missing_types(),
+            avoid=[q['question'] for q in collector.questions],
+            max_tokens=self.context_tokens - collector.missing * TOKENS_PER_QUESTION
+        )
+
+    def chunk_tokens(self, num_questions=CHUNK_QUESTIONS):
+        """
+        Tokens of content that fit in one prompt, next to the longest
+        template and the answers to num_questions questions
+        """
+        template = compile_template("content", tuple(QUESTION_SCHEMAS)).render(content="", num_questions=100)
+        return self.context_tokens - count_tokens(template) - num_questions * TOKENS_PER_QUESTION
+
+    def report_stats(self, stats):
+        if stats.prompts:
+            console.print(f"[dim]{stats.summary()}[/dim]")
+
+    def backoff(self, attempt, base=1.0, cap=30.0):
+        """Sleep before reconnecting: exponential backoff with jitter."""
+        delay = min(cap, base * 2 ** (attempt - 1))
+        time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+    def generate_questions_with_retry(self, prompt, max_retries=3, num_questions=None, stream=True, on_question=None,
+                                      existing=None):
+        """
+        Generate the questions of a QuizPrompt with retry logic for failed
+        attempts. With stream, questions are parsed and validated one by one
+        as the model writes them, passed to on_question right away, and
+        generation stops as soon as num_questions valid ones are in hand.
         
-        elif q['type'] == 'true_false':
-            if 'correct_answer' not in q:
-                raise ValueError(f"True/False {i} is missing correct_answer")
-            if q['correct_answer'] not in ['True', 'False']:
-                raise ValueError(f"True/False {i} has invalid correct_answer: {q['correct_answer']}")
+        Valid questions are kept across attempts: a retry only asks for the
+        missing number of questions, preferring types not yet in the quiz,
+        and repeats of earlier questions are dropped. Only connection errors
+        wait before retrying, with exponential backoff. Questions in existing
+        (e.g. from the quiz bank) count towards num_questions.
+        """
+        num_questions = num_questions or self.num_questions
+        selected_types = prompt.question_types
+        collector = QuestionCollector(self, num_questions, selected_types, on_question)
+        for i, q in enumerate(existing or [], 1):
+            collector.add(q, i)
         
-        else:
-            raise ValueError(f"Question {i} has invalid type: {q['type']}")
-
-    def generate_questions_with_retry(self, prompt, max_retries=3):
-        """Generate questions with retry logic for failed attempts."""
         for attempt in range(1, max_retries + 1):
+            if collector.questions:
+                attempt_prompt = self.build_top_up_prompt(prompt, collector)
+                schema = quiz_schema(collector.missing_types(), collector.missing)
+            else:
+                attempt_prompt = prompt.render(num_questions=num_questions)
+                schema = quiz_schema(selected_types, num_questions)
             try:
-                response = requests.post(
-                    self.base_url,
-                    json={
-                        "model": "mistral",
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                # Clean and parse the response
-                json_str = self.clean_json_response(result['response'])
-                questions = json.loads(json_str)
-                
-                # Validate each question
-                valid_questions = []
-                for i, q in enumerate(questions, 1):
-                    try:
-                        self.validate_question(q, i)
-                        valid_questions.append(q)
-                    except ValueError as e:
-                        console.print(f"[yellow]Warning: {str(e)}. Skipping question {i}.[/yellow]")
-                
-                # Filter out invalid questions
-                valid_questions = [q for q in valid_questions if all(
-                    k in q for k in ['type', 'question', 'explanation']
-                )]
-                
-                # Extract question types from the prompt
-                import re
-                types_match = re.search(r'Include ONLY the following question types: (.*?)(?:\n|$)', prompt)
-                if types_match:
-                    selected_types = [t.strip() for t in types_match.group(1).split(',')]
-                    # Strictly filter questions to only include the selected types
-                    valid_questions = [q for q in valid_questions if q['type'] in selected_types]
-                    
-                    # If we don't have enough questions of the right type, retry
-                    if len(valid_questions) < self.num_questions and attempt < max_retries:
-                        console.print(f"[yellow]Not enough questions of the selected type(s). Retrying (attempt {attempt+1}/{max_retries})...[/yellow]")
-                        time.sleep(1)
-                        continue
+                if stream:
+                    self.collect_questions(self.stream_questions(attempt_prompt, schema, prompt.stats), collector)
+                else:
+                    self.collect_questions(self.request_questions(attempt_prompt, schema, prompt.stats), collector)
                 
-                if not valid_questions:
-                    if attempt < max_retries:
-                        console.print(f"[yellow]No valid questions generated. Retrying (attempt {attempt+1}/{max_retries})...[/yellow]")
-                        time.sleep(1)  # Wait a bit before retrying
-                        continue
-                    else:
-                        raise ValueError("No valid questions were generated after multiple attempts")
+                # If we don't have enough questions of the right type, ask for the rest
+                if collector.missing > 0 and attempt < max_retries:
+                    console.print(f"[yellow]{len(collector.questions)}/{num_questions} valid questions of the selected type(s). "
+                                  f"Asking for {collector.missing} more (attempt {attempt+1}/{max_retries})...[/yellow]")
+                    continue
                 
-                return valid_questions
+                if not collector.questions:
+                    raise ValueError("No valid questions were generated after multiple attempts")
+                return collector.questions
                 
-            except requests.exceptions.ConnectionError:
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
                 if attempt < max_retries:
                     console.print(f"[yellow]Connection error. Retrying (attempt {attempt+1}/{max_retries})...[/yellow]")
-                    time.sleep(1)
+                    self.backoff(attempt)
                     continue
                 else:
                     console.print("[red]Error: Could not connect to Ollama. Make sure Ollama is running.[/red]")
-                    return None
             except requests.exceptions.RequestException as e:
                 if attempt < max_retries:
                     console.print(f"[yellow]Request error: {str(e)}. Retrying (attempt {attempt+1}/{max_retries})...[/yellow]")
-                    time.sleep(1)
                     continue
                 else:
                     console.print(f"[red]Error communicating with Ollama: {str(e)}[/red]")
-                    return None
             except Exception as e:
                 if attempt < max_retries:
                     console.print(f"[yellow]Error: {str(e)}. Retrying (attempt {attempt+1}/{max_retries})...[/yellow]")
-                    time.sleep(1)
                     continue
                 else:
                     console.print(f"[red]Error generating quiz: {str(e)}[/red]")
-                    return None
+        # Out of attempts: return whatever valid questions were gathered
+        return collector.questions or None
 
-    def generate_quiz_from_content(self, content, num_questions=5, question_types=None):
-        """Generate quiz from provided content."""
+    def generate_quiz_from_content(self, content, num_questions=5, question_types=None, chunk_size=None, max_workers=4,
+                                   on_question=None, stats=None):
+        """
+        Generate quiz from provided content. Content longer than chunk_size
+        tokens (by default, what fits in the context window), or too long to
+        leave room for num_questions answers, is split into
+        chunks that are quizzed in parallel, max_workers at a time, and the
+        questions are merged with coverage of the whole text. on_question is
+        called with each question as soon as it is final. Prompt build time
+        and tokens are added to stats, a PromptStats, and reported.
+        """
         if question_types is None:
             question_types = ["mcq", "fill_blank", "true_false"]
         
         # Handle random option
         if "random" in question_types:
-            import random
             all_types = ["mcq", "fill_blank", "true_false"]
             question_types = [random.choice(all_types)]
             console.print(f"[yellow]Randomly selected question type: {question_types[0]}[/yellow]")
         
-        # Store num_questions for use in generate_questions_with_retry
-        self.num_questions = num_questions
-        
-        prompt = f"""Create a quiz based on the following content with {num_questions} questions.
-        Content: {content[:2000]}  # Limiting content length to avoid token limits
-        
-        Return a JSON array with questions of different types. Each question should have a "type" field indicating its type.
-        For each type, use this structure:
-        
-        For Multiple Choice Questions (type: "mcq"):
-        {{
-            "type": "mcq",
-            "question": "What is 2 + 2?",
-            "options": ["3", "4", "5", "6"],
-            "correct_answer": "B",
-            "explanation": "2 + 2 equals 4, which is option B"
-        }}
+        stats = stats or PromptStats()
+        chunk_size = chunk_size or self.chunk_tokens()
+        source_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        # A single prompt must also leave room for all num_questions answers
+        if count_tokens(content) <= min(chunk_size, self.chunk_tokens(num_questions)):
+            prompt = QuizPrompt("content", stats, content=content, num_questions=num_questions,
+                                question_types=question_types)
+            questions = self.generate_with_bank(prompt, on_question, source_hash=source_hash,
+                                               chunk=WHOLE_DOCUMENT)
+        else:
+            chunks = split_into_chunks(content, chunk_size, count_tokens)
+            # Text that only just misses a single prompt is cut finer, so no
+            # chunk is asked for more questions than its prompt has room for
+            min_chunks = math.ceil(num_questions * EXTRA_QUESTIONS / CHUNK_QUESTIONS)
+            if len(chunks) < min_chunks:
+                chunks = split_into_chunks(content, max(1, count_tokens(content) // min_chunks), count_tokens)
+            questions = self.generate_from_chunks(chunks, num_questions, question_types, max_workers, on_question,
+                                                  source_hash, stats)
+        self.report_stats(stats)
+        return questions
+
+    def generate_with_bank(self, prompt, on_question=None, **source):
+        """
+        Serve the questions of a QuizPrompt for a source (topic=..., or
+        source_hash=... and chunk=...) from the quiz bank, and generate only
+        what it is missing. Questions served max_serves times are no longer
+        reused, so repeated requests keep getting new questions. New
+        questions are added to the bank.
+        """
+        num_questions = prompt.params['num_questions']
+        banked = self.bank.sample(num_questions, prompt.question_types, **source) if self.bank else []
+        if len(banked) >= num_questions:
+            for q in banked:
+                if on_question:
+                    on_question(q)
+            return banked
         
-        For Fill in the Blanks (type: "fill_blank"):
-        {{
-            "type": "fill_blank",
-            "question": "The capital of France is _____.",
-            "correct_answer": "Paris",
-            "explanation": "Paris is the capital city of France."
-        }}
+        questions = self.generate_questions_with_retry(prompt, num_questions=num_questions, on_question=on_question,
+                                                       existing=banked)
+        if self.bank and questions:
+            banked_ids = {id(q) for q in banked}
+            self.bank.add([q for q in questions if id(q) not in banked_ids], **source)
+        return questions
+
+    def generate_from_chunks(self, chunks, num_questions, question_types, max_workers=4, on_question=None,
+                             source_hash=None, stats=None):
+        """Map-reduce generation: a few questions per chunk, then merge."""
+        # One chunk per question, or per worker, spread over the document
+        selected = select_chunks(chunks, max(num_questions, max_workers))
+        # Ask for extra questions to make up for invalid ones and repeats
+        per_chunk = max(1, math.ceil(num_questions * EXTRA_QUESTIONS / len(selected)))
+        console.print(f"[bold]Generating from {len(selected)} of {len(chunks)} chunks of the document...[/bold]")
         
-        For True/False Questions (type: "true_false"):
-        {{
-            "type": "true_false",
-            "question": "The Earth is flat.",
-            "correct_answer": "False",
-            "explanation": "The Earth is an oblate spheroid, not flat."
-        }}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(
+                    self.generate_with_bank,
+                    QuizPrompt("content", stats, content=chunk['text'], num_questions=per_chunk,
+                               question_types=question_types),
+                    source_hash=source_hash,
+                    chunk=chunk['index']
+                )
+                for chunk in selected
+            ]
+            groups = [future.result() or [] for future in futures]
         
-        Rules:
-        1. Include ONLY the following question types: {', '.join(question_types)}
-        2. For MCQs, each question must have exactly 4 options
-        3. For MCQs, the correct_answer must be exactly "A", "B", "C", or "D" (uppercase)
-        4. For fill in the blanks, use _____ to indicate the blank
-        5. For true/false, correct_answer must be exactly "True" or "False"
-        6. Return only the JSON array, no other text
-        7. Make questions challenging but fair
-        8. Ensure explanations are clear and concise
-        9. Do not include any markdown formatting or code blocks
-        10. Questions should be based on the provided content
-        11. IMPORTANT: Every question MUST have a "type", "question", and "explanation" field
-        12. For True/False questions, the correct_answer MUST be exactly "True" or "False" (case-sensitive)"""
-
-        return self.generate_questions_with_retry(prompt)
-
-    def generate_quiz(self, topic, num_questions=5, question_types=None):
-        """Generate quiz from a topic."""
+        questions = sample_with_coverage(groups, num_questions)
+        if on_question:
+            for q in questions:
+                on_question(q)
+        return questions or None
+
+    def generate_quiz(self, topic, num_questions=5, question_types=None, on_question=None, stats=None):
+        """
+        Generate quiz from a topic. on_question is called with each question
+        as soon as it has been generated and validated. Prompt build time
+        and tokens are added to stats, a PromptStats, and reported.
+        """
         if question_types is None:
             question_types = ["mcq", "fill_blank", "true_false"]
         
         # Handle random option
         if "random" in question_types:
-            import random
             all_types = ["mcq", "fill_blank", "true_false"]
             question_types = [random.choice(all_types)]
             console.print(f"[yellow]Randomly selected question type: {question_types[0]}[/yellow]")
         
-        # Store num_questions for use in generate_questions_with_retry
-        self.num_questions = num_questions
-        
-        prompt = f"""Create a quiz about {topic} with {num_questions} questions.
-        Return a JSON array with questions of different types. Each question should have a "type" field indicating its type.
-        For each type, use this structure:
-        
-        For Multiple Choice Questions (type: "mcq"):
-        {{
-            "type": "mcq",
-            "question": "What is 2 + 2?",
-            "options": ["3", "4", "5", "6"],
-            "correct_answer": "B",
-            "explanation": "2 + 2 equals 4, which is option B"
-        }}
-        
-        For Fill in the Blanks (type: "fill_blank"):
-        {{
-            "type": "fill_blank",
-            "question": "The capital of France is _____.",
-            "correct_answer": "Paris",
-            "explanation": "Paris is the capital city of France."
-        }}
-        
-        For True/False Questions (type: "true_false"):
-        {{
-            "type": "true_false",
-            "question": "The Earth is flat.",
-            "correct_answer": "False",
-            "explanation": "The Earth is an oblate spheroid, not flat."
-        }}
-        
-        Rules:
-        1. Include ONLY the following question types: {', '.join(question_types)}
-        2. For MCQs, each question must have exactly 4 options
-        3. For MCQs, the correct_answer must be exactly "A", "B", "C", or "D" (uppercase)
-        4. For fill in the blanks, use _____ to indicate the blank
-        5. For true/false, correct_answer must be exactly "True" or "False"
-        6. Return only the JSON array, no other text
-        7. Make questions challenging but fair
-        8. Ensure explanations are clear and concise
-        9. Do not include any markdown formatting or code blocks
-        10. IMPORTANT: Every question MUST have a "type", "question", and "explanation" field
-        11. For True/False questions, the correct_answer MUST be exactly "True" or "False" (case-sensitive)"""
-
-        return self.generate_questions_with_retry(prompt)
+        stats = stats or PromptStats()
+        prompt = QuizPrompt("topic", stats, topic=topic, num_questions=num_questions, question_types=question_types)
+        questions = self.generate_with_bank(prompt, on_question, topic=topic)
+        self.report_stats(stats)
+        return questions
 
     def display_quiz(self, questions):
         if not questions:
@@ -377,7 +539,7 @@ class QuizGenerator:
 def main():
     console.print(Panel("[bold blue]Welcome to the AI Quiz Generator![/bold blue]"))
     
-    generator = QuizGenerator()
+    generator = QuizGenerator(bank=QuizBank())
     
     while True:
         console.print("\n[bold]Choose quiz generation method:[/bold]")
@@ -0,0 +1,126 @@
+import re
+
+QUESTION_TYPES = ["mcq", "fill_blank", "true_false"]
+
+# Non-blank text
+TEXT = {"type": "string", "pattern": r"\S"}
+
+QUESTION_SCHEMAS = {
+    "mcq": {
+        "type": "object",
+        "properties": {
+            "type": {"const": "mcq"},
+            "question": TEXT,
+            "options": {"type": "array", "items": TEXT, "minItems": 4, "maxItems": 4},
+            "correct_answer": {"enum": ["A", "B", "C", "D"]},
+            "explanation": TEXT
+        },
+        "required": ["type", "question", "options", "correct_answer", "explanation"]
+    },
+    "fill_blank": {
+        "type": "object",
+        "properties": {
+            "type": {"const": "fill_blank"},
+            "question": {"type": "string", "pattern": "_____"},
+            "correct_answer": TEXT,
+            "explanation": TEXT
+        },
+        "required": ["type", "question", "correct_answer", "explanation"]
+    },
+    "true_false": {
+        "type": "object",
+        "properties": {
+            "type": {"const": "true_false"},
+            "question": TEXT,
+            "correct_answer": {"enum": ["True", "False"]},
+            "explanation": TEXT
+        },
+        "required": ["type", "question", "correct_answer", "explanation"]
+    }
+}
+
+# Readable errors for the patterns used above
+PATTERN_MESSAGES = {
+    r"\S": "must not be blank",
+    "_____": "must contain _____ to indicate the blank"
+}
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool
+}
+
+
+def quiz_schema(question_types=None, max_questions=None):
+    """
+    JSON schema of a quiz: an array of questions of the given types. Passed
+    to Ollama as `format` (see format_schema), it constrains generation to
+    valid questions.
+    """
+    items = [QUESTION_SCHEMAS[t] for t in question_types or QUESTION_TYPES]
+    schema = {
+        "type": "array",
+        "items": items[0] if len(items) == 1 else {"anyOf": items},
+        "minItems": 1
+    }
+    if max_questions:
+        schema["maxItems"] = max_questions
+    return schema
+
+
+def format_schema(schema):
+    """
+    A schema as sent to Ollama, without its `pattern`s. Ollama only turns
+    patterns anchored with ^...$ into a grammar and rejects the rest, so
+    patterns are checked locally by schema_errors instead.
+    """
+    if isinstance(schema, dict):
+        return {key: format_schema(value) for key, value in schema.items() if key != "pattern"}
+    if isinstance(schema, list):
+        return [format_schema(value) for value in schema]
+    return schema
+
+
+def schema_errors(instance, schema, path="value"):
+    """
+    Check an instance against the subset of JSON schema used here and
+    return a list of error messages, empty when it is valid
+    """
+    if "anyOf" in schema:
+        if any(not schema_errors(instance, option, path) for option in schema["anyOf"]):
+            return []
+        return [f"{path} does not match any allowed form"]
+
+    errors = []
+    expected = schema.get("type")
+    if expected and (not isinstance(instance, JSON_TYPES[expected]) or
+                     (isinstance(instance, bool) and expected in ("integer", "number"))):
+        return [f"{path} must be of type {expected}"]
+    if "const" in schema and instance != schema["const"]:
+        errors.append(f"{path} must be {schema['const']!r}, got {instance!r}")
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path} must be one of {', '.join(map(str, schema['enum']))}, got {instance!r}")
+    if "pattern" in schema and isinstance(instance, str) and not re.search(schema["pattern"], instance):
+        errors.append(f"{path} {PATTERN_MESSAGES.get(schema['pattern'], 'must match ' + repr(schema['pattern']))}")
+
+    if isinstance(instance, dict):
+        for name in schema.get("required", []):
+            if name not in instance:
+                errors.append(f"{path} is missing {name}")
+        for name, subschema in schema.get("properties", {}).items():
+            if name in instance:
+                errors.extend(schema_errors(instance[name], subschema, f"{path} {name}"))
+
+    if isinstance(instance, list):
+        if len(instance) < schema.get("minItems", 0):
+            errors.append(f"{path} must have at least {schema['minItems']} items")
+        if "maxItems" in schema and len(instance) > schema["maxItems"]:
+            errors.append(f"{path} must have at most {schema['maxItems']} items")
+        if "items" in schema:
+            for i, item in enumerate(instance):
+                errors.extend(schema_errors(item, schema["items"], f"{path}[{i}]"))
+    return errors
@@ -0,0 +1,234 @@
+"""
+HTTP quiz service around QuizGenerator.
+
+    python quiz_service.py
+
+POST /quizzes takes a JSON body with a "topic" or "text", or a multipart
+form with a "file" upload, plus optional "num_questions" and
+"question_types". It returns a job id immediately. Poll the job with
+GET /quizzes/<job_id>, or stream its events as JSON lines from
+GET /quizzes/<job_id>/stream.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from flask import Flask, Response, jsonify, request
+from quiz_generator import QuizGenerator
+from quiz_bank import QuizBank
+from prompts import PromptStats
+
+QUESTION_TYPES = {"mcq", "fill_blank", "true_false", "random"}
+
+app = Flask(__name__)
+
+
+class QuizJob:
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.questions = []
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.stats = PromptStats()
+        # Notified whenever status or questions change
+        self.changed = threading.Condition()
+
+    def add_question(self, question):
+        with self.changed:
+            self.questions.append(question)
+            self.changed.notify_all()
+
+    def update(self, **fields):
+        with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.changed.notify_all()
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'num_questions': self.params.get('num_questions'),
+            'questions': list(self.questions),
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'prompt_stats': self.stats.to_dict()
+        }
+
+
+class QuizJobManager:
+    """
+    Runs quiz generation jobs on a bounded thread pool. Jobs are kept in
+    memory, so the service must run as a single process; finished jobs are
+    dropped after `keep_seconds`.
+    """
+    def __init__(self, generator, max_workers=4, keep_seconds=3600):
+        self.generator = generator
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.keep_seconds = keep_seconds
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, **params):
+        job = QuizJob(kind, params)
+        with self.lock:
+            self._prune()
+            self.jobs[job.id] = job
+        self.pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def _run(self, job):
+        job.update(status='running')
+        # Questions are published as soon as they are generated
+        params = dict(job.params, on_question=job.add_question, stats=job.stats)
+        try:
+            if job.kind == 'topic':
+                questions = self.generator.generate_quiz(params.pop('topic'), **params)
+            elif job.kind == 'file':
+                content = self.generator.read_file_content(params.pop('path'))
+                questions = self.generator.generate_quiz_from_content(content, **params)
+            else:
+                questions = self.generator.generate_quiz_from_content(params.pop('text'), **params)
+        except Exception as e:
+            job.update(status='failed', error=str(e), finished_at=time.time())
+            return
+
+        if questions:
+            job.update(status='succeeded', questions=questions, finished_at=time.time())
+        else:
+            job.update(status='failed', error='No valid questions were generated', finished_at=time.time())
+
+    def events(self, job, heartbeat=15):
+        """
+        Yield a job's events: status changes, each question once, and a
+        final "done" event. A heartbeat is sent while nothing changes.
+        """
+        sent_questions = 0
+        last_status = None
+        while True:
+            with job.changed:
+                if (job.status, len(job.questions)) == (last_status, sent_questions):
+                    job.changed.wait(heartbeat)
+                status, questions = job.status, list(job.questions)
+
+            if (status, len(questions)) == (last_status, sent_questions):
+                yield {'event': 'heartbeat'}
+                continue
+            for question in questions[sent_questions:]:
+                yield {'event': 'question', 'question': question}
+            sent_questions = len(questions)
+            if status != last_status:
+                last_status = status
+                yield {'event': 'status', 'status': status}
+            if status in ('succeeded', 'failed'):
+                yield {'event': 'done', 'status': status, 'error': job.error}
+                return
+
+
+generator = QuizGenerator(bank=QuizBank())
+jobs = QuizJobManager(generator, max_workers=int(os.environ.get('QUIZ_SERVICE_WORKERS', 4)))
+UPLOAD_DIR = os.path.join(generator.reader.cache_dir, 'uploads')
+
+
+def _save_upload(upload):
+    """
+    Save an uploaded file under its content hash, keeping its extension.
+    Uploading the same document again reuses the file and its extracted text.
+    """
+    extension = Path(upload.filename or '').suffix.lower()
+    if extension not in generator.supported_extensions:
+        raise ValueError(f"Unsupported file type: {extension or 'none'}")
+    data = upload.read()
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, f"{hashlib.sha256(data).hexdigest()}{extension}")
+    if not os.path.exists(path):
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path
+
+
+def _quiz_options(data):
+    """Parse num_questions and question_types from a JSON body or form."""
+    num_questions = int(data.get('num_questions', 5))
+    if not 1 <= num_questions <= 100:
+        raise ValueError("num_questions must be between 1 and 100")
+    question_types = data.get('question_types') or ["mcq", "fill_blank", "true_false"]
+    if isinstance(question_types, str):
+        question_types = [t.strip() for t in question_types.split(',') if t.strip()]
+    unknown = set(question_types) - QUESTION_TYPES
+    if unknown:
+        raise ValueError(f"Unknown question types: {', '.join(sorted(unknown))}")
+    return {'num_questions': num_questions, 'question_types': question_types}
+
+
+@app.route('/quizzes', methods=['POST'])
+def create_quiz():
+    try:
+        if 'file' in request.files:
+            options = _quiz_options(request.form)
+            job = jobs.submit('file', path=_save_upload(request.files['file']), **options)
+        else:
+            data = request.get_json(silent=True) or {}
+            options = _quiz_options(data)
+            if data.get('topic'):
+                job = jobs.submit('topic', topic=data['topic'], **options)
+            elif data.get('text'):
+                job = jobs.submit('text', text=data['text'], **options)
+            else:
+                return jsonify({'error': 'Provide a topic, text or file'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(job.to_dict()), 202
+
+
+@app.route('/quizzes/<job_id>', methods=['GET'])
+def quiz_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown quiz job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/quizzes/<job_id>/stream', methods=['GET'])
+def quiz_stream(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown quiz job'}), 404
+    lines = (json.dumps(event) + '\n' for event in jobs.events(job))
+    return Response(lines, mimetype='application/x-ndjson')
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok'})
+
+
+if __name__ == '__main__':
+    app.run(host=os.environ.get('QUIZ_SERVICE_HOST', '127.0.0.1'),
+            port=int(os.environ.get('QUIZ_SERVICE_PORT', 5001)),
+            threaded=True)
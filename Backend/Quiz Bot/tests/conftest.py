@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The quiz bot modules import each other from the Quiz Bot directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,90 @@
+import random
+import string
+import pytest
+from chunking import is_heading, sample_with_coverage, select_chunks, split_into_chunks
+
+
+def words(count, seed):
+    rng = random.Random(str(seed))
+    return ' '.join(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(count))
+
+
+def document(sections=4, paragraphs=5, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    for s in range(sections):
+        parts.append(f"Chapter {s + 1}")
+        for p in range(paragraphs):
+            sentences = [words(rng.randint(3, 30), (seed, s, p, i)).capitalize() + '.' for i in range(rng.randint(1, 8))]
+            parts.append(' '.join(sentences))
+    return '\n\n'.join(parts)
+
+
+def question(seed):
+    return {'type': 'true_false', 'question': words(8, seed).capitalize() + '.', 'correct_answer': 'True'}
+
+
+def test_is_heading():
+    assert is_heading('# Photosynthesis')
+    assert is_heading('Chapter 3: Light')
+    assert is_heading('2.1 Cell Structure')
+    assert is_heading('INTRODUCTION')
+    assert not is_heading('Plants convert light into chemical energy.')
+    assert not is_heading('')
+
+
+@pytest.mark.parametrize('max_size', [40, 200, 1000])
+@pytest.mark.parametrize('seed', range(3))
+def test_chunks_fit_max_size(max_size, seed):
+    text = document(seed=seed)
+    chunks = split_into_chunks(text, max_size=max_size)
+    assert [chunk['index'] for chunk in chunks] == list(range(len(chunks)))
+    assert all(0 < len(chunk['text']) <= max_size for chunk in chunks)
+    # No text is lost or reordered
+    assert ' '.join(' '.join(c['text'] for c in chunks).split()) == \
+        ' '.join(' '.join(line for line in text.splitlines() if not line.startswith('Chapter')).split())
+
+
+def test_chunks_fit_max_size_in_tokens():
+    def count_words(text):
+        return len(text.split())
+
+    chunks = split_into_chunks(document(seed=5), max_size=25, length=count_words)
+    assert all(count_words(chunk['text']) <= 25 for chunk in chunks)
+
+
+def test_chunks_stay_in_one_section():
+    chunks = split_into_chunks("# Cells\n\nCells are small.\n\n# Light\n\nLight is fast.\n\nIt bends.", max_size=2000)
+    assert [(c['section'], c['text']) for c in chunks] == [
+        ('Cells', 'Cells are small.'), ('Light', 'Light is fast.\n\nIt bends.')
+    ]
+
+
+def test_select_chunks_spreads_over_document():
+    chunks = list(range(10))
+    assert select_chunks(chunks, 5) == [1, 3, 5, 7, 9]
+    assert select_chunks(chunks, 20) == chunks
+
+
+@pytest.mark.parametrize('num_questions', [3, 6, 10])
+def test_sample_with_coverage_covers_every_chunk(num_questions):
+    groups = [[question((chunk, i)) for i in range(chunk + 1)] for chunk in range(6)]
+    selected = sample_with_coverage(groups, num_questions)
+    assert len(selected) == num_questions
+
+    chunk_of = {q['question']: chunk for chunk, group in enumerate(groups) for q in group}
+    chunks = [chunk_of[q['question']] for q in selected]
+    assert chunks == sorted(chunks)
+    counts = [chunks.count(chunk) for chunk in range(6)]
+    # Every chunk contributes before any chunk contributes twice, and so on
+    assert min(counts) >= 1 if num_questions >= 6 else max(counts) == 1
+    for count, group in zip(counts, groups):
+        assert count >= min(len(group), max(counts) - 1)
+
+
+def test_sample_with_coverage_drops_repeats():
+    repeated = question('repeat')
+    groups = [[repeated, question(1)], [dict(repeated), question(2)], [question(3)]]
+    selected = sample_with_coverage(groups, 10)
+    assert len(selected) == 4
+    assert sum(q == repeated for q in selected) == 1
@@ -0,0 +1,132 @@
+import os
+import zipfile
+import pytest
+import document_reader
+from document_reader import DocumentReader
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Count content hashes and text extractions."""
+    calls = {'hash': 0, 'extract': 0}
+    file_hash = document_reader.file_hash
+    extract = DocumentReader.extractors['.txt']
+
+    def counting_hash(file_path):
+        calls['hash'] += 1
+        return file_hash(file_path)
+
+    def counting_extract(file_path):
+        calls['extract'] += 1
+        return extract(file_path)
+
+    monkeypatch.setattr(document_reader, 'file_hash', counting_hash)
+    monkeypatch.setitem(DocumentReader.extractors, '.txt', counting_extract)
+    return calls
+
+
+def write(path, text, mtime_ns=None):
+    path.write_text(text, encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+DOCUMENT_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+            xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"
+            xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"
+            xmlns:v="urn:schemas-microsoft-com:vml">
+<w:body>
+  <w:p>
+    <w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>
+    <w:r><w:t>Name</w:t><w:tab/><w:t>Score</w:t></w:r>
+  </w:p>
+  <w:p><w:r><w:t>First line</w:t><w:br/><w:t>second line</w:t><w:cr/><w:t>third</w:t></w:r></w:p>
+  <w:p>
+    <w:r><w:t xml:space="preserve">Before the box </w:t></w:r>
+    <w:r><mc:AlternateContent>
+      <mc:Choice Requires="wps"><w:drawing><wps:txbx><w:txbxContent>
+        <w:p><w:r><w:t>Boxed text</w:t></w:r></w:p>
+      </w:txbxContent></wps:txbx></w:drawing></mc:Choice>
+      <mc:Fallback><w:pict><v:textbox><w:txbxContent>
+        <w:p><w:r><w:t>Boxed text</w:t></w:r></w:p>
+      </w:txbxContent></v:textbox></w:pict></mc:Fallback>
+    </mc:AlternateContent></w:r>
+    <w:r><w:t>and after it.</w:t></w:r>
+  </w:p>
+  <w:tbl><w:tr>
+    <w:tc><w:p><w:r><w:t>Cell one</w:t></w:r></w:p></w:tc>
+    <w:tc><w:p><w:r><w:t>Cell two</w:t></w:r></w:p></w:tc>
+  </w:tr></w:tbl>
+</w:body>
+</w:document>
+"""
+
+
+def test_docx_keeps_tabs_breaks_and_nested_paragraphs(tmp_path):
+    source = tmp_path / 'lesson.docx'
+    with zipfile.ZipFile(source, 'w') as archive:
+        archive.writestr('word/document.xml', DOCUMENT_XML)
+    assert list(document_reader.iter_docx_paragraphs(source)) == [
+        'Name\tScore',
+        'First line\nsecond line\nthird',
+        'Boxed text',
+        'Before the box and after it.',
+        'Cell one',
+        'Cell two'
+    ]
+
+
+def test_read_splits_paragraphs(tmp_path):
+    source = tmp_path / 'notes.txt'
+    write(source, 'First line\nsecond line\n\n\nSecond paragraph\n')
+    reader = DocumentReader(cache_dir=str(tmp_path / 'cache'))
+    assert list(reader.iter_segments(source)) == ['First line\nsecond line', 'Second paragraph']
+    assert reader.read(source) == 'First line\nsecond line\n\nSecond paragraph'
+
+
+def test_cached_text_and_hash_are_reused(tmp_path, calls):
+    source = tmp_path / 'notes.txt'
+    write(source, 'Photosynthesis makes sugar.\n\nPlants need light.\n')
+    reader = DocumentReader(cache_dir=str(tmp_path / 'cache'))
+
+    text = reader.read(source)
+    assert calls == {'hash': 1, 'extract': 1}
+    assert reader.read(source) == text
+    # Another reader (e.g. another process) shares the cache
+    assert DocumentReader(cache_dir=reader.cache_dir).read(source) == text
+    assert calls == {'hash': 1, 'extract': 1}
+
+
+def test_changed_file_is_rehashed_and_extracted_again(tmp_path, calls):
+    source = tmp_path / 'notes.txt'
+    write(source, 'Plants need light.\n', mtime_ns=1_000_000_000)
+    reader = DocumentReader(cache_dir=str(tmp_path / 'cache'))
+    first_hash = reader.source_hash(source)
+    assert reader.read(source) == 'Plants need light.'
+
+    write(source, 'Plants need water.\n', mtime_ns=2_000_000_000)
+    assert reader.source_hash(source) != first_hash
+    assert reader.read(source) == 'Plants need water.'
+    assert calls == {'hash': 2, 'extract': 2}
+
+
+def test_touched_file_keeps_cached_extraction(tmp_path, calls):
+    source = tmp_path / 'notes.txt'
+    write(source, 'Plants need light.\n', mtime_ns=1_000_000_000)
+    reader = DocumentReader(cache_dir=str(tmp_path / 'cache'))
+    reader.read(source)
+
+    # Same content, new mtime: the hash is recomputed but still matches
+    os.utime(source, ns=(2_000_000_000, 2_000_000_000))
+    assert reader.read(source) == 'Plants need light.'
+    assert calls == {'hash': 2, 'extract': 1}
+
+
+def test_unsupported_and_missing_files(tmp_path):
+    reader = DocumentReader(cache_dir=str(tmp_path / 'cache'))
+    (tmp_path / 'slides.pptx').write_bytes(b'')
+    with pytest.raises(ValueError):
+        reader.read(tmp_path / 'slides.pptx')
+    with pytest.raises(FileNotFoundError):
+        reader.read(tmp_path / 'missing.txt')
@@ -0,0 +1,72 @@
+import json
+import pytest
+from json_stream import JSONArrayStream
+
+QUESTIONS = [
+    {'type': 'mcq', 'question': 'Which {brace} or [bracket]?', 'options': ['[A]', '{B}', 'C]', 'D}'],
+     'correct_answer': 'A'},
+    {'type': 'fill_blank', 'question': 'A "quoted" _____ with \\ and \\"', 'correct_answer': '}]'},
+    {'type': 'true_false', 'question': 'Nested {"a": [1, {"b": 2}]} text.', 'correct_answer': 'True'}
+]
+TEXT = json.dumps(QUESTIONS, indent=2)
+
+
+def feed_all(stream, fragments):
+    objects = []
+    for fragment in fragments:
+        objects.extend(stream.feed(fragment))
+    return objects
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(TEXT)])
+def test_objects_split_across_fragments(size):
+    stream = JSONArrayStream()
+    fragments = [TEXT[i:i + size] for i in range(0, len(TEXT), size)]
+    assert feed_all(stream, fragments) == QUESTIONS
+    assert stream.done and stream.parsed == 3 and stream.errors == 0
+
+
+def test_each_object_is_returned_when_its_brace_arrives():
+    stream = JSONArrayStream()
+    end_of_first = TEXT.index('\n  },') + len('\n  }')
+    assert stream.feed(TEXT[:end_of_first - 1]) == []
+    assert stream.feed(TEXT[end_of_first - 1:end_of_first]) == [QUESTIONS[0]]
+
+
+def test_escaped_quotes_and_backslashes_in_strings():
+    stream = JSONArrayStream()
+    text = json.dumps([{'question': 'Ends with a backslash \\', 'answer': '"}"'}])
+    assert feed_all(stream, text) == [{'question': 'Ends with a backslash \\', 'answer': '"}"'}]
+
+
+@pytest.mark.parametrize('prefix', [
+    '```json\n',
+    'Here are the questions you asked for:\n\n',
+    'Question list [1] follows, see [notes]: ',
+    'A stray [ before it: '
+])
+def test_text_around_the_array_is_ignored(prefix):
+    stream = JSONArrayStream()
+    suffix = '\n```\nHope this helps! {"not": "a question"}'
+    assert feed_all(stream, [prefix, TEXT, suffix]) == QUESTIONS
+    assert stream.done
+
+
+def test_truncated_final_object_is_dropped():
+    stream = JSONArrayStream()
+    cut = TEXT.index('"type": "true_false"') + 10
+    assert feed_all(stream, [TEXT[:cut]]) == QUESTIONS[:2]
+    assert not stream.done and stream.parsed == 2 and stream.errors == 0
+
+
+def test_malformed_object_is_skipped():
+    stream = JSONArrayStream()
+    text = '[{"question": "ok"}, {"question": oops}, {"question": "also ok"}]'
+    assert feed_all(stream, text) == [{'question': 'ok'}, {'question': 'also ok'}]
+    assert stream.parsed == 2 and stream.errors == 1
+
+
+def test_text_after_the_array_is_ignored():
+    stream = JSONArrayStream()
+    assert stream.feed('[]{"question": "late"}') == []
+    assert stream.done and stream.parsed == 0
@@ -0,0 +1,49 @@
+from near_duplicates import NearDuplicateIndex, question_text, signature, similarity
+from quiz_bank import QuizBank
+
+
+ORIGINAL = {
+    'type': 'mcq',
+    'question': 'What is the capital city of France?',
+    'options': ['Paris', 'Lyon', 'Nice', 'Lille'],
+    'correct_answer': 'A'
+}
+REWORDED = {
+    'type': 'mcq',
+    'question': 'Which city is the capital of France?',
+    'options': ['Lyon', 'Paris', 'Nice', 'Lille'],
+    'correct_answer': 'B'
+}
+DISTINCT = {
+    'type': 'mcq',
+    'question': 'What is the capital city of Italy?',
+    'options': ['Milan', 'Rome', 'Turin', 'Naples'],
+    'correct_answer': 'B'
+}
+
+
+def test_question_text_uses_correct_option():
+    assert question_text(ORIGINAL) == 'What is the capital city of France? Paris'
+    assert question_text({'type': 'true_false', 'question': 'Paris is in France.', 'correct_answer': 'True'}) == \
+        'Paris is in France. True'
+
+
+def test_similarity_of_rewording():
+    assert similarity(signature(question_text(ORIGINAL)), signature(question_text(REWORDED))) >= 0.6
+    assert similarity(signature(question_text(ORIGINAL)), signature(question_text(DISTINCT))) < 0.6
+
+
+def test_index_rejects_rewording_and_accepts_distinct_question():
+    index = NearDuplicateIndex()
+    assert index.add(ORIGINAL)
+    assert not index.add(REWORDED)
+    assert not index.add(dict(ORIGINAL))
+    assert index.add(DISTINCT)
+
+
+def test_bank_rejects_rewording_within_topic(tmp_path):
+    bank = QuizBank(str(tmp_path / 'bank.sqlite3'))
+    assert bank.add([ORIGINAL], topic='geography') == 1
+    assert bank.add([REWORDED, DISTINCT], topic='geography') == 1
+    # Near-duplicates are only detected within one topic or source
+    assert bank.add([REWORDED], topic='capitals') == 1
@@ -0,0 +1,65 @@
+import pytest
+from prompts import AVOID_HEADER, PromptStats, QuizPrompt, compile_template, count_tokens
+
+
+def test_compile_template_is_cached_per_kind_and_types():
+    assert compile_template('topic', ('mcq',)) is compile_template('topic', ('mcq',))
+    assert compile_template('topic', ('mcq',)) is not compile_template('content', ('mcq',))
+    assert compile_template('topic', ('mcq',)) is not compile_template('topic', ('mcq', 'true_false'))
+
+
+def test_compile_template_includes_only_selected_types():
+    text = compile_template('topic', ('fill_blank', 'true_false')).render(topic='Cells', num_questions=4)
+    assert text.startswith('Create a quiz about Cells with 4 questions.\n')
+    assert 'Include ONLY the following question types: fill_blank, true_false' in text
+    assert '"type": "fill_blank"' in text and '"type": "true_false"' in text
+    assert '"type": "mcq"' not in text and 'exactly 4 options' not in text
+    assert 'based on the provided content' not in text
+
+
+def test_content_template_keeps_braces_in_content():
+    content = 'A set is written {1, 2} and a field is {name}.'
+    text = compile_template('content', ('mcq',)).render(content=content, num_questions=2)
+    assert f'Content: {content}\n' in text
+    assert 'Questions should be based on the provided content' in text
+    # The JSON examples are literal text, not template fields
+    assert '"options": ["3", "4", "5", "6"]' in text
+
+
+def test_render_overrides_and_records_stats():
+    stats = PromptStats()
+    prompt = QuizPrompt('topic', stats=stats, topic='Cells', num_questions=5, question_types=['mcq'])
+    text = prompt.render()
+    assert 'with 5 questions' in text and '"type": "mcq"' in text
+
+    retry = prompt.render(num_questions=2, question_types=['true_false'])
+    assert 'with 2 questions' in retry and '"type": "mcq"' not in retry
+    assert stats.prompts == 2
+    assert stats.estimated_tokens == count_tokens(text) + count_tokens(retry)
+
+
+def test_render_lists_questions_to_avoid():
+    prompt = QuizPrompt('topic', topic='Cells', num_questions=3, question_types=['mcq'])
+    text = prompt.render(avoid=['What is a cell?', 'What is a nucleus?'])
+    assert text.endswith(AVOID_HEADER + '- What is a cell?\n- What is a nucleus?')
+    assert AVOID_HEADER not in prompt.render(avoid=[])
+
+
+@pytest.mark.parametrize('extra', [0, 10, 25, 1000])
+def test_render_keeps_newest_questions_within_token_budget(extra):
+    prompt = QuizPrompt('topic', topic='Cells', num_questions=3, question_types=['mcq'])
+    base_tokens = count_tokens(prompt.render())
+    avoid = [f'What is organelle number {i}?' for i in range(50)]
+    max_tokens = base_tokens + count_tokens(AVOID_HEADER) + extra
+
+    text = prompt.render(avoid=avoid, max_tokens=max_tokens)
+    assert count_tokens(text) <= max_tokens
+    listed = [line[2:] for line in text.split(AVOID_HEADER)[1].splitlines()] if AVOID_HEADER in text else []
+    # The newest questions are kept, in their original order
+    assert listed == avoid[len(avoid) - len(listed):]
+    if extra >= 1000:
+        assert listed == avoid
+    elif extra >= count_tokens(f'- {avoid[-1]}'):
+        assert listed
+    else:
+        assert not listed
@@ -0,0 +1,102 @@
+import uuid
+import pytest
+import quiz_generator
+from quiz_bank import QuizBank
+from quiz_generator import QuizGenerator
+
+
+def mcq(question, answer):
+    return {'type': 'mcq', 'question': question, 'options': [answer, 'B', 'C', 'D'], 'correct_answer': 'A'}
+
+
+QUESTIONS = [
+    mcq('What is the capital of France?', 'Paris'),
+    mcq('Which planet is closest to the sun?', 'Mercury'),
+    mcq('Who wrote Hamlet?', 'Shakespeare')
+]
+
+
+@pytest.fixture
+def bank(tmp_path):
+    return QuizBank(str(tmp_path / 'bank.sqlite3'), max_serves=2)
+
+
+def test_sample_serves_least_served_first(bank):
+    assert bank.add(QUESTIONS, topic='General', served=False) == 3
+
+    first = bank.sample(2, topic='general')
+    second = bank.sample(2, topic='GENERAL ')
+    assert len(first) == 2 and len(second) == 2
+    # The question left out of the first sample is served before any repeat
+    assert {q['question'] for q in first + second} == {q['question'] for q in QUESTIONS}
+
+
+def test_sample_stops_reusing_after_max_serves(bank):
+    bank.add(QUESTIONS, topic='general', served=False)
+
+    assert len(bank.sample(3, topic='general')) == 3
+    assert len(bank.sample(3, topic='general')) == 3
+    assert bank.sample(3, topic='general') == []
+    # Served-out questions are still stored, so they are not generated again
+    assert bank.add(QUESTIONS, topic='general') == 0
+    assert bank.count(topic='general') == 3
+
+
+def test_added_questions_count_as_served(bank):
+    bank.add(QUESTIONS[:1], topic='general')
+    assert len(bank.sample(1, topic='general')) == 1
+    assert bank.sample(1, topic='general') == []
+
+
+def test_max_serves_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv('QUIZ_BANK_MAX_SERVES', '1')
+    bank = QuizBank(str(tmp_path / 'bank.sqlite3'))
+    bank.add(QUESTIONS, topic='general', served=False)
+
+    assert len(bank.sample(3, topic='general')) == 3
+    assert bank.sample(3, topic='general') == []
+
+
+def test_sample_is_scoped_by_source_chunk_and_type(bank):
+    tf = {'type': 'true_false', 'question': 'The sun is a star.', 'correct_answer': 'True'}
+    bank.add(QUESTIONS[:2], source_hash='abc', chunk=0, served=False)
+    bank.add([QUESTIONS[2], tf], source_hash='abc', chunk=1, served=False)
+
+    assert {q['question'] for q in bank.sample(5, source_hash='abc', chunk=0)} == \
+        {q['question'] for q in QUESTIONS[:2]}
+    assert bank.sample(5, ['true_false'], source_hash='abc') == [tf]
+    assert bank.sample(5, topic='general') == []
+
+
+def test_whole_document_and_chunk_questions_are_kept_apart(tmp_path, monkeypatch):
+    generator = QuizGenerator(bank=QuizBank(str(tmp_path / 'bank.sqlite3')))
+    calls = []
+
+    def generate(prompt, num_questions=None, on_question=None, existing=None, **kwargs):
+        # Marks each question with the prompt it was generated for
+        origin = 'whole' if prompt.params['content'] == content else 'chunk'
+        calls.append(origin)
+        new = [dict(mcq(f'Question {uuid.uuid4().hex} {uuid.uuid4().hex}?', uuid.uuid4().hex), origin=origin)
+               for _ in range(num_questions - len(existing or []))]
+        return (existing or []) + new
+
+    monkeypatch.setattr(generator, 'generate_questions_with_retry', generate)
+    monkeypatch.setattr(quiz_generator.console, 'print', lambda *args, **kwargs: None)
+    content = '\n\n'.join(f'Paragraph {i} explains topic number {i} in a few words.' for i in range(8))
+
+    # A single prompt for the whole document
+    whole = generator.generate_quiz_from_content(content, num_questions=2, question_types=['mcq'])
+    assert calls == ['whole'] and {q['origin'] for q in whole} == {'whole'}
+
+    # Chunk 0 of the same document is not served the whole-document
+    # questions (one question per chunk selects all 8 chunks)
+    calls.clear()
+    chunked = generator.generate_quiz_from_content(content, num_questions=8, question_types=['mcq'],
+                                                   chunk_size=20, max_workers=2)
+    assert calls and set(calls) == {'chunk'}
+    assert {q['origin'] for q in chunked} == {'chunk'}
+
+    # ...and the whole document is served from the bank without its chunks
+    calls.clear()
+    again = generator.generate_quiz_from_content(content, num_questions=2, question_types=['mcq'])
+    assert calls == [] and {q['origin'] for q in again} == {'whole'}
@@ -0,0 +1,72 @@
+import json
+import pytest
+import quiz_batch
+from quiz_batch import BatchRunner, completed_ids, read_manifest
+
+
+class FakeGenerator:
+    """Answers topic quizzes without Ollama and records what it was asked."""
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def generate_quiz(self, topic, num_questions, question_types, stats=None):
+        self.calls.append((topic, num_questions, tuple(question_types)))
+        if topic in self.fail:
+            return None
+        return [{'type': question_types[0], 'question': f'{topic} question {i}?'} for i in range(num_questions)]
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(quiz_batch.console, 'print', lambda *args, **kwargs: None)
+
+
+def write_manifest(tmp_path, lines):
+    path = tmp_path / 'topics.txt'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_same_topic_with_other_options_is_another_item(tmp_path):
+    manifest = write_manifest(tmp_path, [
+        'Photosynthesis',
+        '{"topic": "photosynthesis ", "num_questions": 5, "question_types": "mcq"}',
+        '{"topic": "Photosynthesis", "num_questions": 10, "question_types": "true_false"}',
+        '{"topic": "Photosynthesis", "num_questions": 10, "question_types": ["true_false"]}'
+    ])
+    items = read_manifest(manifest, 5, ['mcq'])
+    assert len({item['id'] for item in items}) == 2
+
+    generator = FakeGenerator()
+    output = str(tmp_path / 'quizzes.jsonl')
+    assert BatchRunner(generator, workers=1).run(items, output) == 0
+    assert sorted(generator.calls) == [('Photosynthesis', 5, ('mcq',)), ('Photosynthesis', 10, ('true_false',))]
+
+
+def test_resume_generates_only_missing_items(tmp_path):
+    manifest = write_manifest(tmp_path, ['Cells', 'Atoms', 'Planets', 'Rivers'])
+    items = read_manifest(manifest, 3, ['mcq'])
+    output = tmp_path / 'quizzes.jsonl'
+
+    # First run: Planets fails, then the run is cut off while writing Rivers
+    first = FakeGenerator(fail={'Planets'})
+    assert BatchRunner(first, workers=1).run(items[:3], str(output)) == 1
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write('{"id": "topic:rivers:3:mcq", "status": "succ')
+    assert completed_ids(str(output)) == {items[0]['id'], items[1]['id']}
+
+    second = FakeGenerator()
+    assert BatchRunner(second, workers=2).run(items, str(output)) == 0
+    assert sorted(topic for topic, _, _ in second.calls) == ['Planets', 'Rivers']
+    assert completed_ids(str(output)) == {item['id'] for item in items}
+    # The cut-off line is ended before new records are appended
+    lines = output.read_text(encoding='utf-8').splitlines()
+    assert json.loads(lines[-1])['status'] == 'succeeded'
+
+    # Nothing is left to do for a third run, even with other types on the command line
+    third = FakeGenerator()
+    assert BatchRunner(third).run(items, str(output)) == 0
+    assert third.calls == []
+    assert BatchRunner(third).run(read_manifest(manifest, 3, ['true_false']), str(output)) == 0
+    assert len(third.calls) == 4
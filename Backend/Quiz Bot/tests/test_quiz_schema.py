@@ -0,0 +1,78 @@
+import json
+from quiz_schema import QUESTION_SCHEMAS, format_schema, quiz_schema, schema_errors
+
+MCQ = {
+    'type': 'mcq',
+    'question': 'Which gas do plants take in?',
+    'options': ['Oxygen', 'Carbon dioxide', 'Nitrogen', 'Helium'],
+    'correct_answer': 'B',
+    'explanation': 'Plants use carbon dioxide in photosynthesis.'
+}
+FILL_BLANK = {
+    'type': 'fill_blank',
+    'question': 'Plants make sugar by _____.',
+    'correct_answer': 'photosynthesis',
+    'explanation': 'Light energy is stored as sugar.'
+}
+TRUE_FALSE = {
+    'type': 'true_false',
+    'question': 'Plants need light.',
+    'correct_answer': 'True',
+    'explanation': 'Light drives photosynthesis.'
+}
+
+
+def test_valid_questions_have_no_errors():
+    for q in (MCQ, FILL_BLANK, TRUE_FALSE):
+        assert schema_errors(q, QUESTION_SCHEMAS[q['type']]) == []
+    assert schema_errors([MCQ, FILL_BLANK, TRUE_FALSE], quiz_schema()) == []
+
+
+def test_errors_name_the_field():
+    q = dict(MCQ, options=MCQ['options'][:3], correct_answer='E', explanation='  ')
+    del q['question']
+    assert schema_errors(q, QUESTION_SCHEMAS['mcq'], 'Question 1') == [
+        'Question 1 is missing question',
+        'Question 1 options must have at least 4 items',
+        'Question 1 correct_answer must be one of A, B, C, D, got \'E\'',
+        'Question 1 explanation must not be blank'
+    ]
+
+
+def test_pattern_and_type_errors():
+    assert schema_errors(dict(FILL_BLANK, question='Plants make sugar.'), QUESTION_SCHEMAS['fill_blank']) == [
+        'value question must contain _____ to indicate the blank'
+    ]
+    assert schema_errors(dict(TRUE_FALSE, correct_answer=True), QUESTION_SCHEMAS['true_false']) == [
+        "value correct_answer must be one of True, False, got True"
+    ]
+    assert schema_errors(dict(MCQ, options='A, B, C, D'), QUESTION_SCHEMAS['mcq']) == [
+        'value options must be of type array'
+    ]
+    assert schema_errors('[]', quiz_schema()) == ['value must be of type array']
+
+
+def test_quiz_schema_limits_types_and_count():
+    schema = quiz_schema(['true_false'], max_questions=1)
+    assert schema['items'] == QUESTION_SCHEMAS['true_false']
+    assert schema_errors([TRUE_FALSE], schema) == []
+    assert schema_errors([TRUE_FALSE, TRUE_FALSE], schema) == ['value must have at most 1 items']
+    assert schema_errors([], schema) == ['value must have at least 1 items']
+    assert schema_errors([MCQ], schema)
+    assert schema_errors([MCQ], quiz_schema(['mcq', 'fill_blank'])) == []
+    assert schema_errors([TRUE_FALSE], quiz_schema(['mcq', 'fill_blank'])) == [
+        'value[0] does not match any allowed form'
+    ]
+
+
+def test_format_schema_strips_every_pattern():
+    schema = quiz_schema()
+    sent = format_schema(schema)
+    assert '"pattern"' not in json.dumps(sent)
+    # Everything else is kept, and the original schema is not modified
+    assert sent['items']['anyOf'][0]['properties']['options'] == {
+        'type': 'array', 'items': {'type': 'string'}, 'minItems': 4, 'maxItems': 4
+    }
+    assert sent['items']['anyOf'][1]['required'] == QUESTION_SCHEMAS['fill_blank']['required']
+    assert QUESTION_SCHEMAS['fill_blank']['properties']['question']['pattern'] == '_____'
+    assert format_schema(schema) == sent
@@ -0,0 +1,145 @@
+import io
+import json
+import threading
+import time
+import pytest
+
+
+class StubGenerator:
+    """Returns numbered true/false questions, publishing each one as it goes."""
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def _questions(self, source, num_questions, question_types, on_question=None, stats=None):
+        self.calls.append((source, num_questions, question_types))
+        if source == 'fail':
+            raise RuntimeError('Ollama is not running')
+        questions = []
+        for i in range(0 if source == 'empty' else num_questions):
+            question = {'type': 'true_false', 'question': f'{source} statement {i}.', 'correct_answer': 'True'}
+            questions.append(question)
+            on_question(question)
+            self.release.wait(5)
+        return questions
+
+    def generate_quiz(self, topic, **params):
+        return self._questions(topic, **params)
+
+    def generate_quiz_from_content(self, content, **params):
+        return self._questions(content, **params)
+
+    def read_file_content(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv('QUIZ_BANK', str(tmp_path / 'quiz_bank.sqlite3'))
+    monkeypatch.setenv('QUIZ_BOT_CACHE', str(tmp_path / 'cache'))
+    import quiz_service
+
+    stub = StubGenerator()
+    monkeypatch.setattr(quiz_service, 'jobs', quiz_service.QuizJobManager(stub, max_workers=2))
+    monkeypatch.setattr(quiz_service, 'UPLOAD_DIR', str(tmp_path / 'uploads'))
+    quiz_service.app.config['TESTING'] = True
+    return quiz_service.app.test_client(), stub
+
+
+def wait_until_finished(client, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f'/quizzes/{job_id}').get_json()
+        if body['status'] in ('succeeded', 'failed'):
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_submit_topic_and_poll(service):
+    client, stub = service
+    response = client.post('/quizzes', json={'topic': 'Cells', 'num_questions': 3, 'question_types': 'true_false'})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['kind'] == 'topic' and job['num_questions'] == 3
+
+    body = wait_until_finished(client, job['job_id'])
+    assert body['status'] == 'succeeded' and body['error'] is None
+    assert [q['question'] for q in body['questions']] == [f'Cells statement {i}.' for i in range(3)]
+    assert stub.calls == [('Cells', 3, ['true_false'])]
+
+
+def test_submit_text_and_file(service):
+    client, stub = service
+    text_job = client.post('/quizzes', json={'text': 'Light is fast.'}).get_json()
+    assert wait_until_finished(client, text_job['job_id'])['status'] == 'succeeded'
+
+    data = {'file': (io.BytesIO(b'Cells divide.'), 'notes.txt'), 'num_questions': '2'}
+    response = client.post('/quizzes', data=data, content_type='multipart/form-data')
+    assert response.status_code == 202
+    assert wait_until_finished(client, response.get_json()['job_id'])['status'] == 'succeeded'
+    assert stub.calls == [
+        ('Light is fast.', 5, ['mcq', 'fill_blank', 'true_false']),
+        ('Cells divide.', 2, ['mcq', 'fill_blank', 'true_false'])
+    ]
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'json': {}},
+    {'json': {'topic': 'Cells', 'num_questions': 0}},
+    {'json': {'topic': 'Cells', 'num_questions': 'five'}},
+    {'json': {'topic': 'Cells', 'question_types': ['essay']}},
+    {'data': {'file': (io.BytesIO(b'x'), 'notes.exe')}, 'content_type': 'multipart/form-data'},
+])
+def test_submit_rejects_bad_requests(service, kwargs):
+    client, stub = service
+    response = client.post('/quizzes', **kwargs)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert stub.calls == []
+
+
+@pytest.mark.parametrize('source, error', [('fail', 'Ollama is not running'), ('empty', 'No valid questions were generated')])
+def test_failed_jobs_report_error(service, source, error):
+    client, _ = service
+    job = client.post('/quizzes', json={'topic': source}).get_json()
+    body = wait_until_finished(client, job['job_id'])
+    assert body['status'] == 'failed' and body['error'] == error
+
+
+def test_stream_sends_questions_then_done(service):
+    client, stub = service
+    stub.release.clear()
+    job = client.post('/quizzes', json={'topic': 'Cells', 'num_questions': 2}).get_json()
+
+    response = client.get(f"/quizzes/{job['job_id']}/stream", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.response
+    # The first question arrives while the job is still running
+    events = []
+    while not any(event['event'] == 'question' for event in events):
+        events.append(json.loads(next(lines)))
+    assert client.get(f"/quizzes/{job['job_id']}").get_json()['status'] == 'running'
+    stub.release.set()
+    events += [json.loads(line) for line in lines]
+    response.close()
+
+    assert {'event': 'status', 'status': 'running'} in events
+
+    assert [e['question']['question'] for e in events if e['event'] == 'question'] == \
+        ['Cells statement 0.', 'Cells statement 1.']
+    assert events[-2:] == [
+        {'event': 'status', 'status': 'succeeded'},
+        {'event': 'done', 'status': 'succeeded', 'error': None}
+    ]
+
+
+def test_unknown_job_ids(service):
+    client, _ = service
+    for path in ('/quizzes/missing', '/quizzes/missing/stream'):
+        response = client.get(path)
+        assert response.status_code == 404
+        assert response.get_json() == {'error': 'Unknown quiz job'}
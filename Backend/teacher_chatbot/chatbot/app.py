@@ -1,38 +1,160 @@
 from flask import Flask, request, jsonify, render_template
 import os
-import json
+import threading
 from utils.preprocessor import TextPreprocessor
 from utils.data_preparation import DataPreparation
-from models.seq2seq_model import Seq2SeqModel
+from utils.qa_store import QAStore
+from utils.training_jobs import TrainingJobManager
+from utils.runtime import configure_runtime_from_env
+from utils.vocabulary import load_vocabulary
+from utils.subword_tokenizer import BPETokenizer
+from utils.retrieval import QARetriever
 import numpy as np
 
 app = Flask(__name__)
 
 # Initialize components
 preprocessor = TextPreprocessor()
-data_prep = DataPreparation('data/qa_data.json')
+data_prep = DataPreparation('data/qa_data.jsonl')
+training_jobs = TrainingJobManager('data/qa_data.jsonl')
+retriever = None
+retriever_lock = threading.Lock()
+RETRIEVAL_THRESHOLD = float(os.environ.get('CHATBOT_RETRIEVAL_THRESHOLD', 0.8))
 model = None
 vocabulary = None
+tokenizer = None
+model_release = None
+runtime_configured = False
+# (vocabulary, tokenizer) loaded by preload(), by vocabulary path
+preloaded_vocabularies = {}
 
-def load_model():
-    global model, vocabulary
-    # Load vocabulary
-    with open('data/vocabulary.json', 'r') as f:
-        vocabulary = json.load(f)
+def release_files(release):
+    """
+    Weights and vocabulary paths of a release, or of the default files
+    """
+    if release is not None:
+        return release['weights'], release['vocabulary']
+    vocabulary_path = 'data/vocabulary.bin'
+    if not os.path.exists(vocabulary_path):
+        vocabulary_path = 'data/vocabulary.json'
+    return 'models/seq2seq_model.h5', vocabulary_path
+
+def load_release_vocabulary(release):
+    """
+    Load the vocabulary (memory-mapped when binary) and subword tokenizer
+    of a release, reusing the ones preloaded before the fork
+    """
+    _, vocabulary_path = release_files(release)
+    if vocabulary_path in preloaded_vocabularies:
+        return preloaded_vocabularies[vocabulary_path]
+    new_tokenizer = None
+    if release is not None and release.get('tokenizer'):
+        new_tokenizer = BPETokenizer.load(release['tokenizer'])
+    return load_vocabulary(vocabulary_path), new_tokenizer
+
+def load_model(release=None):
+    global model, vocabulary, tokenizer, model_release, runtime_configured
+    # TensorFlow is only imported once a model is needed, so the server
+    # starts and answers from retrieval without it
+    from models.seq2seq_model import Seq2SeqModel
+    if not runtime_configured:
+        # Thread pools and precision for serving, before any model is built
+        configure_runtime_from_env()
+        runtime_configured = True
+
+    # Serve the latest promoted training job, or the default files
+    weights_path, _ = release_files(release)
+    new_vocabulary, new_tokenizer = load_release_vocabulary(release)
     
-    # Initialize and load model
-    model = Seq2SeqModel(len(vocabulary))
-    model.load('models/seq2seq_model.h5')
+    # Initialize and load model, with the architecture it was trained with
+    model_config = release.get('model') if release is not None else None
+    new_model = Seq2SeqModel(len(new_vocabulary), **(model_config or {}))
+    new_model.load(weights_path)
+
+    # Swap only once the new model is fully loaded
+    model, vocabulary, tokenizer = new_model, new_vocabulary, new_tokenizer
+    model_release = release['job_id'] if release else None
+
+def ensure_current_model():
+    release = training_jobs.current_release()
+    if model is None or (release and release['job_id'] != model_release):
+        load_model(release)
+
+def get_retriever():
+    global retriever
+    # Index the Q&A corpus on first use, then the pairs appended to the
+    # store since, by this or any other server worker
+    with retriever_lock:
+        if retriever is None:
+            retriever = QARetriever(preprocessor)
+        retriever.add_many(
+            (item['question'], item['answer']) for item in data_prep.store.iter_from(len(retriever))
+        )
+        return retriever
+
+def sequence_to_text(sequence, current_vocabulary, current_tokenizer):
+    # Convert sequence back to text
+    if current_tokenizer is not None:
+        return current_tokenizer.decode(sequence)
+    if hasattr(current_vocabulary, 'word'):
+        return ' '.join([current_vocabulary.word(idx) if idx < len(current_vocabulary) else '<UNK>' for idx in sequence])
+    reverse_vocab = {v: k for k, v in current_vocabulary.items()}
+    return ' '.join([reverse_vocab.get(idx, '<UNK>') for idx in sequence])
+
+def ensure_dataset():
+    """
+    Convert a legacy data/qa_data.json into the append-only store, or
+    create the sample dataset if there is no data yet
+    """
+    if data_prep.store.exists():
+        return
+    if os.path.exists('data/qa_data.json'):
+        QAStore.from_json('data/qa_data.json', data_prep.data_path)
+    else:
+        data_prep.create_sample_dataset()
+
+def preload():
+    """
+    Build the retrieval index and map the vocabulary of the current
+    release without importing TensorFlow. gunicorn runs this in the master,
+    so forked workers share these pages instead of each building a copy.
+    """
+    ensure_dataset()
+    get_retriever()
+    release = training_jobs.current_release()
+    _, vocabulary_path = release_files(release)
+    preloaded_vocabularies.clear()
+    if os.path.exists(vocabulary_path):
+        preloaded_vocabularies[vocabulary_path] = load_release_vocabulary(release)
+
+def warm_up():
+    """
+    Bring the retrieval index up to date and load the current model up
+    front, so a server worker is ready before its first request
+    """
+    ensure_dataset()
+    get_retriever()
+    release = training_jobs.current_release()
+    if release is not None or os.path.exists('models/seq2seq_model.h5'):
+        load_model(release)
 
 @app.route('/')
 def home():
     return render_template('index.html')
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    status = {
+        'ready': model is not None and retriever is not None,
+        'model_loaded': model is not None,
+        'retrieval_loaded': retriever is not None,
+        'release': model_release,
+        'pid': os.getpid()
+    }
+    return jsonify(status), 200 if status['ready'] else 503
+
 @app.route('/ask', methods=['POST'])
 def ask():
-    if not model:
-        load_model()
-    
     data = request.json
     question = data.get('question', '')
     
@@ -40,54 +162,140 @@ def ask():
         return jsonify({'error': 'No question provided'}), 400
     
     try:
-        # Preprocess question
-        sequence = preprocessor.text_to_sequence(question, vocabulary)
+        # Return a stored answer when the question is already in the corpus
+        stored_answer, similarity = get_retriever().match(question, RETRIEVAL_THRESHOLD)
+        if stored_answer is not None:
+            return jsonify({
+                'question': question,
+                'answer': stored_answer,
+                'source': 'retrieval',
+                'similarity': similarity
+            })
+        
+        ensure_current_model()
+        current_model, current_vocabulary, current_tokenizer = model, vocabulary, tokenizer
+        encoder = current_tokenizer or preprocessor
+        
+        # Preprocess question, without padding it to max_length
+        sequence = encoder.text_to_sequence(question, current_vocabulary, pad=False)
         sequence = np.array([sequence])
         
         # Generate answer
-        answer_sequence = model.predict(sequence)
-        
-        # Convert sequence back to text
-        reverse_vocab = {v: k for k, v in vocabulary.items()}
-        answer = ' '.join([reverse_vocab.get(idx, '<UNK>') for idx in answer_sequence])
+        answer_sequence = current_model.predict(sequence)
         
         return jsonify({
             'question': question,
-            'answer': answer
+            'answer': sequence_to_text(answer_sequence, current_vocabulary, current_tokenizer),
+            'source': 'model',
+            'similarity': similarity
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/train', methods=['POST'])
-def train():
+@app.route('/ask/batch', methods=['POST'])
+def ask_batch():
+    data = request.get_json(silent=True) or {}
+    questions = data.get('questions')
+    
+    if not questions or not isinstance(questions, list):
+        return jsonify({'error': 'No questions provided'}), 400
+    
     try:
-        # Prepare data
-        data = data_prep.prepare_data()
+        # Stored answers first, then one batched model pass for the rest
+        index = get_retriever()
+        results = []
+        for question in questions:
+            stored_answer, similarity = index.match(question, RETRIEVAL_THRESHOLD)
+            results.append({
+                'question': question,
+                'answer': stored_answer,
+                'source': 'retrieval' if stored_answer is not None else 'model',
+                'similarity': similarity
+            })
+        pending = [result for result in results if result['answer'] is None]
         
-        # Save vocabulary
-        with open('data/vocabulary.json', 'w') as f:
-            json.dump(data['vocabulary'], f)
+        if pending:
+            ensure_current_model()
+            current_model, current_vocabulary, current_tokenizer = model, vocabulary, tokenizer
+            encoder = current_tokenizer or preprocessor
+            sequences = [
+                encoder.text_to_sequence(result['question'], current_vocabulary, pad=False)
+                for result in pending
+            ]
+            for result, answer_sequence in zip(pending, current_model.predict_batch(sequences)):
+                result['answer'] = sequence_to_text(answer_sequence, current_vocabulary, current_tokenizer)
         
-        # Initialize and train model
-        global model
-        model = Seq2SeqModel(len(data['vocabulary']))
-        history = model.train(
-            [data['X_train'], data['y_train']],
-            [data['X_val'], data['y_val']]
+        return jsonify({'answers': results})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/qa', methods=['POST'])
+def add_qa_pair():
+    data = request.get_json(silent=True) or {}
+    question, answer = data.get('question', ''), data.get('answer', '')
+    if not question or not answer:
+        return jsonify({'error': 'Both question and answer are required'}), 400
+    
+    try:
+        qa_id = data_prep.add_qa_pair(question, answer)
+        if qa_id is None:
+            return jsonify({'status': 'duplicate'}), 200
+        # Indexed from the store on the next lookup, in every worker
+        return jsonify({'status': 'success', 'id': qa_id}), 201
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/qa/<int:qa_id>', methods=['GET'])
+def get_qa_pair(qa_id):
+    try:
+        return jsonify(dict(data_prep.store[qa_id], id=qa_id))
+    except IndexError:
+        return jsonify({'error': 'Unknown Q&A pair'}), 404
+
+@app.route('/train', methods=['POST'])
+def train():
+    data = request.get_json(silent=True) or {}
+    try:
+        job_id = training_jobs.submit(
+            batch_size=data.get('batch_size', 64),
+            epochs=data.get('epochs', 50),
+            shard_dir='data/shards' if data.get('streaming') else None,
+            runtime=data.get('runtime'),
+            subword_vocab_size=data.get('subword_vocab_size'),
+            architecture=data.get('architecture')
         )
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Model trained successfully'
-        })
+        return jsonify(training_jobs.status(job_id)), 202
     
+    except ValueError as e:
+        # Invalid options, rejected before a job is started
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/train', methods=['GET'])
+def list_training_jobs():
+    return jsonify({'jobs': training_jobs.list_jobs()})
+
+@app.route('/train/<job_id>', methods=['GET'])
+def training_status(job_id):
+    status = training_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown training job'}), 404
+    return jsonify(status)
+
+@app.route('/train/<job_id>/cancel', methods=['POST'])
+def cancel_training(job_id):
+    status = training_jobs.cancel(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown training job'}), 404
+    return jsonify(status)
+
 if __name__ == '__main__':
-    # Create sample dataset if it doesn't exist
-    if not os.path.exists('data/qa_data.json'):
-        data_prep.create_sample_dataset()
+    # Convert or create the dataset if it doesn't exist
+    ensure_dataset()
     
-    app.run(debug=True) 
\ No newline at end of file
+    # Development server; use gunicorn.conf.py in production
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1') 
\ No newline at end of file
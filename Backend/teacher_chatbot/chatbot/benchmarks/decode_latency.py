@@ -0,0 +1,87 @@
+"""
+Compare CPU latency of answering one question with the LSTM and the
+transformer Seq2SeqModel.
+
+Run from the chatbot directory:
+    python -m benchmarks.decode_latency
+    python -m benchmarks.decode_latency --answer-len 100 --runs 10
+
+Models have random weights and <END> is suppressed, so every run decodes
+exactly --answer-len tokens. The transformer is timed with its key/value
+cache (Seq2SeqModel.predict) and without it, recomputing the whole decoder
+input at every step (both compiled with tf.function).
+"""
+import argparse
+import time
+import numpy as np
+
+
+def suppress_end(dense):
+    from models.seq2seq_model import END_ID
+    weights, bias = dense.get_weights()
+    bias[END_ID] = -1e9
+    dense.set_weights([weights, bias])
+
+
+def uncached_predictor(model):
+    import tensorflow as tf
+    from models.seq2seq_model import START_ID
+    forward = tf.function(lambda question, answer: model.model([question, answer], training=False),
+                          reduce_retracing=True)
+
+    def predict(input_sequence, max_length):
+        decoder_input = [START_ID]
+        for _ in range(max_length):
+            output = forward(input_sequence, tf.constant([decoder_input]))
+            decoder_input.append(int(tf.argmax(output[0, -1])))
+        return decoder_input[1:]
+    return predict
+
+
+def time_runs(fn, runs):
+    fn()  # Warm up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vocab-size', type=int, default=10004)
+    parser.add_argument('--question-len', type=int, default=20)
+    parser.add_argument('--answer-len', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    from models.seq2seq_model import Seq2SeqModel, START_ID
+
+    rng = np.random.default_rng(0)
+    question = rng.integers(4, args.vocab_size, size=(1, args.question_len))
+    question[0, 0] = START_ID
+    question = tf.constant(question)
+
+    lstm = Seq2SeqModel(args.vocab_size)
+    suppress_end(lstm.model.layers[6])
+    transformer = Seq2SeqModel(args.vocab_size, architecture='transformer')
+    suppress_end(transformer.output_layer)
+
+    predict_uncached = uncached_predictor(transformer)
+    cases = [
+        ('lstm', lambda: lstm.predict(question, args.answer_len)),
+        ('transformer', lambda: transformer.predict(question, args.answer_len)),
+        ('transformer, no cache', lambda: predict_uncached(question, args.answer_len)),
+    ]
+    print(f"{'model':<24}{'params':>12}{'p50 ms':>10}{'p95 ms':>10}{'ms/token':>10}")
+    for name, fn in cases:
+        model = transformer if name.startswith('transformer') else lstm
+        timings = time_runs(fn, args.runs) * 1000
+        print(f"{name:<24}{model.model.count_params():>12,}{np.percentile(timings, 50):>10.1f}"
+              f"{np.percentile(timings, 95):>10.1f}{np.median(timings) / args.answer_len:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure TextPreprocessor throughput (texts/sec) on a synthetic corpus.
+
+Run from the chatbot directory:
+    python -m benchmarks.preprocessor_throughput
+    python -m benchmarks.preprocessor_throughput --sentences 100000 --jobs 8
+"""
+import argparse
+import os
+import random
+import time
+from utils.preprocessor import TextPreprocessor
+
+WORDS = (
+    "the plant cells use light energy to produce food through photosynthesis while animal "
+    "cells rely on mitochondria the water cycle involves evaporation condensation and "
+    "precipitation a right triangle has a hypotenuse whose square equals the sum of squares "
+    "of the other sides digestion breaks down nutrients in the stomach and intestines "
+    "students are learning about equations forces molecules atoms and historical empires"
+).split()
+
+
+def make_corpus(size, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(WORDS, k=rng.randint(5, 25))
+        corpus.append(' '.join(words).capitalize() + rng.choice(['.', '?', '!']))
+    return corpus
+
+
+def measure(name, fn, corpus):
+    start = time.perf_counter()
+    fn(corpus)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{len(corpus) / elapsed:>14,.0f} texts/sec{elapsed:>10.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sentences', type=int, default=1000000)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--baseline-sentences', type=int, default=50000,
+                        help='corpus size for the slow uncached NLTK baseline')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.sentences)
+    print(f"{args.sentences:,} sentences, {args.jobs} jobs\n")
+
+    # Uncached NLTK path, as before caching, on a smaller sample
+    uncached = TextPreprocessor('nltk', lemma_cache_size=0)
+    measure('nltk (uncached)', lambda texts: [uncached.preprocess_text(t) for t in texts],
+            corpus[:args.baseline_sentences])
+
+    nltk_cached = TextPreprocessor('nltk')
+    measure('nltk + lemma cache', nltk_cached.preprocess_batch, corpus)
+
+    regex_cached = TextPreprocessor('regex')
+    measure('regex + lemma cache', regex_cached.preprocess_batch, corpus)
+
+    measure(f'regex + cache, {args.jobs} procs',
+            lambda texts: regex_cached.preprocess_batch(texts, batch_size=10000, n_jobs=args.jobs),
+            corpus)
+
+
+if __name__ == '__main__':
+    main()
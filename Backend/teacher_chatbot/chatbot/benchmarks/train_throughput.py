@@ -0,0 +1,102 @@
+"""
+Compare Seq2SeqModel training steps/sec across runtime options on CPU.
+
+Run from the chatbot directory:
+    python -m benchmarks.train_throughput
+    python -m benchmarks.train_throughput --steps 100 --batch-size 128
+
+Each configuration runs in its own process because thread pools and the
+precision policy can only be set before TensorFlow initializes.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+CONFIGS = {
+    'float32': {},
+    'float32+threads': {'intra_op_threads': os.cpu_count(), 'inter_op_threads': 2},
+    'float32+xla': {'jit_compile': True},
+    'bfloat16': {'mixed_precision': 'bfloat16'},
+    'bfloat16+xla': {'mixed_precision': 'bfloat16', 'jit_compile': True},
+}
+
+
+def run_config(name, args):
+    import numpy as np
+    import tensorflow as tf
+    from utils.runtime import configure_runtime, cpu_supports_bfloat16
+    from models.seq2seq_model import Seq2SeqModel
+
+    options = CONFIGS[name]
+    configure_runtime(
+        intra_op_threads=options.get('intra_op_threads'),
+        inter_op_threads=options.get('inter_op_threads'),
+        mixed_precision=options.get('mixed_precision')
+    )
+    model = Seq2SeqModel(args.vocab_size, jit_compile=options.get('jit_compile', False))
+
+    # Synthetic batches with realistic padding: random lengths up to seq_len
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(4, args.seq_len + 1, size=(2, args.batch_size))
+    questions = rng.integers(4, args.vocab_size, size=(args.batch_size, args.seq_len))
+    answers = rng.integers(4, args.vocab_size, size=(args.batch_size, args.seq_len))
+    questions[np.arange(args.seq_len) >= lengths[0][:, None]] = 0
+    answers[np.arange(args.seq_len) >= lengths[1][:, None]] = 0
+    dataset = tf.data.Dataset.from_tensors((questions, answers)).repeat()
+    dataset = dataset.map(Seq2SeqModel._to_model_inputs)
+
+    # Warm up (tracing and XLA compilation), then time
+    model.model.fit(dataset, steps_per_epoch=args.warmup_steps, epochs=1, verbose=0)
+    start = time.perf_counter()
+    model.model.fit(dataset, steps_per_epoch=args.steps, epochs=1, verbose=0)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'config': name,
+        'steps_per_sec': args.steps / elapsed,
+        'examples_per_sec': args.steps * args.batch_size / elapsed,
+        'native_bfloat16': cpu_supports_bfloat16()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', choices=sorted(CONFIGS), help='run a single configuration')
+    parser.add_argument('--vocab-size', type=int, default=10004)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seq-len', type=int, default=50)
+    parser.add_argument('--steps', type=int, default=50)
+    parser.add_argument('--warmup-steps', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.config:
+        print(json.dumps(run_config(args.config, args)))
+        return
+
+    passthrough = sys.argv[1:]
+    results = []
+    for name in CONFIGS:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.train_throughput', '--config', name] + passthrough,
+            capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            error = (output.stderr.strip().splitlines() or ['unknown error'])[-1]
+            print(f"{name}: failed ({error})")
+            continue
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    baseline = results[0]['steps_per_sec'] if results else None
+    print(f"{'config':<18}{'steps/sec':>12}{'examples/sec':>15}{'speedup':>10}")
+    for result in results:
+        print(f"{result['config']:<18}{result['steps_per_sec']:>12.2f}"
+              f"{result['examples_per_sec']:>15.1f}{result['steps_per_sec'] / baseline:>9.2f}x")
+    if results and not results[0]['native_bfloat16']:
+        print("\nNote: this CPU has no native bfloat16 support, so bfloat16 runs are emulated.")
+
+
+if __name__ == '__main__':
+    main()
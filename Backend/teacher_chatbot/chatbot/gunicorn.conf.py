@@ -0,0 +1,68 @@
+"""
+Production server for app.py:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master, which builds the retrieval index
+and maps the vocabulary before forking, so the workers share them
+copy-on-write. TensorFlow is not fork-safe and the app only imports it to
+load a model, so each worker loads the current model after the fork,
+before taking requests, and is pinned to its own core.
+`kill -HUP <master pid>` replaces the workers gracefully, and the new ones
+load the current release.
+"""
+import gc
+import os
+
+CPUS = sorted(os.sched_getaffinity(0))
+
+bind = os.environ.get('CHATBOT_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('CHATBOT_WORKERS', len(CPUS)))
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+# One core per worker, so TensorFlow should not start its own thread pools
+os.environ.setdefault('CHATBOT_INTRA_OP_THREADS', '1')
+os.environ.setdefault('CHATBOT_INTER_OP_THREADS', '1')
+
+
+def _preload(server):
+    # The module preloaded by gunicorn, not a second copy
+    import app
+    try:
+        app.preload()
+    except Exception as e:
+        server.log.warning("Could not preload the retrieval index: %s", e)
+        return
+    # Keep the garbage collector from writing to the shared objects,
+    # which would copy their pages into every worker
+    gc.freeze()
+    server.log.info("Preloaded %d Q&A pairs for retrieval", len(app.retriever))
+
+
+def when_ready(server):
+    _preload(server)
+
+
+def on_reload(server):
+    # Runs in the master on SIGHUP, before the new workers are forked
+    _preload(server)
+
+
+def pre_fork(server, worker):
+    # Give the new worker the least used core among the live workers
+    used = [getattr(other, 'cpu', None) for other in server.WORKERS.values()]
+    worker.cpu = min(CPUS, key=used.count)
+
+
+def post_fork(server, worker):
+    os.sched_setaffinity(0, {worker.cpu})
+    server.log.info("Worker %s pinned to CPU %s", worker.pid, worker.cpu)
+
+
+def post_worker_init(worker):
+    # Runs in the worker once it has imported the app
+    import app
+    app.warm_up()
+    worker.log.info("Worker %s warmed up release %s", worker.pid, app.model_release)
@@ -1,49 +1,158 @@
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras.layers import Input, LSTM, Dense, Embedding
 from tensorflow.keras.models import Model
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
+from utils.input_pipeline import bucketed_array_dataset
+from .transformer import TransformerEncoder, TransformerDecoder
+
+PAD_ID = 0
+START_ID = 1
+END_ID = 2
+
+def masked_loss(y_true, y_pred):
+    """
+    Sparse categorical crossentropy averaged over real (non-padding) tokens
+    """
+    loss = tf.keras.losses.sparse_categorical_crossentropy(y_true, y_pred)
+    mask = tf.cast(tf.not_equal(y_true, PAD_ID), loss.dtype)
+    return tf.reduce_sum(loss * mask) / tf.maximum(tf.reduce_sum(mask), 1.0)
+
+def masked_accuracy(y_true, y_pred):
+    """
+    Token accuracy over real (non-padding) tokens
+    """
+    y_true = tf.cast(y_true, tf.int64)
+    matches = tf.cast(tf.equal(y_true, tf.argmax(y_pred, axis=-1)), tf.float32)
+    mask = tf.cast(tf.not_equal(y_true, PAD_ID), tf.float32)
+    return tf.reduce_sum(matches * mask) / tf.maximum(tf.reduce_sum(mask), 1.0)
+
+ARCHITECTURES = ('lstm', 'transformer')
 
 class Seq2SeqModel:
-    def __init__(self, vocab_size, embedding_dim=256, lstm_units=512):
+    def __init__(self, vocab_size, embedding_dim=256, lstm_units=512, jit_compile=False, strategy=None,
+                 architecture='lstm', num_layers=2, num_heads=4, ff_dim=512, dropout=0.1):
+        """
+        `jit_compile` compiles the train step with XLA. `strategy` is a
+        tf.distribute strategy (see utils.runtime.create_strategy) under which
+        the model variables are created. Mixed precision follows the global
+        Keras policy set by utils.runtime.configure_runtime.
+
+        `architecture='transformer'` builds a small transformer instead of
+        the LSTM, with `num_layers` encoder and decoder layers of width
+        `embedding_dim`, `num_heads` attention heads and `ff_dim` wide
+        feed-forward layers.
+        """
+        if architecture not in ARCHITECTURES:
+            raise ValueError(f"Unknown architecture '{architecture}', expected one of {ARCHITECTURES}")
         self.vocab_size = vocab_size
         self.embedding_dim = embedding_dim
         self.lstm_units = lstm_units
-        self.model = self._build_model()
+        self.jit_compile = jit_compile
+        self.architecture = architecture
+        self.num_layers = num_layers
+        self.num_heads = num_heads
+        self.ff_dim = ff_dim
+        self.dropout = dropout
+        self.strategy = strategy or tf.distribute.get_strategy()
+        with self.strategy.scope():
+            if architecture == 'transformer':
+                self.model = self._build_transformer_model()
+            else:
+                self.model = self._build_model()
         
     def _build_model(self):
         # Encoder
         encoder_inputs = Input(shape=(None,))
-        encoder_embedding = Embedding(self.vocab_size, self.embedding_dim)(encoder_inputs)
+        encoder_embedding = Embedding(self.vocab_size, self.embedding_dim, mask_zero=True)(encoder_inputs)
         encoder_lstm = LSTM(self.lstm_units, return_state=True)
         encoder_outputs, state_h, state_c = encoder_lstm(encoder_embedding)
         encoder_states = [state_h, state_c]
         
         # Decoder
         decoder_inputs = Input(shape=(None,))
+        # Padding follows <END> and the decoder is causal, so padded steps
+        # cannot affect real ones and are only masked out in masked_loss
         decoder_embedding = Embedding(self.vocab_size, self.embedding_dim)(decoder_inputs)
         decoder_lstm = LSTM(self.lstm_units, return_sequences=True, return_state=True)
         decoder_outputs, _, _ = decoder_lstm(decoder_embedding, initial_state=encoder_states)
-        decoder_dense = Dense(self.vocab_size, activation='softmax')
+        # Keep the softmax in float32 for numerically stable mixed precision
+        decoder_dense = Dense(self.vocab_size, activation='softmax', dtype='float32')
         decoder_outputs = decoder_dense(decoder_outputs)
         
         # Model
         model = Model([encoder_inputs, decoder_inputs], decoder_outputs)
+        return self._compile(model)
+    
+    def _build_transformer_model(self):
+        encoder_inputs = Input(shape=(None,))
+        decoder_inputs = Input(shape=(None,))
+        self.encoder = TransformerEncoder(
+            self.vocab_size, self.embedding_dim, self.num_layers, self.num_heads, self.ff_dim, self.dropout
+        )
+        self.decoder = TransformerDecoder(
+            self.vocab_size, self.embedding_dim, self.num_layers, self.num_heads, self.ff_dim, self.dropout
+        )
+        self.output_layer = Dense(self.vocab_size, activation='softmax', dtype='float32')
+        
+        memory = self.encoder(encoder_inputs)
+        decoder_outputs = self.output_layer(self.decoder(decoder_inputs, memory, encoder_inputs))
+        
+        model = Model([encoder_inputs, decoder_inputs], decoder_outputs)
+        return self._compile(model)
+    
+    def _compile(self, model):
         model.compile(
             optimizer=Adam(learning_rate=0.001),
-            loss='sparse_categorical_crossentropy',
-            metrics=['accuracy']
+            loss=masked_loss,
+            metrics=[masked_accuracy],
+            jit_compile=self.jit_compile
         )
-        
         return model
     
-    def train(self, train_data, validation_data, batch_size=64, epochs=50):
+    def config(self):
+        """
+        Constructor arguments needed to rebuild this model for loading
+        """
+        return {
+            'embedding_dim': self.embedding_dim,
+            'lstm_units': self.lstm_units,
+            'architecture': self.architecture,
+            'num_layers': self.num_layers,
+            'num_heads': self.num_heads,
+            'ff_dim': self.ff_dim,
+            'dropout': self.dropout
+        }
+    
+    @staticmethod
+    def _to_model_inputs(questions, answers):
+        """
+        Map a (questions, answers) batch to the model's (inputs, targets)
+        for teacher forcing. Answers start with <START> and end with <END>,
+        so the decoder input is the answer without its last token and the
+        target is the answer shifted left by one.
+        """
+        return (questions, answers[:, :-1]), answers[:, 1:]
+    
+    def train(self, train_data, validation_data, batch_size=64, epochs=50,
+              checkpoint_path='models/seq2seq_model.h5', callbacks=None, telemetry=None,
+              dynamic_padding=True):
         """
-        Train the model
+        Train the model on [questions, answers] with teacher forcing.
+        `telemetry` is an optional utils.telemetry.TrainingTelemetry.
+        With `dynamic_padding`, padded arrays are batched by length and each
+        batch is trimmed to its longest question and answer.
         """
+        if dynamic_padding and not isinstance(train_data, tf.data.Dataset):
+            train_data = bucketed_array_dataset(*train_data, batch_size=batch_size, pad_id=PAD_ID)
+            validation_data = bucketed_array_dataset(
+                *validation_data, batch_size=batch_size, shuffle=False, pad_id=PAD_ID
+            )
+        
         # Callbacks
         checkpoint = ModelCheckpoint(
-            'models/seq2seq_model.h5',
+            checkpoint_path,
             monitor='val_loss',
             save_best_only=True,
             mode='min'
@@ -54,13 +163,34 @@ class Seq2SeqModel:
             restore_best_weights=True
         )
         
+        callbacks = [checkpoint, early_stopping] + list(callbacks or [])
+        if telemetry is not None:
+            callbacks.append(telemetry)
+        
+        # Streaming pipelines are already batched
+        if isinstance(train_data, tf.data.Dataset):
+            train_data = train_data.map(self._to_model_inputs)
+            if telemetry is not None:
+                train_data = telemetry.instrument(train_data)
+            history = self.model.fit(
+                train_data,
+                validation_data=validation_data.map(self._to_model_inputs) if validation_data is not None else None,
+                epochs=epochs,
+                callbacks=callbacks
+            )
+            return history
+        
         # Train
+        inputs, targets = self._to_model_inputs(*train_data)
+        if telemetry is not None:
+            telemetry.set_array_input(batch_size, len(targets))
         history = self.model.fit(
-            train_data,
-            validation_data=validation_data,
+            inputs,
+            targets,
+            validation_data=self._to_model_inputs(*validation_data),
             batch_size=batch_size,
             epochs=epochs,
-            callbacks=[checkpoint, early_stopping]
+            callbacks=callbacks
         )
         
         return history
@@ -81,35 +211,87 @@ class Seq2SeqModel:
         """
         Generate prediction for a single input sequence
         """
-        # Encode input
-        encoder_model = Model(
-            self.model.input[0],
-            self.model.layers[4].output
-        )
-        encoder_outputs = encoder_model.predict(input_sequence)
-        
-        # Decoder setup
-        decoder_input = tf.zeros((1, 1))
-        decoder_states = encoder_outputs
+        return self._decode(input_sequence, max_length)[0]
+    
+    def predict_batch(self, sequences, max_length=50, batch_size=64):
+        """
+        Generate predictions for a list of unpadded input sequences. Inputs
+        are sorted by length and each batch is padded only to its longest
+        sequence; the padding is masked in the encoder. Returns one token
+        list per input, in input order.
+        """
+        order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+        outputs = [None] * len(sequences)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch = np.full((len(indices), max(len(sequences[i]) for i in indices)), PAD_ID, dtype=np.int32)
+            for row, i in enumerate(indices):
+                batch[row, :len(sequences[i])] = sequences[i]
+            for i, output in zip(indices, self._decode(batch, max_length)):
+                outputs[i] = output
+        return outputs
+    
+    def _decode(self, inputs, max_length):
+        """
+        Greedy decoding of a padded batch until every row has produced
+        <END> or `max_length` tokens
+        """
+        inputs = tf.convert_to_tensor(inputs)
+        if self.architecture == 'transformer':
+            step, state = self._transformer_decoder(inputs)
+        else:
+            step, state = self._lstm_decoder(inputs)
         
-        # Generate sequence
-        output_sequence = []
+        batch = inputs.shape[0]
+        decoder_input = tf.fill((batch, 1), START_ID)
+        output_sequences = [[] for _ in range(batch)]
+        finished = np.zeros(batch, dtype=bool)
         for _ in range(max_length):
-            decoder_output, state_h, state_c = self.model.layers[5](
-                self.model.layers[3](decoder_input),
-                initial_state=decoder_states
-            )
-            decoder_states = [state_h, state_c]
-            
-            # Get predicted token
-            output_token = self.model.layers[6](decoder_output)
-            predicted_token = tf.argmax(output_token[0, -1, :])
+            predicted_tokens, state = step(decoder_input, state)
+            predicted_tokens = predicted_tokens.numpy()
             
-            # Break if end token is predicted
-            if predicted_token == 2:  # Assuming 2 is the index of <END> token
+            # Rows stop at their end token; the rest keep decoding
+            finished |= predicted_tokens == END_ID
+            for row in np.flatnonzero(~finished):
+                output_sequences[row].append(int(predicted_tokens[row]))
+            if finished.all():
                 break
-                
-            output_sequence.append(predicted_token.numpy())
-            decoder_input = tf.expand_dims(predicted_token, 0)
+            decoder_input = tf.constant(predicted_tokens.reshape(-1, 1).astype(np.int32))
         
-        return output_sequence 
\ No newline at end of file
+        return output_sequences
+    
+    def _lstm_decoder(self, inputs):
+        """
+        Return the LSTM decoding step and the encoder states of `inputs`
+        """
+        if not hasattr(self, '_lstm_step'):
+            self._encoder_model = Model(
+                self.model.input[0],
+                self.model.layers[4].output[1:]
+            )
+            embedding, decoder_lstm, decoder_dense = self.model.layers[3], self.model.layers[5], self.model.layers[6]
+            
+            def step(decoder_input, decoder_states):
+                decoder_output, state_h, state_c = decoder_lstm(
+                    embedding(decoder_input),
+                    initial_state=decoder_states
+                )
+                return tf.argmax(decoder_dense(decoder_output)[:, -1, :], axis=-1), [state_h, state_c]
+            
+            self._lstm_step = tf.function(step, reduce_retracing=True)
+        return self._lstm_step, self._encoder_model(inputs)
+    
+    def _transformer_decoder(self, inputs):
+        """
+        Return the transformer decoding step and an empty key/value cache
+        for `inputs`. Each step embeds only the newest token and attends
+        from it to the cached positions.
+        """
+        if not hasattr(self, '_transformer_step'):
+            def step(decoder_input, cache):
+                decoder_output, cache = self.decoder.step(decoder_input, cache)
+                return tf.argmax(self.output_layer(decoder_output)[:, -1, :], axis=-1), cache
+            
+            # One graph for every step; only the cache length changes
+            self._transformer_step = tf.function(step, reduce_retracing=True)
+        return self._transformer_step, self.decoder.start(self.encoder(inputs), inputs)
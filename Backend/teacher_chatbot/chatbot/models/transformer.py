@@ -0,0 +1,217 @@
+import math
+import tensorflow as tf
+from tensorflow.keras.layers import Layer, Dense, Dropout, Embedding, LayerNormalization
+
+PAD_ID = 0
+
+
+def positional_encoding(start, length, depth):
+    """
+    Sinusoidal position encodings for positions start .. start + length - 1
+    """
+    positions = tf.cast(tf.range(start, start + length), tf.float32)[:, tf.newaxis]
+    rates = tf.exp(tf.range(0, depth, 2, dtype=tf.float32) * (-math.log(10000.0) / depth))
+    angles = positions * rates[tf.newaxis, :]
+    encoding = tf.stack([tf.sin(angles), tf.cos(angles)], axis=-1)
+    return tf.reshape(encoding, (length, depth))
+
+
+class MultiHeadAttention(Layer):
+    """
+    Scaled dot-product attention over `num_heads` heads. Keys and values can
+    be projected once with `project` and reused across decoding steps.
+    """
+    def __init__(self, d_model, num_heads, dropout=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.d_model = d_model
+        self.num_heads = num_heads
+        self.depth = d_model // num_heads
+        self.query = Dense(d_model)
+        self.key = Dense(d_model)
+        self.value = Dense(d_model)
+        self.output_dense = Dense(d_model)
+        self.dropout = Dropout(dropout)
+
+    def _split_heads(self, x):
+        # (batch, length, d_model) -> (batch, heads, length, depth)
+        batch = tf.shape(x)[0]
+        x = tf.reshape(x, (batch, -1, self.num_heads, self.depth))
+        return tf.transpose(x, (0, 2, 1, 3))
+
+    def project(self, x):
+        """
+        Return the (keys, values) of `x`, split into heads
+        """
+        return self._split_heads(self.key(x)), self._split_heads(self.value(x))
+
+    def attend(self, x, keys, values, mask=None, training=None):
+        """
+        Attend from `x` to projected keys and values. `mask` broadcasts to
+        (batch, heads, query length, key length) and is True where allowed.
+        """
+        queries = self._split_heads(self.query(x))
+        scores = tf.matmul(queries, keys, transpose_b=True) / math.sqrt(self.depth)
+        # Softmax in float32 so masking and mixed precision stay stable
+        scores = tf.cast(scores, tf.float32)
+        if mask is not None:
+            scores += (1.0 - tf.cast(mask, tf.float32)) * -1e9
+        weights = tf.cast(tf.nn.softmax(scores, axis=-1), queries.dtype)
+        weights = self.dropout(weights, training=training)
+
+        output = tf.transpose(tf.matmul(weights, values), (0, 2, 1, 3))
+        output = tf.reshape(output, (tf.shape(output)[0], -1, self.d_model))
+        return self.output_dense(output)
+
+    def call(self, x, context, mask=None, training=None):
+        keys, values = self.project(context)
+        return self.attend(x, keys, values, mask=mask, training=training)
+
+
+class FeedForward(Layer):
+    def __init__(self, d_model, ff_dim, dropout=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.hidden = Dense(ff_dim, activation='relu')
+        self.output_dense = Dense(d_model)
+        self.dropout = Dropout(dropout)
+
+    def call(self, x, training=None):
+        return self.dropout(self.output_dense(self.hidden(x)), training=training)
+
+
+class TokenEmbedding(Layer):
+    """
+    Token embeddings scaled by sqrt(d_model) plus sinusoidal positions
+    """
+    def __init__(self, vocab_size, d_model, **kwargs):
+        super().__init__(**kwargs)
+        self.d_model = d_model
+        self.embedding = Embedding(vocab_size, d_model)
+
+    def call(self, ids, start=0):
+        x = self.embedding(ids) * math.sqrt(self.d_model)
+        return x + tf.cast(positional_encoding(start, tf.shape(ids)[1], self.d_model), x.dtype)
+
+
+class EncoderLayer(Layer):
+    def __init__(self, d_model, num_heads, ff_dim, dropout=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.attention = MultiHeadAttention(d_model, num_heads, dropout)
+        self.feed_forward = FeedForward(d_model, ff_dim, dropout)
+        self.attention_norm = LayerNormalization(epsilon=1e-6)
+        self.feed_forward_norm = LayerNormalization(epsilon=1e-6)
+        self.dropout = Dropout(dropout)
+
+    def call(self, x, mask, training=None):
+        h = self.attention_norm(x)
+        x += self.dropout(self.attention(h, h, mask=mask, training=training), training=training)
+        return x + self.feed_forward(self.feed_forward_norm(x), training=training)
+
+
+class DecoderLayer(Layer):
+    def __init__(self, d_model, num_heads, ff_dim, dropout=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.self_attention = MultiHeadAttention(d_model, num_heads, dropout)
+        self.cross_attention = MultiHeadAttention(d_model, num_heads, dropout)
+        self.feed_forward = FeedForward(d_model, ff_dim, dropout)
+        self.self_attention_norm = LayerNormalization(epsilon=1e-6)
+        self.cross_attention_norm = LayerNormalization(epsilon=1e-6)
+        self.feed_forward_norm = LayerNormalization(epsilon=1e-6)
+        self.dropout = Dropout(dropout)
+
+    def call(self, x, memory, causal_mask, memory_mask, training=None):
+        h = self.self_attention_norm(x)
+        x += self.dropout(self.self_attention(h, h, mask=causal_mask, training=training), training=training)
+        h = self.cross_attention_norm(x)
+        x += self.dropout(self.cross_attention(h, memory, mask=memory_mask, training=training), training=training)
+        return x + self.feed_forward(self.feed_forward_norm(x), training=training)
+
+    def step(self, x, cache, memory_keys, memory_values, memory_mask):
+        """
+        Decode the newest position only. Its key and value are appended to
+        `cache` (keys, values), so earlier positions are never recomputed.
+        """
+        h = self.self_attention_norm(x)
+        keys, values = self.self_attention.project(h)
+        keys = tf.concat([cache[0], keys], axis=2)
+        values = tf.concat([cache[1], values], axis=2)
+        x += self.self_attention.attend(h, keys, values)
+        h = self.cross_attention_norm(x)
+        x += self.cross_attention.attend(h, memory_keys, memory_values, mask=memory_mask)
+        return x + self.feed_forward(self.feed_forward_norm(x)), (keys, values)
+
+
+def _padding_mask(ids):
+    # (batch, 1, 1, length): True for real tokens
+    return tf.not_equal(ids, PAD_ID)[:, tf.newaxis, tf.newaxis, :]
+
+
+class TransformerEncoder(Layer):
+    def __init__(self, vocab_size, d_model, num_layers, num_heads, ff_dim, dropout=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.embedding = TokenEmbedding(vocab_size, d_model)
+        self.blocks = [EncoderLayer(d_model, num_heads, ff_dim, dropout) for _ in range(num_layers)]
+        self.norm = LayerNormalization(epsilon=1e-6)
+        self.dropout = Dropout(dropout)
+
+    def call(self, ids, training=None):
+        mask = _padding_mask(ids)
+        x = self.dropout(self.embedding(ids), training=training)
+        for layer in self.blocks:
+            x = layer(x, mask, training=training)
+        return self.norm(x)
+
+
+class TransformerDecoder(Layer):
+    """
+    Causal decoder stack. `call` runs teacher-forced training over whole
+    sequences; `start` and `step` decode one token at a time with a cache
+    of self-attention keys/values and precomputed cross-attention
+    keys/values of the encoder output.
+    """
+    def __init__(self, vocab_size, d_model, num_layers, num_heads, ff_dim, dropout=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.embedding = TokenEmbedding(vocab_size, d_model)
+        self.blocks = [DecoderLayer(d_model, num_heads, ff_dim, dropout) for _ in range(num_layers)]
+        self.norm = LayerNormalization(epsilon=1e-6)
+        self.dropout = Dropout(dropout)
+
+    def call(self, ids, memory, memory_ids, training=None):
+        length = tf.shape(ids)[1]
+        causal_mask = tf.linalg.band_part(tf.ones((length, length), dtype=tf.bool), -1, 0)
+        memory_mask = _padding_mask(memory_ids)
+        x = self.dropout(self.embedding(ids), training=training)
+        for layer in self.blocks:
+            x = layer(x, memory, causal_mask, memory_mask, training=training)
+        return self.norm(x)
+
+    def start(self, memory, memory_ids):
+        """
+        Return an empty decoding cache for an encoded input. The cache only
+        holds tensors, so `step` can run as a tf.function without retracing
+        as it grows.
+        """
+        batch = tf.shape(memory)[0]
+        empty = []
+        for layer in self.blocks:
+            attention = layer.self_attention
+            shape = (batch, attention.num_heads, 0, attention.depth)
+            empty.append((tf.zeros(shape, memory.dtype), tf.zeros(shape, memory.dtype)))
+        return {
+            'position': tf.constant(0),
+            'memory_mask': _padding_mask(memory_ids),
+            'memory': [layer.cross_attention.project(memory) for layer in self.blocks],
+            'self': empty
+        }
+
+    def step(self, ids, cache):
+        """
+        Decode the next position from its token ids (batch, 1) and return
+        its hidden state with the updated cache
+        """
+        x = self.embedding(ids, start=cache['position'])
+        self_cache = []
+        for layer, past, (memory_keys, memory_values) in zip(self.blocks, cache['self'], cache['memory']):
+            x, present = layer.step(x, past, memory_keys, memory_values, cache['memory_mask'])
+            self_cache.append(present)
+        cache = dict(cache, position=cache['position'] + 1, self=self_cache)
+        return self.norm(x), cache
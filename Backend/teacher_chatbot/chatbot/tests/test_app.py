@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import pytest
+from utils.training_jobs import TrainingJobManager
+
+CHATBOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_app_import_does_not_load_tensorflow():
+    # In a fresh interpreter, as other tests may already have imported it
+    code = "import sys, app; print(sorted(m for m in ('tensorflow', 'keras') if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=CHATBOT_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[]'
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import app
+    from test_training_jobs import crash
+    manager = TrainingJobManager(str(tmp_path / 'qa_data.jsonl'), jobs_dir=str(tmp_path / 'jobs'),
+                                 pointer_path=str(tmp_path / 'serving.json'), target=crash)
+    monkeypatch.setattr(app, 'training_jobs', manager)
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'epochs': 'ten'}, 'epochs must be a positive integer'),
+    ({'epochs': 0}, 'epochs must be a positive integer'),
+    ({'batch_size': 2.5}, 'batch_size must be a positive integer'),
+    ({'batch_size': True}, 'batch_size must be a positive integer'),
+    ({'architecture': 'gru'}, "Unknown architecture 'gru'"),
+    ({'runtime': 'fast'}, 'runtime must be an object'),
+    ({'runtime': {'threads': 4}}, 'Unknown runtime options: threads'),
+    ({'runtime': {'strategy': 'multi_worker'}}, 'Unknown distribution strategy'),
+    ({'runtime': {'mixed_precision': 'int8'}}, 'Unknown mixed precision option'),
+    ({'runtime': {'intra_op_threads': -1}}, 'intra_op_threads must be a positive integer'),
+    ({'runtime': {'jit_compile': 'yes'}}, 'jit_compile must be true or false'),
+    ({'subword_vocab_size': 'big'}, 'subword_vocab_size must be a positive integer')
+])
+def test_train_rejects_invalid_options(client, body, error):
+    response = client.post('/train', json=body)
+    assert response.status_code == 400
+    assert error in response.get_json()['error']
+    assert client.get('/train').get_json() == {'jobs': []}
+
+
+def test_train_accepts_valid_options(client):
+    response = client.post('/train', json={
+        'epochs': '3',
+        'batch_size': 16,
+        'architecture': 'transformer',
+        'runtime': {'intra_op_threads': 2, 'mixed_precision': 'bfloat16', 'jit_compile': True, 'strategy': None}
+    })
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert response.get_json()['epochs'] == 3
+    assert client.get(f'/train/{job_id}').status_code == 200
+    assert client.get('/train/unknown').status_code == 404
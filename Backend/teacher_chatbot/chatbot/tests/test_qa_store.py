@@ -0,0 +1,118 @@
+import json
+import os
+import pytest
+from utils.qa_store import INDEX_DTYPE, QAStore, question_hash
+
+PAIRS = [
+    ("What is gravity?", "A force."),
+    ("Who wrote Hamlet?", "Shakespeare."),
+    ("What is 2+2?", "4."),
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'qa_data.jsonl')
+
+
+def records(pairs):
+    return [{'question': question, 'answer': answer} for question, answer in pairs]
+
+
+def test_add_and_read_by_id(path):
+    store = QAStore(path)
+    assert store.extend(PAIRS) == [0, 1, 2]
+    assert store.add("Why is the sky blue?", "Scattering.") == 3
+
+    reopened = QAStore(path)
+    assert len(reopened) == 4
+    assert reopened[1] == records(PAIRS)[1]
+    assert reopened[3] == {'question': "Why is the sky blue?", 'answer': "Scattering."}
+    with pytest.raises(IndexError):
+        reopened[4]
+    with pytest.raises(IndexError):
+        reopened[-1]
+
+
+def test_duplicates_ignore_case_punctuation_and_spacing(path):
+    store = QAStore(path)
+    store.extend(PAIRS)
+    assert question_hash("what   is GRAVITY") == question_hash("What is gravity?")
+    assert "WHAT IS GRAVITY" in store
+    assert "What is mass?" not in store
+
+    assert store.add("what is gravity!!", "Another answer.") is None
+    assert store.extend([("Who  wrote hamlet", "x"), ("What is mass?", "y"), ("what is MASS", "z")]) == [3]
+    assert len(QAStore(path)) == 4
+    assert "what is mass" in QAStore(path)
+
+
+def test_sees_pairs_added_by_another_store(path):
+    reader = QAStore(path)
+    writer = QAStore(path)
+    writer.extend(PAIRS[:2])
+    assert len(reader) == 2
+    writer.add(*PAIRS[2])
+    assert PAIRS[2][0] in reader
+    assert reader.add(*PAIRS[2]) is None
+    assert reader[2] == records(PAIRS)[2]
+
+
+def test_iter_from(path):
+    store = QAStore(path)
+    assert list(store) == []
+    store.extend(PAIRS)
+    assert list(store) == records(PAIRS)
+    assert list(store.iter_from(1)) == records(PAIRS[1:])
+    assert list(store.iter_from(3)) == []
+
+    # Resume after pairs added since the previous pass
+    seen = len(store)
+    QAStore(path).add("Why is the sky blue?", "Scattering.")
+    assert list(store.iter_from(seen)) == [{'question': "Why is the sky blue?", 'answer': "Scattering."}]
+
+
+def test_recover_drops_torn_last_line(path):
+    QAStore(path).extend(PAIRS[:2])
+    with open(path, 'ab') as f:
+        f.write(b'{"question": "Half writ')
+
+    store = QAStore(path)
+    assert store.add(*PAIRS[2]) == 2
+    assert list(QAStore(path)) == records(PAIRS)
+    with open(path, 'rb') as f:
+        assert f.read().count(b'\n') == 3
+
+
+def test_recover_indexes_lines_missing_from_index(path):
+    QAStore(path).extend(PAIRS[:1])
+    # An append that wrote its data but crashed before the index write
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records(PAIRS[1:]):
+            f.write(json.dumps(record) + '\n')
+
+    store = QAStore(path)
+    assert len(store) == 1
+    assert store.add("Who wrote Hamlet", "Duplicate.") is None
+    assert len(store) == 3
+    assert list(QAStore(path)) == records(PAIRS)
+
+
+def test_recover_drops_torn_index_entry(path):
+    QAStore(path).extend(PAIRS[:2])
+    with open(f'{path}.idx', 'ab') as f:
+        f.write(b'\x00' * (INDEX_DTYPE.itemsize // 2))
+
+    store = QAStore(path)
+    assert len(store) == 2
+    assert store.add(*PAIRS[2]) == 2
+    assert os.path.getsize(f'{path}.idx') == 3 * INDEX_DTYPE.itemsize
+    assert list(QAStore(path)) == records(PAIRS)
+
+
+def test_from_json(path, tmp_path):
+    json_path = tmp_path / 'qa_data.json'
+    json_path.write_text(json.dumps(records(PAIRS + PAIRS[:1])), encoding='utf-8')
+    store, added = QAStore.from_json(str(json_path), path, batch_size=2)
+    assert added == 3
+    assert list(store) == records(PAIRS)
@@ -0,0 +1,82 @@
+import re
+import pytest
+from utils.retrieval import QARetriever
+
+PAIRS = [
+    ("What is photosynthesis?", "Plants turning light into food."),
+    ("Who wrote Hamlet?", "Shakespeare."),
+    ("What is the speed of light?", "About 300,000 km/s."),
+    ("What is gravity?", "A force between masses."),
+]
+
+
+class WordPreprocessor:
+    def preprocess_text(self, text):
+        return ' '.join(re.findall(r'[a-z]+', text.lower()))
+
+
+@pytest.fixture
+def retriever():
+    retriever = QARetriever(WordPreprocessor())
+    retriever.add_many(PAIRS)
+    return retriever
+
+
+def test_exact_question_matches(retriever):
+    answer, similarity = retriever.match("who wrote HAMLET")
+    assert answer == "Shakespeare."
+    assert similarity == pytest.approx(1.0)
+
+
+def test_threshold(retriever):
+    # Shares "speed" and "light" but adds a rare word
+    question = "What is the speed of sound and light?"
+    _, similarity = retriever.match(question, threshold=0.0)
+    assert 0.0 < similarity < 1.0
+
+    answer, below = retriever.match(question, threshold=similarity + 1e-6)
+    assert answer is None and below == pytest.approx(similarity)
+    answer, at = retriever.match(question, threshold=similarity)
+    assert answer == "About 300,000 km/s." and at == pytest.approx(similarity)
+
+
+def test_unrelated_question_misses(retriever):
+    assert retriever.match("Why do cats purr?") == (None, 0.0)
+    assert QARetriever(WordPreprocessor()).match("What is gravity?") == (None, 0.0)
+
+
+def test_search_ranks_best_first(retriever):
+    results = retriever.search("what is light", top_k=5)
+    assert results == sorted(results, reverse=True)
+    assert results[0][1] == 2
+    assert len(retriever.search("what is", top_k=2)) == 2
+
+
+def test_add_many_is_incremental(retriever):
+    assert retriever.match("Who painted the Mona Lisa?")[0] is None
+    before = retriever.match("What is gravity?")
+
+    retriever.add_many([
+        ("Who painted the Mona Lisa?", "Leonardo da Vinci."),
+        ("What is osmosis?", "Diffusion of water through a membrane."),
+    ])
+    assert len(retriever) == 6
+    assert retriever.match("who painted the mona lisa") == ("Leonardo da Vinci.", pytest.approx(1.0))
+    assert retriever.match("What is osmosis")[0] == "Diffusion of water through a membrane."
+    # Existing pairs are still found after the statistics change
+    assert retriever.match("What is gravity?") == (before[0], pytest.approx(1.0))
+
+    # The same result as indexing everything at once
+    rebuilt = QARetriever(WordPreprocessor())
+    rebuilt.add_many(PAIRS + [("Who painted the Mona Lisa?", "x"), ("What is osmosis?", "y")])
+    question = "What is the speed of sound and light?"
+    assert retriever.search(question) == pytest.approx(rebuilt.search(question))
+
+
+def test_embed_fn_uses_dense_similarity():
+    vectors = {"cat": [1.0, 0.0], "kitten": [0.9, 0.1], "car": [0.0, 1.0]}
+    retriever = QARetriever(WordPreprocessor(), embed_fn=lambda texts: [vectors[t] for t in texts])
+    retriever.add_many([("cat", "meow"), ("car", "vroom")])
+    answer, similarity = retriever.match("kitten", threshold=0.9)
+    assert answer == "meow" and similarity > 0.99
+    assert retriever.match("kitten", threshold=0.999)[0] is None
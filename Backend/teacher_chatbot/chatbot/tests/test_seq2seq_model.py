@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+from models.seq2seq_model import END_ID, PAD_ID, START_ID, Seq2SeqModel, masked_accuracy, masked_loss
+
+VOCAB_SIZE = 12
+# Padded questions of different lengths
+QUESTIONS = np.array([[5, 6, 7, 8], [9, 4, PAD_ID, PAD_ID], [3, PAD_ID, PAD_ID, PAD_ID]], dtype=np.int32)
+
+
+@pytest.fixture(scope='module')
+def transformer():
+    tf.random.set_seed(0)
+    model = Seq2SeqModel(VOCAB_SIZE, embedding_dim=16, architecture='transformer',
+                         num_layers=2, num_heads=2, ff_dim=32, dropout=0.0)
+    suppress_end(model.output_layer)
+    return model
+
+
+@pytest.fixture(scope='module')
+def lstm():
+    tf.random.set_seed(1)
+    model = Seq2SeqModel(VOCAB_SIZE, embedding_dim=16, lstm_units=32)
+    suppress_end(model.model.layers[-1])
+    return model
+
+
+def suppress_end(dense):
+    # An untrained model tends to predict <END> first; decode full lengths instead
+    weights, bias = dense.get_weights()
+    bias[END_ID] = -1e9
+    dense.set_weights([weights, bias])
+
+
+def test_to_model_inputs_shifts_answers():
+    questions = np.array([[5, 6, 0], [7, 0, 0]])
+    answers = np.array([[START_ID, 8, 9, END_ID, PAD_ID], [START_ID, 10, END_ID, PAD_ID, PAD_ID]])
+    (encoder_input, decoder_input), targets = Seq2SeqModel._to_model_inputs(questions, answers)
+    np.testing.assert_array_equal(encoder_input, questions)
+    np.testing.assert_array_equal(decoder_input, [[START_ID, 8, 9, END_ID], [START_ID, 10, END_ID, PAD_ID]])
+    np.testing.assert_array_equal(targets, [[8, 9, END_ID, PAD_ID], [10, END_ID, PAD_ID, PAD_ID]])
+
+
+def test_masked_loss_and_accuracy_ignore_padding():
+    rng = np.random.default_rng(0)
+    y_true = np.array([[4, 5, END_ID, PAD_ID, PAD_ID], [6, END_ID, PAD_ID, PAD_ID, PAD_ID]])
+    y_pred = rng.dirichlet(np.ones(VOCAB_SIZE), size=y_true.shape).astype(np.float32)
+
+    real = y_true != PAD_ID
+    expected_loss = -np.log(np.take_along_axis(y_pred, y_true[..., None], axis=-1)[..., 0])[real].mean()
+    assert float(masked_loss(y_true, y_pred)) == pytest.approx(expected_loss, rel=1e-5)
+
+    # Predictions at padded positions do not matter
+    changed = y_pred.copy()
+    changed[~real] = rng.dirichlet(np.ones(VOCAB_SIZE), size=(~real).sum())
+    assert float(masked_loss(y_true, changed)) == pytest.approx(expected_loss, rel=1e-5)
+
+    # Right at every real token, wrong at every padded one
+    one_hot = np.eye(VOCAB_SIZE, dtype=np.float32)[np.where(real, y_true, PAD_ID + 3)]
+    assert float(masked_accuracy(y_true, one_hot)) == 1.0
+    assert float(masked_accuracy(np.zeros_like(y_true), one_hot)) == 0.0
+    assert float(masked_loss(np.zeros_like(y_true), y_pred)) == 0.0
+
+
+def test_unknown_architecture():
+    with pytest.raises(ValueError):
+        Seq2SeqModel(VOCAB_SIZE, architecture='gru')
+
+
+def test_cached_decoder_steps_match_full_decoder(transformer):
+    memory = transformer.encoder(QUESTIONS)
+    answers = tf.constant([[START_ID, 4, 5, 6, 7], [START_ID, 8, 8, 3, END_ID], [START_ID, 10, 11, 9, 4]])
+    full = transformer.output_layer(transformer.decoder(answers, memory, QUESTIONS))
+
+    cache = transformer.decoder.start(memory, QUESTIONS)
+    steps = []
+    for position in range(answers.shape[1]):
+        hidden, cache = transformer.decoder.step(answers[:, position:position + 1], cache)
+        steps.append(transformer.output_layer(hidden))
+    np.testing.assert_allclose(tf.concat(steps, axis=1).numpy(), full.numpy(), atol=1e-5)
+
+
+def test_cached_greedy_decode_matches_recompute(transformer):
+    max_length = 8
+    expected = []
+    for question in QUESTIONS:
+        # Recompute the whole decoder for every new token
+        question = question[question != PAD_ID][np.newaxis]
+        tokens = [START_ID]
+        for _ in range(max_length):
+            probabilities = transformer.model([question, np.array([tokens], dtype=np.int32)])
+            tokens.append(int(np.argmax(probabilities[0, -1])))
+        expected.append(tokens[1:])
+
+    predicted = [transformer.predict(row[row != PAD_ID][np.newaxis], max_length) for row in QUESTIONS]
+    assert predicted == expected
+    assert len({tuple(tokens) for tokens in predicted}) > 1
+
+
+@pytest.mark.parametrize('architecture', ['lstm', 'transformer'])
+@pytest.mark.parametrize('batch_size', [2, 64])
+def test_padded_batch_matches_single_predictions(request, architecture, batch_size):
+    model = request.getfixturevalue(architecture)
+    sequences = [[9, 4], [5, 6, 7, 8, 10], [3], [11, 3, 7], [4, 4, 4, 4]]
+    expected = [model.predict(np.array([sequence], dtype=np.int32), max_length=6) for sequence in sequences]
+    assert model.predict_batch(sequences, max_length=6, batch_size=batch_size) == expected
+    assert len({tuple(tokens) for tokens in expected}) > 1
@@ -0,0 +1,83 @@
+import pytest
+from utils.preprocessor import SPECIAL_TOKENS
+from utils.subword_tokenizer import BPETokenizer
+
+CORPUS = [
+    "What is photosynthesis?",
+    "Photosynthesis converts light energy into chemical energy.",
+    "What is the speed of light? About 300,000 km/s.",
+    "Plants, algae and some bacteria use photosynthesis.",
+    "What is 2+2? It is 4.",
+] * 3
+
+
+@pytest.fixture
+def tokenizer():
+    return BPETokenizer(vocab_size=120, min_frequency=2).train(CORPUS)
+
+
+def test_vocabulary_size_is_bounded(tokenizer):
+    assert len(tokenizer.vocabulary) <= 120
+    assert tokenizer.merges
+    assert tokenizer.id_to_token[:len(SPECIAL_TOKENS)] == SPECIAL_TOKENS
+
+
+@pytest.mark.parametrize('text', CORPUS[:5] + ["Chemical plants, 2024?"])
+def test_decode_inverts_encode(tokenizer, text):
+    ids = tokenizer.encode(text)
+    assert tokenizer.vocabulary['<UNK>'] not in ids
+    assert tokenizer.decode(ids) == ' '.join(tokenizer.pretokenize(text))
+
+
+def test_unseen_words_are_split_into_known_subwords(tokenizer):
+    unk_id = tokenizer.vocabulary['<UNK>']
+    ids = tokenizer.encode("photosynthetic algae")
+    assert unk_id not in ids
+    assert len(ids) > 2
+    assert tokenizer.decode(ids) == "photosynthetic algae"
+
+
+def test_unknown_characters_become_unk(tokenizer):
+    unk_id = tokenizer.vocabulary['<UNK>']
+    ids = tokenizer.encode("light → énergie")
+    assert ids.count(unk_id) == 2
+    # <UNK> is a special token, so decoding skips it
+    assert tokenizer.decode(ids).split() == ["light", "nergie"]
+
+
+def test_text_to_sequence_pads_and_truncates(tokenizer):
+    start, end, pad = (tokenizer.vocabulary[t] for t in ('<START>', '<END>', '<PAD>'))
+    sequence = tokenizer.text_to_sequence("What is light?", max_length=20)
+    assert len(sequence) == 20 and sequence[0] == start and sequence[-1] == pad
+    assert sequence.index(end) == len(tokenizer.encode("What is light?")) + 1
+    assert tokenizer.text_to_sequence("What is light?", max_length=20, pad=False)[-1] == end
+    truncated = tokenizer.text_to_sequence(CORPUS[1], max_length=5)
+    assert len(truncated) == 5 and truncated[-1] == end
+
+
+def test_save_and_load_round_trip(tokenizer, tmp_path):
+    path = tmp_path / 'tokenizer.bpe'
+    tokenizer.save(str(path))
+    loaded = BPETokenizer.load(str(path))
+
+    assert loaded.merges == tokenizer.merges
+    assert loaded.alphabet == tokenizer.alphabet
+    assert loaded.vocabulary == tokenizer.vocabulary
+    for text in CORPUS[:5] + ["Photosynthetic light → énergie"]:
+        assert loaded.encode(text) == tokenizer.encode(text)
+    assert loaded.decode(tokenizer.encode(CORPUS[0])) == tokenizer.decode(tokenizer.encode(CORPUS[0]))
+
+
+def test_load_keeps_case_option(tmp_path):
+    cased = BPETokenizer(vocab_size=60, lowercase=False).train(["Light LIGHT light"] * 3)
+    cased.save(str(tmp_path / 'cased.bpe'))
+    loaded = BPETokenizer.load(str(tmp_path / 'cased.bpe'))
+    assert not loaded.lowercase
+    assert loaded.decode(loaded.encode("Light LIGHT")) == "Light LIGHT"
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'vocabulary.json'
+    path.write_text('{"<PAD>": 0}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        BPETokenizer.load(str(path))
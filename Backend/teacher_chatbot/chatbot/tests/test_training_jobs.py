@@ -0,0 +1,155 @@
+import os
+import time
+import pytest
+from utils.training_jobs import ARCHITECTURES, TrainingJobManager, _read_json, _write_json_atomic, validate_options
+
+
+# Stub targets. They run in the training process in place of
+# run_training_job, so they must be module-level functions.
+
+def _set_status(job_dir, **fields):
+    status_path = os.path.join(job_dir, 'status.json')
+    status = _read_json(status_path)
+    status.update(fields)
+    _write_json_atomic(status_path, status)
+
+
+def _wait_for(path, timeout=60):
+    deadline = time.time() + timeout
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.05)
+
+
+def train_until_released(job_dir, data_path, pointer_path, options):
+    _set_status(job_dir, status='running')
+    _wait_for(os.path.join(job_dir, 'release'))
+    _set_status(job_dir, status='succeeded', progress=1.0)
+
+
+def train_until_cancelled(job_dir, data_path, pointer_path, options):
+    _set_status(job_dir, status='running')
+    _wait_for(os.path.join(job_dir, 'cancel'))
+    _set_status(job_dir, status='cancelled')
+
+
+def prepare_forever(job_dir, data_path, pointer_path, options):
+    time.sleep(60)
+
+
+def crash(job_dir, data_path, pointer_path, options):
+    os._exit(1)
+
+
+def wait_for_status(manager, job_id, expected, timeout=60):
+    deadline = time.time() + timeout
+    status = manager.status(job_id)
+    while status['status'] != expected and time.time() < deadline:
+        time.sleep(0.1)
+        status = manager.status(job_id)
+    assert status['status'] == expected
+    return status
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    def make(target):
+        return TrainingJobManager(
+            str(tmp_path / 'qa_data.jsonl'),
+            jobs_dir=str(tmp_path / 'jobs'),
+            pointer_path=str(tmp_path / 'serving.json'),
+            target=target
+        )
+    return make
+
+
+def test_job_goes_from_queued_to_running_to_succeeded(make_manager):
+    manager = make_manager(train_until_released)
+    job_id = manager.submit(epochs=3)
+    assert manager.status(job_id)['status'] in ('queued', 'running')
+
+    wait_for_status(manager, job_id, 'running')
+    open(os.path.join(manager.jobs_dir, job_id, 'release'), 'w').close()
+    status = wait_for_status(manager, job_id, 'succeeded')
+    assert status['progress'] == 1.0
+    assert [job['job_id'] for job in manager.list_jobs()] == [job_id]
+
+
+def test_cancel_running_job(make_manager):
+    manager = make_manager(train_until_cancelled)
+    job_id = manager.submit()
+    wait_for_status(manager, job_id, 'running')
+
+    assert manager.cancel(job_id)['cancel_requested']
+    wait_for_status(manager, job_id, 'cancelled')
+
+
+def test_cancel_queued_job_terminates_it(make_manager):
+    manager = make_manager(prepare_forever)
+    job_id = manager.submit()
+
+    assert manager.cancel(job_id)['status'] == 'cancelled'
+    pid = manager._pid(job_id)
+    deadline = time.time() + 10
+    while os.path.exists(f'/proc/{pid}') and time.time() < deadline:
+        time.sleep(0.05)
+    # The status file is not touched by the terminated process
+    assert manager.status(job_id)['status'] == 'cancelled'
+
+
+def test_cancel_finished_job_is_a_no_op(make_manager):
+    manager = make_manager(crash)
+    job_id = manager.submit()
+    wait_for_status(manager, job_id, 'failed')
+
+    assert manager.cancel(job_id)['status'] == 'failed'
+    assert not os.path.exists(os.path.join(manager.jobs_dir, job_id, 'cancel'))
+
+
+def test_crashed_job_is_reported_as_failed(make_manager):
+    manager = make_manager(crash)
+    job_id = manager.submit()
+
+    status = wait_for_status(manager, job_id, 'failed')
+    assert 'train.log' in status['error']
+
+
+def test_other_manager_sees_and_cancels_job(make_manager):
+    manager = make_manager(train_until_cancelled)
+    job_id = manager.submit()
+    wait_for_status(manager, job_id, 'running')
+
+    # Another server worker has its own manager over the same jobs_dir
+    other = make_manager(train_until_cancelled)
+    assert other.status(job_id)['status'] == 'running'
+    other.cancel(job_id)
+    wait_for_status(manager, job_id, 'cancelled')
+
+
+def test_unknown_job(make_manager):
+    manager = make_manager(crash)
+    assert manager.status('missing') is None
+    assert manager.status('../jobs') is None
+    assert manager.cancel('missing') is None
+
+
+def test_validate_options_converts_integers():
+    options = validate_options('32', 5, {'inter_op_threads': '2', 'mixed_precision': 'auto'}, '8000', 'lstm')
+    assert options == {
+        'batch_size': 32,
+        'epochs': 5,
+        'runtime': {'inter_op_threads': 2, 'mixed_precision': 'auto'},
+        'subword_vocab_size': 8000,
+        'architecture': 'lstm'
+    }
+
+
+def test_invalid_options_create_no_job(make_manager):
+    manager = make_manager(crash)
+    with pytest.raises(ValueError):
+        manager.submit(epochs='many')
+    assert manager.list_jobs() == []
+
+
+def test_architectures_match_the_model():
+    from models.seq2seq_model import ARCHITECTURES as MODEL_ARCHITECTURES
+    assert ARCHITECTURES == MODEL_ARCHITECTURES
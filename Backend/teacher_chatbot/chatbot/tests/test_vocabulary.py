@@ -0,0 +1,70 @@
+import json
+import pytest
+from utils.preprocessor import SPECIAL_TOKENS
+from utils.vocabulary import Vocabulary, VocabularyBuilder, load_vocabulary, save_vocabulary
+
+# Prefix-sharing and non-ASCII words, in an order unrelated to their bytes
+WORDS = SPECIAL_TOKENS + ['abc', 'a', 'über', 'ab', 'é', 'e', 'ü', '日本', '日', 'zebra', 'Ab', 'naïve', 'naive']
+MISSING = ['', 'abcd', 'b', 'übe', '日本語', 'E', '<pad>', 'zebras']
+
+
+class LowercasePreprocessor:
+    def preprocess_text(self, text):
+        return text.lower()
+
+
+@pytest.fixture
+def vocabularies(tmp_path):
+    in_memory = Vocabulary(WORDS)
+    path = str(tmp_path / 'vocabulary.bin')
+    in_memory.save(path)
+    return in_memory, Vocabulary.load(path)
+
+
+def test_loaded_vocabulary_matches_in_memory(vocabularies):
+    in_memory, loaded = vocabularies
+    assert len(loaded) == len(in_memory) == len(WORDS)
+    assert list(loaded) == list(in_memory) == WORDS
+    for idx, word in enumerate(WORDS):
+        assert loaded.word(idx) == in_memory.word(idx) == word
+        assert loaded.get(word) == in_memory.get(word) == idx
+        assert loaded[word] == idx
+        assert word in loaded
+    assert loaded.to_dict() == in_memory.to_dict()
+
+
+@pytest.mark.parametrize('word', MISSING)
+def test_missing_words(vocabularies, word):
+    in_memory, loaded = vocabularies
+    assert word not in loaded and word not in in_memory
+    assert loaded.get(word) is None
+    assert loaded.get(word, -1) == in_memory.get(word, -1) == -1
+    with pytest.raises(KeyError):
+        loaded[word]
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'vocabulary.bin'
+    path.write_bytes(b'not a vocabulary file')
+    with pytest.raises(ValueError):
+        Vocabulary.load(str(path))
+
+
+def test_builder_orders_by_frequency():
+    builder = VocabularyBuilder(LowercasePreprocessor(), min_freq=2, shard_size=2)
+    vocabulary = builder.build(['b a a', 'c B', 'a c d', 'b'])
+    assert list(vocabulary) == SPECIAL_TOKENS + ['a', 'b', 'c']
+
+
+def test_save_vocabulary_json_and_dict(tmp_path):
+    vocabulary = {word: idx for idx, word in enumerate(WORDS)}
+
+    json_path = str(tmp_path / 'vocabulary.json')
+    save_vocabulary(Vocabulary(WORDS), json_path)
+    with open(json_path) as f:
+        assert json.load(f) == vocabulary
+    assert load_vocabulary(json_path) == vocabulary
+
+    binary_path = str(tmp_path / 'vocabulary.bin')
+    save_vocabulary(vocabulary, binary_path)
+    assert load_vocabulary(binary_path).to_dict() == vocabulary
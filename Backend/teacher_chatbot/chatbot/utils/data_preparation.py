@@ -1,50 +1,178 @@
+import glob
+import itertools
 import json
+import os
+import zlib
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from .preprocessor import TextPreprocessor
+from .subword_tokenizer import BPETokenizer
+from .sequence_encoder import SequenceEncoder, write_shards, load_shards
+from .vocabulary import save_vocabulary, load_vocabulary
+from .qa_store import QAStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent shard exports are not locked
+    fcntl = None
 
 class DataPreparation:
-    def __init__(self, data_path):
+    def __init__(self, data_path, subword_vocab_size=None):
+        """
+        With `subword_vocab_size` set, sequences use a BPE subword tokenizer
+        of that size instead of the word vocabulary
+        """
         self.data_path = data_path
+        # .jsonl datasets are append-only stores; .json files are read whole
+        self.store = QAStore(data_path) if data_path.endswith('.jsonl') else None
         self.preprocessor = TextPreprocessor()
+        self.subword_vocab_size = subword_vocab_size
+        self.tokenizer = BPETokenizer(subword_vocab_size) if subword_vocab_size else None
+    
+    def add_qa_pair(self, question, answer):
+        """
+        Append a Q&A pair to the dataset and return its id, or None if the
+        question is already stored
+        """
+        if self.store is not None:
+            return self.store.add(question, answer)
+        data = self.load_data() if os.path.exists(self.data_path) else []
+        data.append({'question': question, 'answer': answer})
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+        return len(data) - 1
+    
+    def _create_encoder(self, texts, max_words, min_freq, n_jobs=1):
+        """
+        Fit the word vocabulary or subword tokenizer on texts and return
+        (encoder, vocabulary), where encoder provides text_to_sequence
+        """
+        if self.tokenizer is not None:
+            self.tokenizer.train(texts)
+            return self.tokenizer, self.tokenizer.vocabulary
+        vocabulary = self.preprocessor.create_vocabulary(texts, max_words, min_freq, n_jobs)
+        return self.preprocessor, vocabulary
         
+    def iter_data(self):
+        """
+        Iterate over Q&A records without loading a store into memory
+        """
+        if self.store is not None:
+            return iter(self.store)
+        return iter(self.load_data())
+    
     def load_data(self):
         """
         Load Q&A data from JSON file
         """
+        if self.store is not None:
+            return list(self.store)
         with open(self.data_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         return data
     
-    def prepare_data(self, max_length=50):
+    def _source_manifest(self):
+        stat = os.stat(self.data_path)
+        return {
+            'source': os.path.abspath(self.data_path),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size
+        }
+    
+    def _read_manifest(self, directory):
+        try:
+            with open(os.path.join(directory, 'manifest.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_manifest(self, directory, manifest):
+        tmp_path = os.path.join(directory, f'manifest.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, 'manifest.json'))
+    
+    def _cache_manifest(self, max_length, max_words, min_freq):
+        return dict(
+            self._source_manifest(),
+            max_length=max_length,
+            max_words=max_words,
+            min_freq=min_freq,
+            subword_vocab_size=self.subword_vocab_size
+        )
+    
+    def _load_encoded(self, cache_dir, manifest):
         """
-        Prepare data for training
+        Reopen encoded shards if they were built from the current data with
+        the same options, otherwise return None
         """
-        # Load data
-        data = self.load_data()
+        if self._read_manifest(cache_dir) != manifest:
+            return None
+        
+        if self.tokenizer is not None:
+            self.tokenizer = BPETokenizer.load(os.path.join(cache_dir, 'tokenizer.bpe'))
+        vocabulary = load_vocabulary(os.path.join(cache_dir, 'vocabulary.bin'))
+        X = np.concatenate(load_shards(cache_dir, 'questions'))
+        y = np.concatenate(load_shards(cache_dir, 'answers'))
+        return X, y, vocabulary
+    
+    def _save_encoded(self, cache_dir, manifest, X, y, vocabulary):
+        write_shards(cache_dir, 'questions', X)
+        write_shards(cache_dir, 'answers', y)
+        save_vocabulary(vocabulary, os.path.join(cache_dir, 'vocabulary.bin'))
+        if self.tokenizer is not None:
+            self.tokenizer.save(os.path.join(cache_dir, 'tokenizer.bpe'))
         
-        # Extract questions and answers
-        questions = [item['question'] for item in data]
-        answers = [item['answer'] for item in data]
+        # The manifest goes last, so an interrupted write is never reused
+        self._write_manifest(cache_dir, manifest)
+    
+    def encode_data(self, max_length=50, max_words=10000, min_freq=1, cache_dir=None, chunk_size=100000):
+        """
+        Encode all questions and answers into int32 arrays. With `cache_dir`
+        the arrays are saved as .npy shards and reopened on later calls
+        instead of re-tokenizing, until the data or options change.
+        Records are streamed `chunk_size` at a time, so only the encoded
+        arrays are held in memory.
+        """
+        manifest = self._cache_manifest(max_length, max_words, min_freq)
+        if cache_dir:
+            cached = self._load_encoded(cache_dir, manifest)
+            if cached is not None:
+                return cached
         
         # Create vocabulary
-        all_texts = questions + answers
-        vocabulary = self.preprocessor.create_vocabulary(all_texts)
+        all_texts = (
+            text
+            for item in self.iter_data()
+            for text in (item['question'], item['answer'])
+        )
+        _, vocabulary = self._create_encoder(all_texts, max_words, min_freq)
         
         # Convert to sequences
-        question_sequences = [
-            self.preprocessor.text_to_sequence(q, vocabulary, max_length)
-            for q in questions
-        ]
-        answer_sequences = [
-            self.preprocessor.text_to_sequence(a, vocabulary, max_length)
-            for a in answers
-        ]
+        encoder = SequenceEncoder(vocabulary, self.preprocessor, self.tokenizer, max_length)
+        X_chunks, y_chunks = [], []
+        records = self.iter_data()
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            X_chunks.append(encoder.encode_batch([item['question'] for item in chunk]))
+            y_chunks.append(encoder.encode_batch([item['answer'] for item in chunk]))
+        if X_chunks:
+            X, y = np.concatenate(X_chunks), np.concatenate(y_chunks)
+        else:
+            X, y = encoder.encode_batch([]), encoder.encode_batch([])
         
-        # Convert to numpy arrays
-        X = np.array(question_sequences)
-        y = np.array(answer_sequences)
+        if cache_dir and len(X):
+            self._save_encoded(cache_dir, manifest, X, y, vocabulary)
+        return X, y, vocabulary
+    
+    def prepare_data(self, max_length=50, max_words=10000, min_freq=1, cache_dir=None):
+        """
+        Prepare data for training
+        """
+        X, y, vocabulary = self.encode_data(max_length, max_words, min_freq, cache_dir)
         
         # Split data
         X_train, X_val, y_train, y_val = train_test_split(
@@ -56,7 +184,93 @@ class DataPreparation:
             'X_val': X_val,
             'y_train': y_train,
             'y_val': y_val,
-            'vocabulary': vocabulary
+            'vocabulary': vocabulary,
+            'tokenizer': self.tokenizer
+        }
+    
+    def export_shards(self, output_dir, shard_size=100000, val_fraction=0.2):
+        """
+        Write the Q&A data as train/val JSONL shards for the streaming
+        pipeline, replacing any shards already in output_dir. A manifest of
+        the data's size and mtime is written last, see ensure_shards.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = dict(self._source_manifest(), shard_size=shard_size, val_fraction=val_fraction)
+        if os.path.exists(os.path.join(output_dir, 'manifest.json')):
+            os.remove(os.path.join(output_dir, 'manifest.json'))
+        for stale in glob.glob(os.path.join(output_dir, '*-*.jsonl')):
+            os.remove(stale)
+        writers = {}
+        counts = {'train': 0, 'val': 0}
+        
+        try:
+            for item in self.iter_data():
+                # Stable split so re-exporting never moves pairs between splits
+                bucket = zlib.crc32(item['question'].encode('utf-8')) % 1000
+                split = 'val' if bucket < val_fraction * 1000 else 'train'
+                
+                shard = counts[split] // shard_size
+                if (split, shard) not in writers:
+                    path = os.path.join(output_dir, f'{split}-{shard:05d}.jsonl')
+                    writers[(split, shard)] = open(path, 'w', encoding='utf-8')
+                record = {'question': item['question'], 'answer': item['answer']}
+                writers[(split, shard)].write(json.dumps(record) + '\n')
+                counts[split] += 1
+        finally:
+            for writer in writers.values():
+                writer.close()
+        
+        self._write_manifest(output_dir, manifest)
+        return counts
+    
+    def ensure_shards(self, output_dir, shard_size=100000, val_fraction=0.2):
+        """
+        Export shards unless output_dir already holds the ones of the
+        current data, e.g. after pairs were appended to the store. Shards
+        without a manifest were not exported from the data and are kept.
+        Returns the export counts, or None if the shards were kept.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, '.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            manifest = self._read_manifest(output_dir)
+            if manifest is None and glob.glob(os.path.join(output_dir, 'train-*.jsonl')):
+                return None
+            if manifest == dict(self._source_manifest(), shard_size=shard_size, val_fraction=val_fraction):
+                return None
+            return self.export_shards(output_dir, shard_size, val_fraction)
+    
+    def prepare_streaming_data(self, shard_dir, batch_size=64, vocabulary=None, max_length=None,
+                               max_words=10000, min_freq=1, n_jobs=1):
+        """
+        Prepare tf.data pipelines over JSONL shards for training
+        """
+        import tensorflow as tf
+        from .input_pipeline import QAInputPipeline, iter_jsonl_shards
+        
+        train_pattern = os.path.join(shard_dir, 'train-*.jsonl')
+        val_pattern = os.path.join(shard_dir, 'val-*.jsonl')
+        
+        # Create vocabulary
+        encoder = self.tokenizer or self.preprocessor
+        if vocabulary is None:
+            texts = (
+                text
+                for item in iter_jsonl_shards(train_pattern)
+                for text in (item['question'], item['answer'])
+            )
+            encoder, vocabulary = self._create_encoder(texts, max_words, min_freq, n_jobs)
+        
+        pipeline = QAInputPipeline(vocabulary, encoder, max_length=max_length)
+        val = None
+        if tf.io.gfile.glob(val_pattern):
+            val = pipeline.build(val_pattern, batch_size=batch_size, shuffle=False)
+        return {
+            'train': pipeline.build(train_pattern, batch_size=batch_size),
+            'val': val,
+            'vocabulary': vocabulary,
+            'tokenizer': self.tokenizer
         }
     
     def create_sample_dataset(self):
@@ -87,5 +301,8 @@ class DataPreparation:
         ]
         
         # Save sample data
+        if self.store is not None:
+            self.store.extend((item['question'], item['answer']) for item in sample_data)
+            return
         with open(self.data_path, 'w', encoding='utf-8') as f:
             json.dump(sample_data, f, indent=4) 
\ No newline at end of file
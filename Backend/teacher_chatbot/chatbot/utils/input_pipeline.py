@@ -0,0 +1,146 @@
+import json
+import numpy as np
+import tensorflow as tf
+from .preprocessor import TextPreprocessor
+
+DEFAULT_BUCKET_BOUNDARIES = (8, 16, 24, 32, 48, 64)
+
+
+def iter_jsonl_shards(file_pattern):
+    """
+    Yield Q&A records from JSONL shards one line at a time
+    """
+    for path in sorted(tf.io.gfile.glob(file_pattern)):
+        with tf.io.gfile.GFile(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def sequence_lengths(sequences, pad_id=0):
+    """
+    Length of each right-padded row, up to and including its last token
+    """
+    sequences = np.asarray(sequences)
+    tokens = sequences != pad_id
+    lengths = sequences.shape[1] - np.argmax(tokens[:, ::-1], axis=1)
+    return np.where(tokens.any(axis=1), lengths, 0)
+
+
+def bucketed_batches(questions, answers, batch_size=64, shuffle=True, rng=None, window=100, pad_id=0):
+    """
+    Yield (questions, answers) batches of rows with similar lengths, each
+    trimmed to its longest question and answer. When shuffling, rows are
+    shuffled, sorted by length within windows of `window` batches, and the
+    batches are shuffled again, so batches differ between epochs.
+    """
+    question_lengths = sequence_lengths(questions, pad_id)
+    answer_lengths = sequence_lengths(answers, pad_id)
+    lengths = np.maximum(question_lengths, answer_lengths)
+
+    if shuffle:
+        rng = rng or np.random.default_rng()
+        order = rng.permutation(len(lengths))
+        chunk = batch_size * window
+        order = np.concatenate([
+            order[i:i + chunk][np.argsort(lengths[order[i:i + chunk]], kind='stable')]
+            for i in range(0, len(order), chunk)
+        ]) if len(order) else order
+    else:
+        order = np.argsort(lengths, kind='stable')
+
+    batches = [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+    if shuffle:
+        rng.shuffle(batches)
+    for indices in batches:
+        # Sorted indices keep reads from memory-mapped arrays sequential
+        indices = np.sort(indices)
+        yield (
+            np.asarray(questions[indices, :question_lengths[indices].max()], dtype=np.int32),
+            np.asarray(answers[indices, :answer_lengths[indices].max()], dtype=np.int32)
+        )
+
+
+def bucketed_array_dataset(questions, answers, batch_size=64, shuffle=True, seed=None, window=100, pad_id=0):
+    """
+    tf.data dataset over padded in-memory (or memory-mapped) arrays that
+    batches rows by length and pads each batch only to its longest row
+    """
+    rng = np.random.default_rng(seed)
+    spec = tf.TensorSpec(shape=(None, None), dtype=tf.int32)
+    dataset = tf.data.Dataset.from_generator(
+        lambda: bucketed_batches(questions, answers, batch_size, shuffle, rng, window, pad_id),
+        output_signature=(spec, spec)
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class QAInputPipeline:
+    """
+    Streaming tf.data pipeline over JSONL shards of {"question", "answer"}
+    records. Shards are read lazily and interleaved, and batches are
+    bucketed by length and padded to the longest sequence in each batch.
+
+    Records are tokenized by the Python preprocessor through
+    tf.numpy_function, which holds the GIL, so tokenization runs on one
+    core at a time however many map calls are in flight; it only overlaps
+    with training. When tokenization is the bottleneck, train from the
+    encoded arrays of DataPreparation.prepare_data instead.
+    """
+    def __init__(self, vocabulary, preprocessor=None, max_length=None,
+                 bucket_boundaries=DEFAULT_BUCKET_BOUNDARIES):
+        self.vocabulary = vocabulary
+        self.preprocessor = preprocessor or TextPreprocessor()
+        self.max_length = max_length
+        self.bucket_boundaries = list(bucket_boundaries)
+        self.pad_id = vocabulary['<PAD>']
+
+    def _encode(self, text):
+        sequence = self.preprocessor.text_to_sequence(text, self.vocabulary, self.max_length, pad=False)
+        return np.asarray(sequence, dtype=np.int32)
+
+    def _encode_record(self, line):
+        record = json.loads(line.decode('utf-8'))
+        return self._encode(record['question']), self._encode(record['answer'])
+
+    def _parse_line(self, line):
+        question, answer = tf.numpy_function(self._encode_record, [line], [tf.int32, tf.int32])
+        question.set_shape([None])
+        answer.set_shape([None])
+        return question, answer
+
+    def build(self, file_pattern, batch_size=64, shuffle_buffer=10000, shuffle=True,
+              repeat=False, seed=None):
+        """
+        Build a dataset of padded (questions, answers) batches
+        """
+        files = tf.data.Dataset.list_files(file_pattern, shuffle=shuffle, seed=seed)
+        dataset = files.interleave(
+            tf.data.TextLineDataset,
+            cycle_length=tf.data.AUTOTUNE,
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not shuffle
+        )
+        dataset = dataset.filter(lambda line: tf.strings.length(tf.strings.strip(line)) > 0)
+        if shuffle:
+            dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+        if repeat:
+            dataset = dataset.repeat()
+
+        # Tokenize ahead of training; Python tokenization is serialized by the GIL
+        dataset = dataset.map(
+            self._parse_line,
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not shuffle
+        )
+
+        # Bucket by length and pad per batch
+        dataset = dataset.bucket_by_sequence_length(
+            element_length_func=lambda q, a: tf.maximum(tf.shape(q)[0], tf.shape(a)[0]),
+            bucket_boundaries=self.bucket_boundaries,
+            bucket_batch_sizes=[batch_size] * (len(self.bucket_boundaries) + 1),
+            padded_shapes=([None], [None]),
+            padding_values=(self.pad_id, self.pad_id)
+        )
+
+        return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,83 @@
+"""
+Local NLTK resource loading.
+
+Resources are resolved from a vendored or pre-provisioned data directory
+(CHATBOT_NLTK_DATA, default chatbot/nltk_data) and NLTK's standard search
+paths, without network access. Download them once with:
+
+    python -m utils.nltk_resources prepare
+"""
+import argparse
+import os
+
+RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet'
+}
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nltk_data')
+
+_available = set()
+
+
+def data_dir():
+    return os.environ.get('CHATBOT_NLTK_DATA', DEFAULT_DATA_DIR)
+
+
+def _register_data_dir():
+    import nltk
+    path = data_dir()
+    if path not in nltk.data.path:
+        nltk.data.path.insert(0, path)
+
+
+def require(name):
+    """
+    Make sure an NLTK resource can be loaded locally. Raises LookupError
+    with setup instructions instead of downloading it.
+    """
+    if name in _available:
+        return
+    import nltk
+    _register_data_dir()
+    try:
+        nltk.data.find(RESOURCES[name])
+    except LookupError:
+        raise LookupError(
+            f"NLTK resource '{name}' is not installed in {data_dir()} or NLTK's search path. "
+            f"Run 'python -m utils.nltk_resources prepare' once to download it."
+        ) from None
+    _available.add(name)
+
+
+def prepare(download_dir=None):
+    """
+    Download every resource the preprocessor needs into the data directory
+    """
+    import nltk
+    download_dir = download_dir or data_dir()
+    os.makedirs(download_dir, exist_ok=True)
+    for name in RESOURCES:
+        if not nltk.download(name, download_dir=download_dir, quiet=True):
+            raise RuntimeError(f"Failed to download NLTK resource '{name}'")
+    return download_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['prepare', 'check'])
+    parser.add_argument('--dir', help='data directory (default: CHATBOT_NLTK_DATA or chatbot/nltk_data)')
+    args = parser.parse_args()
+
+    if args.dir:
+        os.environ['CHATBOT_NLTK_DATA'] = args.dir
+    if args.command == 'prepare':
+        print(f"NLTK data installed in {prepare(args.dir)}")
+    for name in RESOURCES:
+        require(name)
+        print(f"{name}: ok")
+
+
+if __name__ == '__main__':
+    main()
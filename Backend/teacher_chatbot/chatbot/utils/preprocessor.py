@@ -1,18 +1,73 @@
 import re
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from . import nltk_resources
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
+# Fixed ids: <PAD>=0, <START>=1, <END>=2, <UNK>=3
+SPECIAL_TOKENS = ['<PAD>', '<START>', '<END>', '<UNK>']
+
+NON_ALPHA_PATTERN = re.compile(r'[^a-zA-Z\s]')
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+# Per-process preprocessor used by preprocess_batch workers
+_worker_preprocessor = None
+
+def _init_worker(tokenizer, lemma_cache_size):
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(tokenizer, lemma_cache_size)
+
+def _preprocess_chunk(texts):
+    return [_worker_preprocessor.preprocess_text(text) for text in texts]
 
 class TextPreprocessor:
-    def __init__(self):
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
+    def __init__(self, tokenizer='nltk', lemma_cache_size=100000):
+        """
+        `tokenizer` is 'nltk' for NLTK word_tokenize or 'regex' for a fast
+        split on letter runs. After special characters and numbers are
+        removed both give the same tokens for ordinary text. Lemmas are
+        memoized in an LRU cache of `lemma_cache_size` words.
+        """
+        if tokenizer not in ('nltk', 'regex'):
+            raise ValueError(f"Unknown tokenizer: {tokenizer}")
+        self.tokenizer = tokenizer
+        self.lemma_cache_size = lemma_cache_size
+        self.lemmatize = lru_cache(maxsize=lemma_cache_size)(self._lemmatize_word)
+        
+        # NLTK resources are loaded from local data on first use
+        self._stop_words = None
+        self._lemmatizer = None
+        self._word_tokenize = None
+    
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            nltk_resources.require('stopwords')
+            from nltk.corpus import stopwords
+            self._stop_words = set(stopwords.words('english'))
+        return self._stop_words
+    
+    @property
+    def lemmatizer(self):
+        if self._lemmatizer is None:
+            nltk_resources.require('wordnet')
+            from nltk.stem import WordNetLemmatizer
+            self._lemmatizer = WordNetLemmatizer()
+        return self._lemmatizer
+    
+    def _lemmatize_word(self, word):
+        return self.lemmatizer.lemmatize(word)
+    
+    def tokenize(self, text):
+        """
+        Split cleaned, lowercased text into tokens
+        """
+        if self.tokenizer == 'regex':
+            return WORD_PATTERN.findall(text)
+        if self._word_tokenize is None:
+            nltk_resources.require('punkt')
+            from nltk.tokenize import word_tokenize
+            self._word_tokenize = word_tokenize
+        return self._word_tokenize(text)
         
     def preprocess_text(self, text):
         """
@@ -27,73 +82,75 @@ class TextPreprocessor:
         text = text.lower()
         
         # Remove special characters and numbers
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
+        text = NON_ALPHA_PATTERN.sub('', text)
         
         # Tokenize
-        tokens = word_tokenize(text)
+        tokens = self.tokenize(text)
         
         # Remove stopwords and lemmatize
+        stop_words = self.stop_words
+        lemmatize = self.lemmatize
         processed_tokens = [
-            self.lemmatizer.lemmatize(token)
+            lemmatize(token)
             for token in tokens
-            if token not in self.stop_words
+            if token not in stop_words
         ]
         
         return ' '.join(processed_tokens)
     
-    def create_vocabulary(self, texts, max_words=10000):
+    def preprocess_batch(self, texts, batch_size=1000, n_jobs=1):
         """
-        Create vocabulary from a list of texts
+        Preprocess a list of texts, optionally across `n_jobs` worker
+        processes that each receive chunks of `batch_size` texts
         """
-        # Combine all texts
-        all_text = ' '.join(texts)
-        
-        # Preprocess
-        processed_text = self.preprocess_text(all_text)
-        
-        # Get unique words
-        words = processed_text.split()
-        word_freq = {}
-        
-        # Count word frequencies
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Sort by frequency
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        
-        # Create vocabulary
-        vocabulary = {word: idx for idx, (word, _) in enumerate(sorted_words[:max_words])}
-        
-        # Add special tokens
-        vocabulary['<PAD>'] = len(vocabulary)
-        vocabulary['<START>'] = len(vocabulary)
-        vocabulary['<END>'] = len(vocabulary)
-        vocabulary['<UNK>'] = len(vocabulary)
+        texts = list(texts)
+        if n_jobs <= 1 or len(texts) <= batch_size:
+            return [self.preprocess_text(text) for text in texts]
+        
+        chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_worker,
+            initargs=(self.tokenizer, self.lemma_cache_size)
+        ) as executor:
+            results = []
+            for processed in executor.map(_preprocess_chunk, chunks):
+                results.extend(processed)
+        return results
+    
+    def create_vocabulary(self, texts, max_words=10000, min_freq=1, n_jobs=1):
+        """
+        Create vocabulary from an iterable of texts in a single streaming pass
+        """
+        from .vocabulary import VocabularyBuilder
         
-        return vocabulary
+        builder = VocabularyBuilder(self, min_freq=min_freq, max_words=max_words, n_jobs=n_jobs)
+        return builder.build(texts)
     
-    def text_to_sequence(self, text, vocabulary, max_length=50):
+    def text_to_sequence(self, text, vocabulary, max_length=50, pad=True):
         """
-        Convert text to sequence of indices
+        Convert text to sequence of indices. With `pad=False` sequences are
+        only truncated to `max_length`, for batches padded to their longest
+        sequence.
         """
         # Preprocess text
         processed_text = self.preprocess_text(text)
         
         # Convert to sequence
-        sequence = []
-        for word in processed_text.split():
-            if word in vocabulary:
-                sequence.append(vocabulary[word])
-            else:
-                sequence.append(vocabulary['<UNK>'])
+        unk_id = vocabulary['<UNK>']
+        sequence = [vocabulary.get(word, unk_id) for word in processed_text.split()]
         
         # Add start and end tokens
         sequence = [vocabulary['<START>']] + sequence + [vocabulary['<END>']]
         
+        # Leave unpadded when padding is done per batch
+        if max_length is None:
+            return sequence
+        
         # Pad or truncate
         if len(sequence) < max_length:
-            sequence = sequence + [vocabulary['<PAD>']] * (max_length - len(sequence))
+            if pad:
+                sequence = sequence + [vocabulary['<PAD>']] * (max_length - len(sequence))
         else:
             sequence = sequence[:max_length-1] + [vocabulary['<END>']]
         
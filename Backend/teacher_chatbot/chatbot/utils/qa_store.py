@@ -0,0 +1,243 @@
+"""
+Append-only Q&A store.
+
+Records are JSON lines in <name>.jsonl. A fixed-width index next to it
+(<name>.jsonl.idx) holds each record's byte offset and the hash of its
+normalized question, so a record's id is its position in the index. Adding
+a pair appends one line and one index entry instead of rewriting the file,
+duplicate questions are skipped by hash, and any record can be read by id
+without loading the rest. Convert an existing JSON dataset with:
+
+    python -m utils.qa_store convert data/qa_data.json data/qa_data.jsonl
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends from several processes are not locked
+    fcntl = None
+
+# Index entry: byte offset of the record and hash of its normalized question
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('hash', '<u8')])
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def question_hash(question):
+    """
+    64-bit hash of a question ignoring case, punctuation and spacing
+    """
+    normalized = ' '.join(WORD_PATTERN.findall(question.lower()))
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class QAStore:
+    def __init__(self, path):
+        self.path = path
+        self.index_path = f'{path}.idx'
+        self._index = None
+        self._sorted_hashes = None
+        self._new_hashes = set()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _load_index(self):
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                self._index = np.fromfile(self.index_path, dtype=INDEX_DTYPE)
+            else:
+                self._index = np.zeros(0, dtype=INDEX_DTYPE)
+            self._sorted_hashes = np.sort(self._index['hash'])
+            self._new_hashes = set()
+        return self._index
+
+    def _refresh(self):
+        """
+        Pick up entries appended by other processes since the index was read
+        """
+        index = self._load_index()
+        size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        count = size // INDEX_DTYPE.itemsize
+        if count > len(index):
+            with open(self.index_path, 'rb') as f:
+                f.seek(len(index) * INDEX_DTYPE.itemsize)
+                added = np.fromfile(f, dtype=INDEX_DTYPE, count=count - len(index))
+            self._index = np.concatenate([index, added])
+            self._new_hashes.update(int(h) for h in added['hash'])
+
+    @contextmanager
+    def _locked(self):
+        """
+        Hold an exclusive lock for appending and bring the index up to date
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.index_path, 'ab') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                self._recover()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _recover(self):
+        """
+        Index records written before an interrupted append recorded them, and
+        drop a partially written last line or index entry
+        """
+        # A torn index entry would shift every entry appended after it
+        with open(self.index_path, 'ab') as f:
+            if f.tell() != len(self._index) * INDEX_DTYPE.itemsize:
+                f.truncate(len(self._index) * INDEX_DTYPE.itemsize)
+        if not os.path.exists(self.path):
+            return
+        index = self._index
+        end = 0
+        if len(index):
+            with open(self.path, 'rb') as f:
+                f.seek(int(index['offset'][-1]))
+                end = int(index['offset'][-1]) + len(f.readline())
+        if end == os.path.getsize(self.path):
+            return
+
+        entries = []
+        with open(self.path, 'rb') as f:
+            f.seek(end)
+            for line in iter(f.readline, b''):
+                if not line.endswith(b'\n'):
+                    break
+                record = json.loads(line)
+                entries.append((end, question_hash(record['question'])))
+                end += len(line)
+        with open(self.path, 'ab') as f:
+            f.truncate(end)
+        if entries:
+            self._write_index(entries)
+
+    def _write_index(self, entries):
+        added = np.array(entries, dtype=INDEX_DTYPE)
+        with open(self.index_path, 'ab') as f:
+            added.tofile(f)
+        self._index = np.concatenate([self._index, added])
+        self._new_hashes.update(int(h) for h in added['hash'])
+
+    def _contains_hash(self, value):
+        if value in self._new_hashes:
+            return True
+        position = np.searchsorted(self._sorted_hashes, value)
+        return position < len(self._sorted_hashes) and int(self._sorted_hashes[position]) == value
+
+    def __contains__(self, question):
+        self._refresh()
+        return self._contains_hash(question_hash(question))
+
+    def __len__(self):
+        self._refresh()
+        return len(self._index)
+
+    def add(self, question, answer):
+        """
+        Append a Q&A pair and return its id, or None if the question is
+        already stored
+        """
+        ids = self.extend([(question, answer)])
+        return ids[0] if ids else None
+
+    def extend(self, pairs):
+        """
+        Append (question, answer) pairs in one write, skipping duplicates,
+        and return the ids of the added pairs
+        """
+        with self._locked():
+            offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            first_id = len(self._index)
+            lines, entries, batch_hashes = [], [], set()
+            for question, answer in pairs:
+                value = question_hash(question)
+                if value in batch_hashes or self._contains_hash(value):
+                    continue
+                line = (json.dumps({'question': question, 'answer': answer}) + '\n').encode('utf-8')
+                entries.append((offset, value))
+                batch_hashes.add(value)
+                lines.append(line)
+                offset += len(line)
+
+            if lines:
+                # Data first: a crash before the index write is repaired by _recover
+                with open(self.path, 'ab') as f:
+                    f.write(b''.join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._write_index(entries)
+        return list(range(first_id, first_id + len(entries)))
+
+    def __getitem__(self, qa_id):
+        """
+        Read one record by id
+        """
+        index = self._load_index()
+        if not 0 <= qa_id < len(index):
+            self._refresh()
+            index = self._index
+            if not 0 <= qa_id < len(index):
+                raise IndexError(qa_id)
+        with open(self.path, 'rb') as f:
+            f.seek(int(index['offset'][qa_id]))
+            return json.loads(f.readline())
+
+    def __iter__(self):
+        """
+        Stream indexed records in id order
+        """
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """
+        Stream the indexed records from id `start` on, e.g. the ones added
+        since a previous pass
+        """
+        count = len(self)
+        if start >= count:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(int(self._index['offset'][start]))
+            for _ in range(count - start):
+                yield json.loads(f.readline())
+
+    @classmethod
+    def from_json(cls, json_path, path, batch_size=10000):
+        """
+        Convert a JSON list of {"question", "answer"} records into a store
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        store = cls(path)
+        added = 0
+        for start in range(0, len(data), batch_size):
+            batch = data[start:start + batch_size]
+            added += len(store.extend((item['question'], item['answer']) for item in batch))
+        return store, added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert = subparsers.add_parser('convert', help='convert a JSON dataset into a store')
+    convert.add_argument('source')
+    convert.add_argument('destination')
+    args = parser.parse_args()
+
+    store, added = QAStore.from_json(args.source, args.destination)
+    print(f"Added {added} Q&A pairs to {args.destination} ({len(store)} total)")
+
+
+if __name__ == '__main__':
+    main()
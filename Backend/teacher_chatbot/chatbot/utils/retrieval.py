@@ -0,0 +1,125 @@
+import math
+import threading
+from collections import Counter, defaultdict
+import numpy as np
+from .preprocessor import TextPreprocessor
+
+
+class QARetriever:
+    """
+    Incremental BM25 index over Q&A questions. Candidates are ranked by
+    BM25 through an inverted index, then scored with a bounded similarity
+    (idf-weighted cosine, or dense cosine when `embed_fn` is given) that is
+    compared against the answer threshold.
+    """
+    def __init__(self, preprocessor=None, k1=1.5, b=0.75, embed_fn=None):
+        self.preprocessor = preprocessor or TextPreprocessor()
+        self.k1 = k1
+        self.b = b
+        self.embed_fn = embed_fn
+        self.postings = defaultdict(dict)
+        self.doc_terms = []
+        self.doc_lengths = []
+        self.answers = []
+        self.questions = []
+        self.total_length = 0
+        self.embeddings = []
+        self._embedding_matrix = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.answers)
+
+    def _terms(self, text):
+        return Counter(self.preprocessor.preprocess_text(text).split())
+
+    def _embed(self, texts):
+        vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add(self, question, answer):
+        """
+        Index a Q&A pair and return its id
+        """
+        terms = self._terms(question)
+        embedding = self._embed([question])[0] if self.embed_fn else None
+        with self.lock:
+            doc_id = len(self.answers)
+            for term, count in terms.items():
+                self.postings[term][doc_id] = count
+            self.doc_terms.append(terms)
+            self.doc_lengths.append(sum(terms.values()))
+            self.questions.append(question)
+            self.answers.append(answer)
+            self.total_length += self.doc_lengths[-1]
+            if embedding is not None:
+                self.embeddings.append(embedding)
+                self._embedding_matrix = None
+        return doc_id
+
+    def add_many(self, pairs):
+        for question, answer in pairs:
+            self.add(question, answer)
+
+    def _idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.answers) - df + 0.5) / (df + 0.5))
+
+    def _bm25(self, terms, top_k):
+        scores = defaultdict(float)
+        avg_length = self.total_length / max(len(self.answers), 1)
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores, key=scores.get, reverse=True)[:top_k]
+
+    def _lexical_similarity(self, query_terms, doc_id):
+        doc_terms = self.doc_terms[doc_id]
+        dot = query_norm = doc_norm = 0.0
+        for term, count in query_terms.items():
+            idf = self._idf(term)
+            query_norm += (count * idf) ** 2
+            dot += count * doc_terms.get(term, 0) * idf * idf
+        for term, count in doc_terms.items():
+            weight = count * self._idf(term)
+            doc_norm += weight * weight
+        if not dot:
+            return 0.0
+        return dot / math.sqrt(query_norm * doc_norm)
+
+    def search(self, question, top_k=5):
+        """
+        Return up to `top_k` (similarity, doc_id) pairs, best first
+        """
+        query_terms = self._terms(question)
+        query_embedding = self._embed([question])[0] if self.embed_fn else None
+        with self.lock:
+            if query_embedding is not None and self.embeddings:
+                if self._embedding_matrix is None:
+                    self._embedding_matrix = np.vstack(self.embeddings)
+                similarities = self._embedding_matrix @ query_embedding
+                best = np.argsort(-similarities)[:top_k]
+                return [(float(similarities[i]), int(i)) for i in best]
+
+            candidates = self._bm25(query_terms, top_k)
+            results = [(self._lexical_similarity(query_terms, doc_id), doc_id) for doc_id in candidates]
+        return sorted(results, reverse=True)
+
+    def match(self, question, threshold=0.8):
+        """
+        Return (answer, similarity) for the best stored question if its
+        similarity is at least `threshold`, otherwise (None, similarity)
+        """
+        results = self.search(question, top_k=5)
+        if not results:
+            return None, 0.0
+        similarity, doc_id = results[0]
+        if similarity < threshold:
+            return None, similarity
+        return self.answers[doc_id], similarity
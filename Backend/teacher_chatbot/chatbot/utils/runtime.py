@@ -0,0 +1,83 @@
+import os
+
+MIXED_PRECISION_POLICIES = {
+    'bfloat16': 'mixed_bfloat16',
+    'mixed_bfloat16': 'mixed_bfloat16',
+    'float16': 'mixed_float16',
+    'mixed_float16': 'mixed_float16'
+}
+
+STRATEGIES = ('mirrored',)
+
+
+def cpu_supports_bfloat16():
+    """
+    Check whether the CPU has native bfloat16 instructions (AVX512-BF16 or AMX).
+    Without them bfloat16 is emulated and slower than float32.
+    """
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def resolve_precision_policy(mixed_precision):
+    """
+    Map a mixed precision option to a Keras policy name, or None for float32.
+    'auto' selects bfloat16 only when the CPU supports it natively.
+    """
+    if not mixed_precision:
+        return None
+    if mixed_precision == 'auto':
+        return 'mixed_bfloat16' if cpu_supports_bfloat16() else None
+    if mixed_precision not in MIXED_PRECISION_POLICIES:
+        raise ValueError(f"Unknown mixed precision option: {mixed_precision}")
+    return MIXED_PRECISION_POLICIES[mixed_precision]
+
+
+def configure_runtime(intra_op_threads=None, inter_op_threads=None, mixed_precision=None):
+    """
+    Configure TensorFlow thread pools and the Keras precision policy.
+    Must be called before any model is built or any op runs.
+    """
+    import tensorflow as tf
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(int(intra_op_threads))
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(int(inter_op_threads))
+
+    policy = resolve_precision_policy(mixed_precision)
+    tf.keras.mixed_precision.set_global_policy(policy or 'float32')
+    return policy
+
+
+def configure_runtime_from_env():
+    """
+    Configure the runtime from CHATBOT_INTRA_OP_THREADS,
+    CHATBOT_INTER_OP_THREADS and CHATBOT_MIXED_PRECISION
+    """
+    return configure_runtime(
+        intra_op_threads=os.environ.get('CHATBOT_INTRA_OP_THREADS'),
+        inter_op_threads=os.environ.get('CHATBOT_INTER_OP_THREADS'),
+        mixed_precision=os.environ.get('CHATBOT_MIXED_PRECISION')
+    )
+
+
+def create_strategy(name=None):
+    """
+    Create a distribution strategy by name: None for the default strategy
+    or 'mirrored' to replicate the model on every local GPU. A CPU-only
+    host is a single replica either way, so CPU training scales through
+    the thread pools (see configure_runtime) instead. A training job is a
+    single process on one host, so multi-worker strategies are not
+    offered. Call it before any other TensorFlow op, so the strategy sees
+    the devices before they are used.
+    """
+    import tensorflow as tf
+    if not name:
+        return tf.distribute.get_strategy()
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown distribution strategy: {name}")
+    return tf.distribute.MirroredStrategy()
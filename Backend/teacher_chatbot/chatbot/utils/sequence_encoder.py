@@ -0,0 +1,89 @@
+import glob
+import os
+import numpy as np
+
+
+class SequenceEncoder:
+    """
+    Batch replacement for per-item text_to_sequence. Token ids are written
+    straight into a preallocated int32 array (or a ragged offsets/values
+    pair), with the same <START>/<END>/<PAD> layout and truncation.
+    """
+    def __init__(self, vocabulary, preprocessor=None, tokenizer=None, max_length=50, batch_size=1000):
+        self.preprocessor = preprocessor
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.batch_size = batch_size
+        # Memory-mapped vocabularies are slow for bulk lookups
+        self.lookup = vocabulary.to_dict() if hasattr(vocabulary, 'to_dict') else vocabulary
+        self.pad_id = vocabulary['<PAD>']
+        self.start_id = vocabulary['<START>']
+        self.end_id = vocabulary['<END>']
+        self.unk_id = vocabulary['<UNK>']
+
+    def token_ids(self, texts):
+        """
+        Yield the ids of each text, without special tokens
+        """
+        if self.tokenizer is not None:
+            for text in texts:
+                yield self.tokenizer.encode(text)
+            return
+
+        lookup, unk_id = self.lookup, self.unk_id
+        texts = list(texts)
+        for i in range(0, len(texts), self.batch_size):
+            for processed in self.preprocessor.preprocess_batch(texts[i:i + self.batch_size]):
+                yield [lookup.get(word, unk_id) for word in processed.split()]
+
+    def encode_batch(self, texts):
+        """
+        Encode texts into an (n, max_length) int32 array
+        """
+        texts = list(texts)
+        sequences = np.full((len(texts), self.max_length), self.pad_id, dtype=np.int32)
+        sequences[:, 0] = self.start_id
+        limit = self.max_length - 2
+        for row, ids in enumerate(self.token_ids(texts)):
+            count = min(len(ids), limit)
+            sequences[row, 1:count + 1] = ids[:count]
+            sequences[row, count + 1] = self.end_id
+        return sequences
+
+    def encode_ragged(self, texts):
+        """
+        Encode texts without padding as (offsets, values): row i is
+        values[offsets[i]:offsets[i + 1]]
+        """
+        texts = list(texts)
+        token_lists = list(self.token_ids(texts))
+        lengths = np.array([min(len(ids), self.max_length - 2) + 2 for ids in token_lists], dtype=np.int64)
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        values = np.empty(offsets[-1], dtype=np.int32)
+        for row, ids in enumerate(token_lists):
+            start, end = offsets[row], offsets[row + 1]
+            values[start] = self.start_id
+            values[start + 1:end - 1] = ids[:end - start - 2]
+            values[end - 1] = self.end_id
+        return offsets, values
+
+
+def write_shards(output_dir, name, sequences, shard_size=100000):
+    """
+    Save an encoded array as <name>-00000.npy, <name>-00001.npy, ...
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, f'{name}-*.npy')):
+        os.remove(stale)
+    for shard, start in enumerate(range(0, len(sequences), shard_size)):
+        np.save(os.path.join(output_dir, f'{name}-{shard:05d}.npy'), sequences[start:start + shard_size])
+
+
+def load_shards(output_dir, name, mmap_mode='r'):
+    """
+    Reopen saved shards as memory-mapped arrays, in order
+    """
+    paths = sorted(glob.glob(os.path.join(output_dir, f'{name}-*.npy')))
+    return [np.load(path, mmap_mode=mmap_mode) for path in paths]
@@ -0,0 +1,203 @@
+import heapq
+import os
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from .preprocessor import SPECIAL_TOKENS
+
+END_OF_WORD = '</w>'
+PRETOKENIZE_PATTERN = re.compile(r'\w+|[^\w\s]')
+FORMAT_HEADER = '#bpe-v1'
+
+
+class BPETokenizer:
+    """
+    Byte-pair-encoding subword tokenizer, an alternative to
+    TextPreprocessor.create_vocabulary/text_to_sequence. Digits and
+    punctuation are kept as tokens and unseen words are split into known
+    subwords instead of becoming <UNK>, with a vocabulary size chosen up
+    front so the model's output layer stays small.
+    """
+    def __init__(self, vocab_size=8000, min_frequency=2, lowercase=True, cache_size=100000):
+        self.vocab_size = vocab_size
+        self.min_frequency = min_frequency
+        self.lowercase = lowercase
+        self.cache_size = cache_size
+        self.alphabet = []
+        self.merges = []
+        self._build_tables()
+
+    def _build_tables(self):
+        # Different merges can produce the same string, which gets one id
+        tokens = SPECIAL_TOKENS + [END_OF_WORD] + self.alphabet + [a + b for a, b in self.merges]
+        self.id_to_token = list(dict.fromkeys(tokens))
+        self.vocabulary = {token: idx for idx, token in enumerate(self.id_to_token)}
+        self.ranks = {pair: rank for rank, pair in enumerate(self.merges)}
+        self._encode_word = lru_cache(maxsize=self.cache_size)(self._encode_word_uncached)
+
+    def pretokenize(self, text):
+        """
+        Split text into words, digit runs and single punctuation marks
+        """
+        if self.lowercase:
+            text = text.lower()
+        return PRETOKENIZE_PATTERN.findall(text)
+
+    def train(self, texts):
+        """
+        Learn merges from an iterable of texts until the vocabulary reaches
+        `vocab_size` or no pair occurs at least `min_frequency` times
+        """
+        word_counts = Counter()
+        for text in texts:
+            word_counts.update(self.pretokenize(text))
+
+        self.alphabet = sorted({char for word in word_counts for char in word})
+        words = [tuple(word) + (END_OF_WORD,) for word in word_counts]
+        freqs = list(word_counts.values())
+
+        # Pair counts and the words each pair occurs in
+        pair_counts = Counter()
+        pair_words = defaultdict(set)
+        for i, word in enumerate(words):
+            for pair in zip(word, word[1:]):
+                pair_counts[pair] += freqs[i]
+                pair_words[pair].add(i)
+
+        # Max-heap of pair counts with lazy invalidation of stale entries
+        heap = [(-count, pair) for pair, count in pair_counts.items()]
+        heapq.heapify(heap)
+
+        merges = []
+        num_merges = self.vocab_size - len(SPECIAL_TOKENS) - 1 - len(self.alphabet)
+        while heap and len(merges) < num_merges:
+            count, pair = heapq.heappop(heap)
+            if pair_counts.get(pair) != -count:
+                continue
+            if -count < self.min_frequency:
+                break
+            merges.append(pair)
+            merged = pair[0] + pair[1]
+
+            # Only words containing the pair change
+            deltas = Counter()
+            for i in pair_words.pop(pair):
+                word = words[i]
+                new_word = self._merge_pair(word, pair, merged)
+                if new_word == word:
+                    continue
+                for old_pair in zip(word, word[1:]):
+                    deltas[old_pair] -= freqs[i]
+                for new_pair in zip(new_word, new_word[1:]):
+                    deltas[new_pair] += freqs[i]
+                    pair_words[new_pair].add(i)
+                words[i] = new_word
+
+            for changed, delta in deltas.items():
+                if not delta:
+                    continue
+                pair_counts[changed] += delta
+                if pair_counts[changed] <= 0:
+                    del pair_counts[changed]
+                else:
+                    heapq.heappush(heap, (-pair_counts[changed], changed))
+            pair_counts.pop(pair, None)
+
+        self.merges = merges
+        self._build_tables()
+        return self
+
+    @staticmethod
+    def _merge_pair(symbols, pair, merged):
+        result = []
+        i = 0
+        while i < len(symbols):
+            if i < len(symbols) - 1 and symbols[i] == pair[0] and symbols[i + 1] == pair[1]:
+                result.append(merged)
+                i += 2
+            else:
+                result.append(symbols[i])
+                i += 1
+        return tuple(result)
+
+    def _encode_word_uncached(self, word):
+        symbols = tuple(word) + (END_OF_WORD,)
+
+        # Apply merges in the order they were learned
+        while len(symbols) > 1:
+            rank, pair = min(
+                (self.ranks.get(pair, float('inf')), pair)
+                for pair in zip(symbols, symbols[1:])
+            )
+            if rank == float('inf'):
+                break
+            symbols = self._merge_pair(symbols, pair, pair[0] + pair[1])
+
+        unk_id = self.vocabulary['<UNK>']
+        return tuple(self.vocabulary.get(symbol, unk_id) for symbol in symbols)
+
+    def encode(self, text):
+        """
+        Convert text to subword ids, without special tokens
+        """
+        ids = []
+        for word in self.pretokenize(text):
+            ids.extend(self._encode_word(word))
+        return ids
+
+    def encode_batch(self, texts):
+        return [self.encode(text) for text in texts]
+
+    def decode(self, ids):
+        """
+        Convert subword ids back to text, skipping special tokens
+        """
+        special_ids = len(SPECIAL_TOKENS)
+        pieces = [self.id_to_token[int(idx)] for idx in ids if special_ids <= int(idx) < len(self.id_to_token)]
+        return ''.join(pieces).replace(END_OF_WORD, ' ').strip()
+
+    def decode_batch(self, sequences):
+        return [self.decode(ids) for ids in sequences]
+
+    def text_to_sequence(self, text, vocabulary=None, max_length=50, pad=True):
+        """
+        Drop-in for TextPreprocessor.text_to_sequence. `vocabulary` is
+        accepted for compatibility and ignored: the tokenizer uses its own.
+        """
+        sequence = [self.vocabulary['<START>']] + self.encode(text) + [self.vocabulary['<END>']]
+        if max_length is None:
+            return sequence
+        if len(sequence) < max_length:
+            if not pad:
+                return sequence
+            return sequence + [self.vocabulary['<PAD>']] * (max_length - len(sequence))
+        return sequence[:max_length - 1] + [self.vocabulary['<END>']]
+
+    def save(self, path):
+        """
+        Save the merge table: a header, the alphabet, then one merge per line
+        """
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f'{FORMAT_HEADER} lowercase={int(self.lowercase)}\n')
+            f.write(''.join(self.alphabet) + '\n')
+            for left, right in self.merges:
+                f.write(f'{left} {right}\n')
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            header = f.readline().split()
+            if not header or header[0] != FORMAT_HEADER:
+                raise ValueError(f"Not a BPE merge table: {path}")
+            options = dict(option.split('=') for option in header[1:])
+            alphabet = list(f.readline().rstrip('\n'))
+            merges = [tuple(line.rstrip('\n').split(' ')) for line in f if line.strip()]
+
+        tokenizer = cls(lowercase=options.get('lowercase', '1') == '1')
+        tokenizer.alphabet = alphabet
+        tokenizer.merges = merges
+        tokenizer._build_tables()
+        tokenizer.vocab_size = len(tokenizer.vocabulary)
+        return tokenizer
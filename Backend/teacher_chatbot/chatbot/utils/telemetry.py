@@ -0,0 +1,259 @@
+"""
+Training telemetry.
+
+A TrainingTelemetry callback records, for every training step, the number
+of examples and tokens, the time spent waiting on the input pipeline versus
+computing, and the peak RSS of the process. Steps go to steps.jsonl and a
+summary to summary.json in the run directory. Compare runs with:
+
+    python -m utils.telemetry compare models/jobs/*
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+import numpy as np
+import tensorflow as tf
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in KB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class TrainingTelemetry(tf.keras.callbacks.Callback):
+    """
+    Keras callback that writes per-step throughput, input-pipeline wait
+    versus compute time and peak RSS to `run_dir`.
+
+    Input wait is only measured for tf.data input passed through
+    `instrument`, which stamps each batch as it leaves the pipeline; for
+    in-memory arrays the whole step counts as compute and tokenization
+    shows up in the timed phases instead.
+    """
+    def __init__(self, run_dir, config=None):
+        super().__init__()
+        self.run_dir = run_dir
+        self.config = config or {}
+        self.phases = {}
+        self.batch_size = None
+        self.num_examples = None
+        self.instrumented = False
+        # Written by the pipeline stamp, read after each step. Plain Python
+        # values rather than tf.Variables, so no TensorFlow state is created
+        # outside the model's distribution strategy.
+        self._ready_at = 0.0
+        self._examples = 0
+        self._tokens = 0
+        os.makedirs(run_dir, exist_ok=True)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a block outside of training, e.g. data preparation
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def instrument(self, dataset):
+        """
+        Return `dataset` with a final, sequential step that records when
+        each batch is handed to the model, with its example and
+        non-padding token counts
+        """
+        self.instrumented = True
+
+        def stamp(*batch):
+            tensors = tf.nest.flatten(batch)
+            tokens = tf.add_n([tf.math.count_nonzero(t, dtype=tf.int64) for t in tensors])
+            examples = tf.cast(tf.shape(tensors[0])[0], tf.int64)
+            recorded = tf.numpy_function(self._record_batch, [examples, tokens], tf.int64)
+            with tf.control_dependencies([recorded]):
+                return tf.nest.map_structure(tf.identity, batch)
+
+        return dataset.map(stamp)
+
+    def _record_batch(self, examples, tokens):
+        self._ready_at = time.time()
+        self._examples = int(examples)
+        self._tokens = int(tokens)
+        return np.int64(0)
+
+    def set_array_input(self, batch_size, num_examples):
+        """
+        Describe in-memory array input, whose batches are not instrumented
+        """
+        self.batch_size = batch_size
+        self.num_examples = num_examples
+
+    def on_train_begin(self, logs=None):
+        self.started_at = time.time()
+        self.steps_file = open(os.path.join(self.run_dir, 'steps.jsonl'), 'w')
+        self.step_times = []
+        self.input_waits = []
+        self.step_examples = []
+        self.step_tokens = []
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+        self.epoch_first_step = len(self.step_times)
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self.step_start = time.time()
+
+    def on_train_batch_end(self, batch, logs=None):
+        step_end = time.time()
+        step_time = step_end - self.step_start
+
+        if self.instrumented:
+            # The batch may already be waiting when the step starts
+            input_wait = min(max(self._ready_at - self.step_start, 0.0), step_time)
+            examples = self._examples
+            tokens = self._tokens
+        else:
+            input_wait = None
+            examples = self.batch_size
+            if self.batch_size and self.num_examples:
+                examples = min(self.batch_size, self.num_examples - batch * self.batch_size)
+            tokens = None
+
+        self.step_times.append(step_time)
+        self.input_waits.append(input_wait or 0.0)
+        self.step_examples.append(examples or 0)
+        self.step_tokens.append(tokens or 0)
+        self.steps_file.write(json.dumps({
+            'epoch': len(self.epochs) + 1,
+            'step': batch,
+            'examples': examples,
+            'tokens': tokens,
+            'step_time': step_time,
+            'input_wait': input_wait,
+            'compute_time': step_time - (input_wait or 0.0),
+            'loss': float(logs['loss']) if logs and 'loss' in logs else None,
+            'peak_rss_mb': peak_rss_mb()
+        }) + '\n')
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self.epoch_start
+        examples = sum(self.step_examples[self.epoch_first_step:])
+        self.epochs.append({
+            'epoch': epoch + 1,
+            'seconds': seconds,
+            'steps': len(self.step_times) - self.epoch_first_step,
+            'examples': examples,
+            'examples_per_sec': examples / seconds if seconds else None
+        })
+        self.steps_file.flush()
+        self.write_summary()
+
+    def on_train_end(self, logs=None):
+        self.steps_file.close()
+        self.write_summary(finished=True)
+
+    def summary(self):
+        """
+        Aggregate the recorded steps. The first step (tracing and graph
+        compilation) is excluded from throughput and step-time figures.
+        """
+        step_times = np.array(self.step_times[1:] or self.step_times)
+        input_waits = np.array(self.input_waits[1:] or self.input_waits)
+        examples = sum(self.step_examples[1:] or self.step_examples)
+        tokens = sum(self.step_tokens[1:] or self.step_tokens)
+        train_seconds = float(step_times.sum())
+        return {
+            'run_dir': self.run_dir,
+            'config': self.config,
+            'started_at': self.started_at,
+            'phases': self.phases,
+            'epochs': self.epochs,
+            'steps': len(self.step_times),
+            'examples': sum(self.step_examples),
+            'examples_per_sec': examples / train_seconds if train_seconds else None,
+            'tokens_per_sec': tokens / train_seconds if train_seconds and self.instrumented else None,
+            'step_time_p50': float(np.percentile(step_times, 50)) if len(step_times) else None,
+            'step_time_p95': float(np.percentile(step_times, 95)) if len(step_times) else None,
+            'input_wait_seconds': float(input_waits.sum()) if self.instrumented else None,
+            'compute_seconds': float(train_seconds - input_waits.sum()),
+            'input_wait_fraction': float(input_waits.sum() / train_seconds) if self.instrumented and train_seconds else None,
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+    def write_summary(self, finished=False):
+        summary = self.summary()
+        if finished:
+            summary['finished_at'] = time.time()
+        tmp_path = os.path.join(self.run_dir, f'summary.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.run_dir, 'summary.json'))
+
+
+def load_summary(path):
+    """
+    Load summary.json from a run directory or a training job directory
+    """
+    for candidate in (path, os.path.join(path, 'telemetry')):
+        summary_path = os.path.join(candidate, 'summary.json')
+        if os.path.exists(summary_path):
+            with open(summary_path, 'r') as f:
+                return json.load(f)
+    return None
+
+
+def _format(value, spec):
+    if value is None:
+        return '-'.rjust(int(spec.split('.')[0]))
+    return format(value, spec)
+
+
+def compare(paths):
+    """
+    Print one line per run with throughput, step time, input wait share,
+    time spent preparing data and peak memory
+    """
+    print(f"{'run':<34} {'ex/s':>9} {'tok/s':>10} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'wait %':>7} {'prep s':>8} {'rss MB':>8}  bound")
+    for path in paths:
+        summary = load_summary(path)
+        if summary is None:
+            print(f"{path:<34} no telemetry")
+            continue
+        wait = summary['input_wait_fraction']
+        if wait is None:
+            bound = '-'
+        else:
+            bound = 'input' if wait >= 0.5 else 'compute'
+        name = os.path.basename(os.path.normpath(path))
+        print(
+            f"{name[:34]:<34} "
+            f"{_format(summary['examples_per_sec'], '9.1f')} "
+            f"{_format(summary['tokens_per_sec'], '10.0f')} "
+            f"{_format(summary['step_time_p50'] and summary['step_time_p50'] * 1000, '8.1f')} "
+            f"{_format(summary['step_time_p95'] and summary['step_time_p95'] * 1000, '8.1f')} "
+            f"{_format(wait and wait * 100, '7.1f')} "
+            f"{sum(summary['phases'].values()):8.1f} "
+            f"{summary['peak_rss_mb']:8.0f}  {bound}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['compare'])
+    parser.add_argument('runs', nargs='+', help='run or training job directories')
+    args = parser.parse_args()
+    compare(args.runs)
+
+
+if __name__ == '__main__':
+    main()
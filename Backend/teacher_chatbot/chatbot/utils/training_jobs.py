@@ -0,0 +1,299 @@
+import argparse
+import importlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from .runtime import STRATEGIES, resolve_precision_policy
+
+ACTIVE_STATES = ('queued', 'running')
+# Seq2SeqModel architectures, listed here so that checking a job's
+# options does not import TensorFlow
+ARCHITECTURES = ('lstm', 'transformer')
+RUNTIME_OPTIONS = ('intra_op_threads', 'inter_op_threads', 'mixed_precision', 'jit_compile', 'strategy')
+# Run by the training process; its module imports TensorFlow, which the
+# server process never needs to
+DEFAULT_TARGET = f'{__package__}.training_run:run_training_job'
+
+
+def _write_json_atomic(path, payload):
+    """
+    Write JSON to a temporary file and move it into place so readers
+    never observe a partially written file
+    """
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _positive_int(name, value):
+    """
+    An integer option given as an int or a string of digits
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().isdigit():
+        raise ValueError(f"{name} must be a positive integer, got {value!r}")
+    if int(value) < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value!r}")
+    return int(value)
+
+
+def validate_options(batch_size, epochs, runtime=None, subword_vocab_size=None, architecture=None):
+    """
+    Check the options of a training job before it starts, so a bad value
+    is reported to the caller instead of failing in the training process.
+    Raises ValueError, and returns the options with integers converted.
+    """
+    if architecture is not None and architecture not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture {architecture!r}, expected one of {', '.join(ARCHITECTURES)}")
+    if runtime is not None:
+        if not isinstance(runtime, dict):
+            raise ValueError("runtime must be an object")
+        unknown = set(runtime) - set(RUNTIME_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown runtime options: {', '.join(sorted(unknown))}")
+        runtime = dict(runtime)
+        for name in ('intra_op_threads', 'inter_op_threads'):
+            if runtime.get(name) is not None:
+                runtime[name] = _positive_int(name, runtime[name])
+        if runtime.get('mixed_precision') is not None:
+            resolve_precision_policy(runtime['mixed_precision'])
+        if not isinstance(runtime.get('jit_compile', False), bool):
+            raise ValueError("jit_compile must be true or false")
+        if runtime.get('strategy') and runtime['strategy'] not in STRATEGIES:
+            raise ValueError(f"Unknown distribution strategy: {runtime['strategy']}")
+    if subword_vocab_size is not None:
+        subword_vocab_size = _positive_int('subword_vocab_size', subword_vocab_size)
+    return {
+        'batch_size': _positive_int('batch_size', batch_size),
+        'epochs': _positive_int('epochs', epochs),
+        'runtime': runtime,
+        'subword_vocab_size': subword_vocab_size,
+        'architecture': architecture
+    }
+
+
+def _process_alive(pid, job_dir):
+    """
+    Whether the training process of a job is still running. Where /proc is
+    available the process must still be running this job, so a reused pid
+    or an exited but unreaped child does not count.
+    """
+    if os.path.isdir('/proc'):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read()
+            if not cmdline:
+                # Empty for a zombie, and for a process still in exec
+                # right after Popen returns
+                with open(f'/proc/{pid}/stat', 'rb') as f:
+                    state = f.read().rsplit(b')', 1)[1].split()[0]
+                return state not in (b'Z', b'X')
+        except OSError:
+            return False
+        return os.fsencode(os.path.abspath(job_dir)) in cmdline
+    if os.name == 'nt':
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def promote_release(job_dir, pointer_path, model_config=None):
+    """
+    Point serving at the checkpoint and vocabulary of a finished job.
+    The pointer file is replaced in a single rename, so the app either sees
+    the previous release or the new one, never a mix of both.
+    `model_config` holds the Seq2SeqModel arguments to rebuild the model.
+    """
+    tokenizer_path = os.path.join(job_dir, 'tokenizer.bpe')
+    release = {
+        'job_id': os.path.basename(job_dir),
+        'weights': os.path.join(job_dir, 'seq2seq_model.h5'),
+        'vocabulary': os.path.join(job_dir, 'vocabulary.bin'),
+        'tokenizer': tokenizer_path if os.path.exists(tokenizer_path) else None,
+        'model': model_config,
+        'promoted_at': time.time()
+    }
+    _write_json_atomic(pointer_path, release)
+    return release
+
+
+def current_release(pointer_path):
+    """
+    Return the release currently promoted to serving, or None
+    """
+    if not os.path.exists(pointer_path):
+        return None
+    return _read_json(pointer_path)
+
+
+class TrainingJobManager:
+    """
+    Runs training jobs in detached processes and tracks them only through
+    the files in each job directory (status.json, pid and cancel), so every
+    server worker can report on and cancel every job, and a job outlives
+    the worker that started it.
+    """
+    def __init__(self, data_path, jobs_dir='models/jobs', pointer_path='models/serving.json', target=None):
+        self.data_path = data_path
+        self.jobs_dir = jobs_dir
+        self.pointer_path = pointer_path
+        # Module-level function run by the training process, with the
+        # signature of training_run.run_training_job
+        self.target = f'{target.__module__}:{target.__name__}' if target else DEFAULT_TARGET
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _pid(self, job_id):
+        try:
+            with open(os.path.join(self._job_dir(job_id), 'pid'), 'r') as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def submit(self, batch_size=64, epochs=50, shard_dir=None, runtime=None, subword_vocab_size=None,
+               architecture=None):
+        """
+        Start a training job in a separate process and return its id.
+        When `shard_dir` is given the job streams JSONL shards from it.
+        `runtime` holds intra_op_threads, inter_op_threads, mixed_precision,
+        jit_compile and strategy options for the training process.
+        `subword_vocab_size` trains a BPE tokenizer of that size.
+        `architecture` is 'lstm' (default) or 'transformer'.
+        Invalid options raise ValueError before a job is created.
+        """
+        options = validate_options(batch_size, epochs, runtime, subword_vocab_size, architecture)
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        _write_json_atomic(os.path.join(job_dir, 'status.json'), {
+            'job_id': job_id,
+            'status': 'queued',
+            'epoch': 0,
+            'epochs': options['epochs'],
+            'progress': 0.0,
+            'loss': None,
+            'val_loss': None,
+            'history': [],
+            'created_at': time.time()
+        })
+        _write_json_atomic(os.path.join(job_dir, 'job.json'), {
+            'target': self.target,
+            'data_path': self.data_path,
+            'pointer_path': self.pointer_path,
+            'options': dict(options, shard_dir=shard_dir)
+        })
+
+        # TensorFlow is not fork-safe, so training runs in a fresh
+        # interpreter with the same import path. Its own session keeps it
+        # running when the server worker that started it exits.
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path or os.getcwd() for path in sys.path))
+        with open(os.path.join(job_dir, 'train.log'), 'ab') as log:
+            process = subprocess.Popen(
+                [sys.executable, '-m', __name__, 'run', os.path.abspath(job_dir)],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env=env,
+                start_new_session=True
+            )
+        with open(os.path.join(job_dir, 'pid'), 'w') as f:
+            f.write(str(process.pid))
+        # Reap the process as soon as it exits
+        threading.Thread(target=process.wait, daemon=True).start()
+        return job_id
+
+    def status(self, job_id):
+        """
+        Return the status of a job, or None if the job does not exist
+        """
+        if not job_id.isalnum():
+            return None
+        job_dir = self._job_dir(job_id)
+        status_path = os.path.join(job_dir, 'status.json')
+        if not os.path.exists(status_path):
+            return None
+        status = _read_json(status_path)
+
+        # A process that died without reporting (e.g. killed) is a failure
+        pid = self._pid(job_id)
+        if status['status'] in ACTIVE_STATES and pid is not None and not _process_alive(pid, job_dir):
+            # It may have reported just before exiting
+            status = _read_json(status_path)
+            if status['status'] in ACTIVE_STATES:
+                status.update(
+                    status='failed',
+                    error='Training process exited without reporting a result, see train.log',
+                    finished_at=time.time()
+                )
+                _write_json_atomic(status_path, status)
+        return status
+
+    def list_jobs(self):
+        """
+        Return the status of every known job, newest first
+        """
+        statuses = [self.status(job_id) for job_id in os.listdir(self.jobs_dir)]
+        statuses = [s for s in statuses if s is not None]
+        return sorted(statuses, key=lambda s: s['created_at'], reverse=True)
+
+    def cancel(self, job_id):
+        """
+        Ask a job to stop. A running job stops after its current batch and
+        is not promoted; a job still preparing data is terminated outright.
+        """
+        status = self.status(job_id)
+        if status is None or status['status'] not in ACTIVE_STATES:
+            return status
+
+        job_dir = self._job_dir(job_id)
+        open(os.path.join(job_dir, 'cancel'), 'w').close()
+        pid = self._pid(job_id)
+        if status['status'] == 'queued' and pid is not None and _process_alive(pid, job_dir):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            status.update(status='cancelled', finished_at=time.time())
+            _write_json_atomic(os.path.join(job_dir, 'status.json'), status)
+            return status
+
+        status['cancel_requested'] = True
+        return status
+
+    def current_release(self):
+        return current_release(self.pointer_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a training job created by TrainingJobManager')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run = subparsers.add_parser('run', help='run the job in a job directory')
+    run.add_argument('job_dir')
+    args = parser.parse_args()
+
+    job = _read_json(os.path.join(args.job_dir, 'job.json'))
+    module_name, function_name = job['target'].split(':')
+    target = getattr(importlib.import_module(module_name), function_name)
+    target(args.job_dir, job['data_path'], job['pointer_path'], job['options'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import os
+import time
+import tensorflow as tf
+from .data_preparation import DataPreparation
+from .runtime import configure_runtime, create_strategy
+from .telemetry import TrainingTelemetry
+from .training_jobs import _read_json, _write_json_atomic, promote_release
+from .vocabulary import save_vocabulary
+from models.seq2seq_model import Seq2SeqModel
+
+
+class TrainingProgress(tf.keras.callbacks.Callback):
+    """
+    Keras callback that reports epoch progress to the job status file and
+    stops training when the job has been cancelled
+    """
+    def __init__(self, job_dir, epochs):
+        super().__init__()
+        self.job_dir = job_dir
+        self.epochs = epochs
+        self.status_path = os.path.join(job_dir, 'status.json')
+        self.cancel_path = os.path.join(job_dir, 'cancel')
+
+    def _update(self, **fields):
+        status = _read_json(self.status_path)
+        status.update(fields, updated_at=time.time())
+        _write_json_atomic(self.status_path, status)
+
+    def on_train_begin(self, logs=None):
+        self._update(status='running', started_at=time.time())
+
+    def on_train_batch_end(self, batch, logs=None):
+        if os.path.exists(self.cancel_path):
+            self.model.stop_training = True
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        status = _read_json(self.status_path)
+        history = status.get('history', [])
+        history.append({
+            'epoch': epoch + 1,
+            'loss': float(logs['loss']) if 'loss' in logs else None,
+            'val_loss': float(logs['val_loss']) if 'val_loss' in logs else None
+        })
+        self._update(
+            epoch=epoch + 1,
+            progress=(epoch + 1) / self.epochs,
+            loss=history[-1]['loss'],
+            val_loss=history[-1]['val_loss'],
+            history=history
+        )
+
+
+
+def run_training_job(job_dir, data_path, pointer_path, options):
+    """
+    Entry point of the training process: prepare data, train and promote
+    the best checkpoint when the run finishes without being cancelled
+    """
+    status_path = os.path.join(job_dir, 'status.json')
+    checkpoint_path = os.path.join(job_dir, 'seq2seq_model.h5')
+    batch_size, epochs = options['batch_size'], options['epochs']
+    runtime = options.get('runtime') or {}
+    try:
+        # Runs before TensorFlow initializes in this fresh process
+        configure_runtime(
+            intra_op_threads=runtime.get('intra_op_threads'),
+            inter_op_threads=runtime.get('inter_op_threads'),
+            mixed_precision=runtime.get('mixed_precision')
+        )
+        # Before telemetry and data setup create any TensorFlow ops
+        strategy = create_strategy(runtime.get('strategy'))
+
+        telemetry = TrainingTelemetry(os.path.join(job_dir, 'telemetry'), config=options)
+
+        # Prepare data, streaming from JSONL shards when available
+        with telemetry.phase('prepare_data'):
+            data_prep = DataPreparation(data_path, subword_vocab_size=options.get('subword_vocab_size'))
+            if options.get('shard_dir'):
+                # Re-export if Q&A pairs were added since the last export
+                data_prep.ensure_shards(options['shard_dir'])
+                data = data_prep.prepare_streaming_data(options['shard_dir'], batch_size=batch_size)
+                train_data, validation_data = data['train'], data['val']
+            else:
+                data = data_prep.prepare_data(cache_dir=os.path.join(os.path.dirname(data_path), 'encoded'))
+                train_data = [data['X_train'], data['y_train']]
+                validation_data = [data['X_val'], data['y_val']]
+        save_vocabulary(data['vocabulary'], os.path.join(job_dir, 'vocabulary.bin'))
+        if data['tokenizer'] is not None:
+            data['tokenizer'].save(os.path.join(job_dir, 'tokenizer.bpe'))
+
+        # Train
+        model = Seq2SeqModel(
+            len(data['vocabulary']),
+            jit_compile=runtime.get('jit_compile', False),
+            strategy=strategy,
+            architecture=options.get('architecture') or 'lstm'
+        )
+        model.train(
+            train_data,
+            validation_data,
+            batch_size=batch_size,
+            epochs=epochs,
+            checkpoint_path=checkpoint_path,
+            callbacks=[TrainingProgress(job_dir, epochs)],
+            telemetry=telemetry
+        )
+
+        status = _read_json(status_path)
+        if os.path.exists(os.path.join(job_dir, 'cancel')):
+            status['status'] = 'cancelled'
+        else:
+            # EarlyStopping restores the best weights, so save them as the release
+            model.save(checkpoint_path)
+            promote_release(job_dir, pointer_path, model.config())
+            status.update(status='succeeded', progress=1.0)
+    except Exception as e:
+        status = _read_json(status_path)
+        status.update(status='failed', error=str(e))
+
+    status['finished_at'] = time.time()
+    _write_json_atomic(status_path, status)
@@ -0,0 +1,217 @@
+import json
+import mmap
+import os
+import struct
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+import numpy as np
+from .preprocessor import SPECIAL_TOKENS, TextPreprocessor
+
+# Binary layout: header, offsets (uint32, count + 1), ids sorted by word
+# (uint32, count), then the UTF-8 words back to back in id order
+MAGIC = b'QAVOCAB1'
+HEADER = struct.Struct('<8sII')
+
+# Per-process preprocessor used by counting workers
+_worker_preprocessor = None
+
+
+def _init_worker(tokenizer, lemma_cache_size):
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(tokenizer, lemma_cache_size)
+
+
+def _count_shard(texts, preprocessor=None):
+    preprocessor = preprocessor or _worker_preprocessor
+    counts = Counter()
+    for text in texts:
+        counts.update(preprocessor.preprocess_text(text).split())
+    return counts
+
+
+class Vocabulary(Mapping):
+    """
+    Read-only word -> id mapping. Built in memory from a list of words, or
+    memory-mapped from the binary format written by `save`, in which case
+    lookups binary-search the mapped file instead of loading a dict.
+    """
+    def __init__(self, words=None):
+        self._words = list(words) if words is not None else None
+        self._index = {word: idx for idx, word in enumerate(self._words)} if words is not None else None
+        self._mmap = None
+
+    @classmethod
+    def load(cls, path):
+        vocabulary = cls()
+        with open(path, 'rb') as f:
+            vocabulary._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, _ = HEADER.unpack_from(vocabulary._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a vocabulary file: {path}")
+        vocabulary._count = count
+        vocabulary._offsets = np.frombuffer(vocabulary._mmap, dtype='<u4', count=count + 1, offset=HEADER.size)
+        vocabulary._sorted_ids = np.frombuffer(
+            vocabulary._mmap, dtype='<u4', count=count, offset=HEADER.size + 4 * (count + 1)
+        )
+        vocabulary._blob_start = HEADER.size + 4 * (2 * count + 1)
+        return vocabulary
+
+    def save(self, path):
+        """
+        Write the vocabulary in the binary format, atomically
+        """
+        encoded = [word.encode('utf-8') for word in self]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+        offsets[1:] = np.cumsum([len(word) for word in encoded])
+        sorted_ids = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype='<u4')
+
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(encoded), 0))
+            f.write(offsets.tobytes())
+            f.write(sorted_ids.tobytes())
+            f.write(b''.join(encoded))
+        os.replace(tmp_path, path)
+
+    def _word_bytes(self, idx):
+        start = self._blob_start + int(self._offsets[idx])
+        end = self._blob_start + int(self._offsets[idx + 1])
+        return self._mmap[start:end]
+
+    def word(self, idx):
+        """
+        Return the word for an id
+        """
+        if self._words is not None:
+            return self._words[idx]
+        return self._word_bytes(idx).decode('utf-8')
+
+    def get(self, word, default=None):
+        if self._index is not None:
+            return self._index.get(word, default)
+
+        # Binary search over ids sorted by their UTF-8 bytes
+        target = word.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            idx = int(self._sorted_ids[mid])
+            candidate = self._word_bytes(idx)
+            if candidate < target:
+                low = mid + 1
+            elif candidate > target:
+                high = mid
+            else:
+                return idx
+        return default
+
+    def __getitem__(self, word):
+        idx = self.get(word)
+        if idx is None:
+            raise KeyError(word)
+        return idx
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self.word(idx)
+
+    def __len__(self):
+        return len(self._words) if self._words is not None else self._count
+
+    def to_dict(self):
+        """
+        Return a plain dict, for hot loops that do many lookups
+        """
+        return {word: idx for idx, word in enumerate(self)}
+
+
+class VocabularyBuilder:
+    """
+    Build a vocabulary in a single streaming pass. Texts are read in shards
+    of `shard_size`, counted with Counter (in up to `n_jobs` worker
+    processes) and merged, so memory is bounded by the number of distinct
+    words rather than by the corpus size.
+    """
+    def __init__(self, preprocessor=None, min_freq=1, max_words=10000, n_jobs=1, shard_size=10000):
+        self.preprocessor = preprocessor or TextPreprocessor()
+        self.min_freq = min_freq
+        self.max_words = max_words
+        self.n_jobs = n_jobs
+        self.shard_size = shard_size
+
+    def _shards(self, texts):
+        texts = iter(texts)
+        while True:
+            shard = list(islice(texts, self.shard_size))
+            if not shard:
+                return
+            yield shard
+
+    def count(self, texts):
+        """
+        Count preprocessed word frequencies over an iterable of texts
+        """
+        counts = Counter()
+        if self.n_jobs <= 1:
+            for shard in self._shards(texts):
+                counts.update(_count_shard(shard, self.preprocessor))
+            return counts
+
+        with ProcessPoolExecutor(
+            max_workers=self.n_jobs,
+            initializer=_init_worker,
+            initargs=(self.preprocessor.tokenizer, self.preprocessor.lemma_cache_size)
+        ) as executor:
+            # Keep a bounded number of shards in flight so the input stays lazy
+            pending = set()
+            for shard in self._shards(texts):
+                if len(pending) >= 2 * self.n_jobs:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        counts.update(future.result())
+                pending.add(executor.submit(_count_shard, shard))
+            for future in pending:
+                counts.update(future.result())
+        return counts
+
+    def build(self, texts):
+        """
+        Build a Vocabulary with special tokens first, followed by up to
+        `max_words` words seen at least `min_freq` times, most frequent first
+        """
+        counts = self.count(texts)
+        words = sorted(
+            (item for item in counts.items() if item[1] >= self.min_freq),
+            key=lambda item: (-item[1], item[0])
+        )
+        if self.max_words is not None:
+            words = words[:self.max_words]
+        return Vocabulary(SPECIAL_TOKENS + [word for word, _ in words])
+
+
+def save_vocabulary(vocabulary, path):
+    """
+    Save a vocabulary as binary, or as JSON when `path` ends in .json
+    """
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(dict(vocabulary.items()), f)
+        return
+    if not isinstance(vocabulary, Vocabulary):
+        vocabulary = Vocabulary(sorted(vocabulary, key=vocabulary.get))
+    vocabulary.save(path)
+
+
+def load_vocabulary(path):
+    """
+    Load a binary vocabulary (memory-mapped) or a legacy JSON vocabulary
+    """
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return Vocabulary.load(path)
@@ -0,0 +1,52 @@
+"""
+Production server for main.py:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master process, which also loads the
+Ollama model before forking; each worker is pinned to its own core and
+opens its own Ollama and cache connections. `kill -HUP <master pid>`
+replaces the workers gracefully.
+"""
+import os
+
+CPUS = sorted(os.sched_getaffinity(0))
+
+bind = os.environ.get('TEACHER_CHATBOT_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('TEACHER_CHATBOT_WORKERS', len(CPUS)))
+preload_app = True
+# Answers wait on web scraping and generation
+timeout = 300
+graceful_timeout = 60
+
+
+def _warm_up(server):
+    # The module preloaded by gunicorn, not a second copy
+    import main
+    try:
+        main.chatbot.warm_up()
+        server.log.info("Loaded %s in Ollama", main.MODEL_NAME)
+    except Exception as e:
+        server.log.warning("Could not load %s in Ollama: %s", main.MODEL_NAME, e)
+
+
+def when_ready(server):
+    _warm_up(server)
+
+
+def on_reload(server):
+    # Runs in the master on SIGHUP, before the new workers are forked
+    _warm_up(server)
+
+
+def pre_fork(server, worker):
+    # Give the new worker the least used core among the live workers
+    used = [getattr(other, 'cpu', None) for other in server.WORKERS.values()]
+    worker.cpu = min(CPUS, key=used.count)
+
+
+def post_fork(server, worker):
+    os.sched_setaffinity(0, {worker.cpu})
+    import main
+    main.chatbot.reset_connections()
+    server.log.info("Worker %s pinned to CPU %s", worker.pid, worker.cpu)
@@ -41,6 +41,7 @@ SEARCH_API_URL = os.getenv("SEARCH_API_URL", "https://serpapi.com/search")
 MAX_SOURCES = 3
 SCRAPE_TIMEOUT = 10  # seconds
 MAX_CONTENT_LENGTH = 4000  # characters
+READY_CACHE_SECONDS = float(os.getenv("READY_CACHE_SECONDS", 5))  # between Ollama checks in /ready
 
 # Subject categories and their keywords
 SUBJECT_CATEGORIES = {
@@ -55,13 +56,17 @@ SUBJECT_CATEGORIES = {
 class TeacherChatbot:
     def __init__(self):
         self.logger = logger
+        self.client = ollama.Client()
+        # Last readiness result and when it was checked
+        self._ready = False
+        self._ready_checked_at = 0.0
         self.initialize_model()
         
     def initialize_model(self):
         """Initialize the LLaMA model through Ollama."""
         try:
             # Check if model exists in Ollama
-            models = ollama.list()
+            models = self.client.list()
             model_exists = any(model.get('name') == MODEL_NAME for model in models.get('models', []))
             
             if not model_exists:
@@ -72,6 +77,35 @@ class TeacherChatbot:
             self.logger.error(f"Failed to initialize Ollama model: {str(e)}")
             raise
 
+    def is_ready(self):
+        """
+        Check that Ollama is reachable and has the model. The result is
+        reused for READY_CACHE_SECONDS, so frequent readiness probes do not
+        each query Ollama.
+        """
+        now = time.monotonic()
+        if now - self._ready_checked_at < READY_CACHE_SECONDS:
+            return self._ready
+        try:
+            models = self.client.list()
+            ready = any(model.get('name') == MODEL_NAME for model in models.get('models', []))
+        except Exception as e:
+            self.logger.warning(f"Ollama is not reachable: {str(e)}")
+            ready = False
+        self._ready, self._ready_checked_at = ready, now
+        return ready
+
+    def warm_up(self):
+        """Load the model into Ollama's memory before the first query."""
+        # An empty prompt only loads the model
+        self.client.generate(model=MODEL_NAME, prompt="")
+
+    def reset_connections(self):
+        """Open fresh connections in a forked worker process."""
+        self.client = ollama.Client()
+        self._ready_checked_at = 0.0
+        cache.close()
+
     def search_web(self, query):
         """Search the web for educational content related to the query."""
         if not SEARCH_API_KEY:
@@ -257,7 +291,7 @@ Please answer the following student question in a helpful, educational manner:
 Explain the concepts clearly and in simple terms. If you're unsure, acknowledge this and provide your best educational guidance."""
 
             # Generate response using Ollama
-            response = ollama.chat(
+            response = self.client.chat(
                 model=MODEL_NAME,
                 messages=[
                     {
@@ -359,6 +393,13 @@ def health_check():
     """Health check endpoint."""
     return jsonify({"status": "ok"})
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 503 until Ollama can serve the model."""
+    if not chatbot.is_ready():
+        return jsonify({"status": "unavailable", "model": MODEL_NAME}), 503
+    return jsonify({"status": "ready", "model": MODEL_NAME, "pid": os.getpid()})
+
 # Simple web interface for testing
 @app.route('/', methods=['GET'])
 def home():
@@ -595,5 +636,5 @@ def home():
     """
 
 if __name__ == '__main__':
-    # Start the Flask app
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Start the Flask development server; use gunicorn.conf.py in production
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv("FLASK_DEBUG") == "1")
\ No newline at end of file